@@ -10,7 +10,7 @@ a = Analysis(
         ('assets', 'assets'),  # 包含assets文件夹
         ('config', 'config'),  # 包含config文件夹
     ],
-    hiddenimports=['pygame'],
+    hiddenimports=['pygame', 'numpy'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
@@ -0,0 +1,209 @@
+"""预缩放资源包：启动时免去 PNG 解码和缩放
+
+资源包把游戏实际使用尺寸的图片按显示格式（BGRA，每像素 4 字节）存成原始像素，
+运行时整个文件以 mmap 映射，每张图片用 pygame.image.frombuffer 直接包装，
+不解码、不缩放，也不复制像素。
+
+文件格式（小端）：
+    4 字节魔数 b"GPAK" | uint16 版本 | uint32 索引长度 | uint32 数据起点 | UTF-8 JSON 索引 | 像素数据
+索引为 {"entries": {"文件名@宽x高": {"size", "alpha", "offset", "length"}}}，
+offset 相对数据起点，数据起点和每张图片都按 64 字节对齐。
+
+    python asset_pack.py            # 重新生成 assets/images/sprites.pack
+    python asset_pack.py --compare  # 对比 PNG 与资源包的加载耗时
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+import time
+
+import pygame
+
+from resources import resource_path
+
+MAGIC = b"GPAK"
+VERSION = 1
+HEADER = struct.Struct("<4sHII")
+ALIGN = 64
+PIXEL_FORMAT = "BGRA"  # 与常见 32 位显示格式的内存排列一致，无需转换即可快速 blit
+PACK_PATH = resource_path("assets", "images", "sprites.pack")
+
+# 打进资源包的图片：(文件名, 尺寸（None 为原尺寸）, 是否带透明通道)
+PACK_IMAGES = [
+    ("atlas.png", None, True),
+    ("cloud.png", (800, 600), False),
+]
+
+
+def entry_key(name, size):
+    return f"{name}@{size[0]}x{size[1]}"
+
+
+class AssetPack:
+    """只读打开的资源包，按 (文件名, 尺寸) 返回共享 mmap 内存的 Surface"""
+
+    def __init__(self, path=PACK_PATH):
+        self.path = path
+        self.entries = {}
+        self.data_start = 0
+        self._file = None
+        self._map = None
+        self.open()
+
+    def open(self):
+        """映射资源包文件；文件不存在或格式不符时资源包为空"""
+        try:
+            self._file = open(self.path, "rb")
+            # ACCESS_COPY：私有映射，只读使用时与文件共享页面
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_COPY)
+            magic, version, index_length, self.data_start = HEADER.unpack_from(self._map, 0)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"不支持的资源包格式: {magic!r} v{version}")
+            index = json.loads(bytes(self._map[HEADER.size:HEADER.size + index_length]))
+            self.entries = index["entries"]
+        except (OSError, ValueError, KeyError, struct.error) as e:
+            if not isinstance(e, FileNotFoundError):
+                print(f"资源包不可用: {e}")
+            self.close()
+
+    def close(self):
+        self.entries = {}
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def find(self, name, size=None):
+        """查找条目，size 为 None 时匹配该文件名的任意尺寸"""
+        if size is not None:
+            return self.entries.get(entry_key(name, size))
+        prefix = name + "@"
+        for key, entry in self.entries.items():
+            if key.startswith(prefix):
+                return entry
+        return None
+
+    def image(self, name, size=None, alpha=None):
+        """返回包装资源包内存的 Surface，不存在（或透明通道设置不符）时返回 None
+
+        不透明图片由调用方在主线程 convert()，去掉透明通道，避免整屏背景按像素混合。
+        """
+        entry = self.find(name, size)
+        if entry is None or (alpha is not None and entry["alpha"] != alpha):
+            return None
+        offset, length = self.data_start + entry["offset"], entry["length"]
+        return pygame.image.frombuffer(memoryview(self._map)[offset:offset + length],
+                                       tuple(entry["size"]), PIXEL_FORMAT)
+
+    def __len__(self):
+        return len(self.entries)
+
+
+def _load_png(name, size):
+    image = pygame.image.load(resource_path("assets", "images", name))
+    if size is not None:
+        image = pygame.transform.scale(image, size)
+    return image
+
+
+def build(path=PACK_PATH, images=PACK_IMAGES):
+    """把 images 中的图片缩放到使用尺寸并写入资源包"""
+    blobs = []
+    entries = {}
+    offset = 0
+    for name, size, alpha in images:
+        try:
+            image = _load_png(name, size)
+        except (pygame.error, FileNotFoundError) as e:
+            print(f"跳过 {name}: {e}")
+            continue
+        if image.get_bitsize() != 32 or not image.get_flags() & pygame.SRCALPHA:
+            # 统一成带透明通道的 32 位格式再导出
+            converted = pygame.Surface(image.get_size(), pygame.SRCALPHA)
+            converted.blit(image, (0, 0))
+            image = converted
+        data = pygame.image.tobytes(image, PIXEL_FORMAT)
+        entries[entry_key(name, image.get_size())] = {
+            "size": list(image.get_size()),
+            "alpha": alpha,
+            "offset": offset,
+            "length": len(data),
+        }
+        blobs.append(data)
+        offset += len(data)
+        padding = -offset % ALIGN
+        blobs.append(b"\0" * padding)
+        offset += padding
+
+    index = json.dumps({"entries": entries}, ensure_ascii=False).encode("utf-8")
+    data_start = HEADER.size + len(index)
+    data_start += -data_start % ALIGN
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(index), data_start))
+        f.write(index)
+        f.write(b"\0" * (data_start - HEADER.size - len(index)))
+        for blob in blobs:
+            f.write(blob)
+    return entries
+
+
+def compare(repeat=20):
+    """对比两种加载方式的耗时：PNG 解码 + 缩放 + convert 与 mmap + frombuffer"""
+    results = {}
+    for name, size, alpha in PACK_IMAGES:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            image = _load_png(name, size)
+            image.convert_alpha() if alpha else image.convert()
+        png = (time.perf_counter() - start) / repeat
+        start = time.perf_counter()
+        for _ in range(repeat):
+            pack = AssetPack()
+            surface = pack.image(name, size)
+            if surface is None:
+                raise SystemExit("资源包中缺少条目，请先运行 python asset_pack.py")
+            if not alpha:
+                surface.convert()
+            del surface  # 释放对映射内存的引用后才能关闭
+            pack.close()
+        packed = (time.perf_counter() - start) / repeat
+        results[name] = (png, packed)
+        print(f"{name:<12} PNG {png * 1000:8.2f} ms   资源包 {packed * 1000:8.3f} ms   ({png / packed:6.1f}x)")
+    total_png = sum(png for png, _ in results.values())
+    total_pack = sum(packed for _, packed in results.values())
+    print(f"{'合计':<10} PNG {total_png * 1000:8.2f} ms   资源包 {total_pack * 1000:8.3f} ms   "
+          f"({total_png / total_pack:6.1f}x)")
+
+    # 参照：打包图集之前逐个解码、缩放各精灵的原始 PNG
+    from atlas import SPRITES
+    start = time.perf_counter()
+    for name, size in SPRITES.items():
+        _load_png(f"{name}.png", size).convert_alpha()
+    legacy = time.perf_counter() - start
+    print(f"逐个加载 {len(SPRITES)} 张原始精灵 PNG: {legacy * 1000:.2f} ms")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成预缩放资源包")
+    parser.add_argument("--compare", action="store_true", help="对比 PNG 与资源包的加载耗时")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    if args.compare:
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        pygame.init()
+        pygame.display.set_mode((800, 600))
+        compare(args.repeat)
+        pygame.quit()
+        return
+    entries = build()
+    size = os.path.getsize(PACK_PATH)
+    print(f"资源包已生成: {PACK_PATH}（{len(entries)} 张图片，{size / 1024:.0f} KB）")
+
+
+if __name__ == "__main__":
+    main()
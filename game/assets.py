@@ -0,0 +1,202 @@
+import json
+import os
+
+import pygame
+
+from asset_pack import AssetPack
+from resources import resource_path
+
+# 资源根目录（与启动时的工作目录无关）
+ASSET_DIR = resource_path("assets")
+# 图集索引（由 atlas.py 生成，位于图片目录下）
+ATLAS_INDEX = "atlas.json"
+
+
+def image_path(name):
+    """返回图片资源的路径"""
+    return os.path.join(ASSET_DIR, "images", name)
+
+
+def sound_path(name):
+    """返回音效资源的路径"""
+    return os.path.join(ASSET_DIR, "sounds", name)
+
+
+class AssetCache:
+    """进程级资源缓存：每个 (路径, 尺寸) 只加载、缩放、转换一次，之后返回共享引用"""
+
+    def __init__(self):
+        self.images = {}
+        self.sounds = {}
+        self.failed = set()  # 加载失败的资源，避免重复读盘
+        self.unconverted = set()  # 创建窗口之前加载、尚未 convert 的图片
+        self.pack = None  # 预缩放资源包，首次加载图片时打开
+        self.loader = None  # 后台加载器（loader.py），设置后未命中时先取后台解码的结果
+        self.atlas = None  # 图集图像
+        self.atlas_path = None
+        self.atlas_index = None  # {精灵名: (x, y, w, h)}，None 表示尚未加载
+        self.atlas_unconverted = False
+        self.sprites = {}  # 精灵名 -> 图集子表面
+        self.volume = 0.5
+        self.hits = 0
+        self.misses = 0
+
+    def image(self, path, size=None, alpha=True):
+        """获取图片，size 为 None 时保持原始尺寸"""
+        key = (path, size, alpha)
+        image = self.images.get(key)
+        if image is not None:
+            self.hits += 1
+            # 窗口创建之后补做像素格式转换
+            if key in self.unconverted and pygame.display.get_surface() is not None:
+                image = self._convert(image, alpha)
+                self.images[key] = image
+                self.unconverted.discard(key)
+            return image
+        if key in self.failed:
+            self.hits += 1
+            raise pygame.error(f"资源加载失败（已缓存）: {path}")
+
+        self.misses += 1
+        try:
+            loaded = self._take_loaded(("image",) + key)
+            image, ready = loaded if loaded is not None else self.decode_image(path, size, alpha)
+        except (pygame.error, FileNotFoundError):
+            self.failed.add(key)
+            raise
+        if not ready:
+            if pygame.display.get_surface() is not None:
+                image = self._convert(image, alpha)
+            else:
+                self.unconverted.add(key)
+        self.images[key] = image
+        return image
+
+    def open_pack(self):
+        """打开预缩放资源包（只打开一次）"""
+        if self.pack is None:
+            self.pack = AssetPack()
+        return self.pack
+
+    def decode_image(self, path, size=None, alpha=True):
+        """读取并缩放图片，不访问缓存，可在后台线程调用
+
+        返回 (图像, 是否已是最终像素格式)。资源包中带透明通道的图片已是显示格式，
+        其余图片需要在主线程 convert。
+        """
+        image = self.open_pack().image(os.path.basename(path), size, alpha)
+        if image is not None:
+            return image, alpha
+        image = pygame.image.load(path)
+        if size is not None:
+            image = pygame.transform.scale(image, size)
+        return image, False
+
+    def decode_sound(self, path):
+        """解码音效，不访问缓存，可在后台线程调用"""
+        return pygame.mixer.Sound(path)
+
+    def _take_loaded(self, key):
+        """后台加载器已接手该资源时只等待这一个资源的解码结果，否则返回 None"""
+        if self.loader is None:
+            return None
+        return self.loader.take(key)
+
+    def load_atlas(self, index_path=None):
+        """加载图集及索引；不可用时索引为空，之后所有精灵回退到单独的 PNG"""
+        self.atlas = None
+        self.atlas_index = {}
+        self.sprites.clear()
+        try:
+            with open(index_path or image_path(ATLAS_INDEX), encoding="utf-8") as f:
+                index = json.load(f)
+            atlas_path = image_path(index["image"])
+            atlas = self.image(atlas_path)
+            sprites = {name: tuple(rect) for name, rect in index["sprites"].items()}
+        except (OSError, ValueError, KeyError, TypeError, pygame.error) as e:
+            print(f"图集不可用，改为加载单独的图片: {e}")
+            return
+        self.atlas_path = atlas_path
+        self.atlas_unconverted = pygame.display.get_surface() is None
+        self.atlas = atlas
+        self.atlas_index = sprites
+
+    def sprite(self, name, size):
+        """按名称获取精灵：优先返回图集中的子表面，图集中没有该尺寸的精灵时加载 name.png"""
+        if self.atlas_index is None:
+            self.load_atlas()
+        rect = self.atlas_index.get(name)
+        if rect is None or rect[2:] != tuple(size):
+            return self.image(image_path(f"{name}.png"), tuple(size))
+        # 窗口创建之后补做像素格式转换，子表面随之重建
+        if self.atlas_unconverted and pygame.display.get_surface() is not None:
+            self.atlas = self.image(self.atlas_path)
+            self.atlas_unconverted = False
+            self.sprites.clear()
+        sprite = self.sprites.get(name)
+        if sprite is None:
+            self.misses += 1
+            sprite = self.atlas.subsurface(rect)
+            self.sprites[name] = sprite
+        else:
+            self.hits += 1
+        return sprite
+
+    def sound(self, path):
+        """获取音效，同一路径只解码一次"""
+        sound = self.sounds.get(path)
+        if sound is not None:
+            self.hits += 1
+            return sound
+        if path in self.failed:
+            self.hits += 1
+            raise pygame.error(f"资源加载失败（已缓存）: {path}")
+
+        self.misses += 1
+        try:
+            sound = self._take_loaded(("sound", path))
+            if sound is None:
+                sound = self.decode_sound(path)
+        except (pygame.error, FileNotFoundError):
+            self.failed.add(path)
+            raise
+        sound.set_volume(self.volume)
+        self.sounds[path] = sound
+        return sound
+
+    def set_volume(self, volume):
+        """设置所有已缓存音效的音量"""
+        self.volume = volume
+        for sound in self.sounds.values():
+            sound.set_volume(volume)
+
+    def stats(self):
+        """返回缓存命中统计"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "images": len(self.images),
+            "sounds": len(self.sounds),
+            "atlas_sprites": len(self.sprites),
+            "failed": len(self.failed),
+        }
+
+    def clear(self):
+        """清空缓存"""
+        self.images.clear()
+        self.sounds.clear()
+        self.failed.clear()
+        self.unconverted.clear()
+        self.atlas = None
+        self.atlas_index = None
+        self.sprites.clear()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _convert(image, alpha):
+        return image.convert_alpha() if alpha else image.convert()
+
+
+# 全局共享的资源缓存
+asset_cache = AssetCache()
@@ -0,0 +1,97 @@
+"""图集构建：把预先缩放好的精灵打包成一张 atlas.png，并生成 atlas.json 索引
+
+    python atlas.py
+
+运行时 asset_cache.sprite(名称, 尺寸) 从图集中取子表面，图集中没有的精灵
+回退到单独的 PNG。新增精灵时在 SPRITES 中登记名称和尺寸，再重新运行本脚本
+（同时重新生成预缩放资源包，见 asset_pack.py）。
+"""
+import argparse
+import json
+import os
+
+import pygame
+
+import asset_pack
+from assets import ATLAS_INDEX, image_path
+
+ATLAS_IMAGE = "atlas.png"
+
+# 精灵名称（对应 assets/images/名称.png）和游戏中使用的尺寸
+SPRITES = {
+    "player1": (64, 64),
+    "player2": (64, 64),
+    "enemy_normal": (64, 64),
+    "enemy_special": (80, 80),
+    "enemy_boss": (128, 128),
+    "explosion": (64, 64),
+    "item_health": (32, 32),
+    "item_weapon": (32, 32),
+    "item_shield": (32, 32),
+    "item_bomb": (32, 32),
+}
+
+ATLAS_WIDTH = 512
+PADDING = 1  # 精灵之间留出的透明间隔
+
+
+def pack(sizes, width=ATLAS_WIDTH, padding=PADDING):
+    """货架式装箱：按高度从大到小逐行排列
+
+    sizes 为 {名称: (宽, 高)}，返回 ({名称: (x, y)}, 总高度)。
+    """
+    positions = {}
+    x = y = shelf_height = 0
+    for name, (w, h) in sorted(sizes.items(), key=lambda item: (-item[1][1], item[0])):
+        if w > width:
+            raise ValueError(f"精灵 {name} 宽度 {w} 超过图集宽度 {width}")
+        if x + w > width:
+            x = 0
+            y += shelf_height + padding
+            shelf_height = 0
+        positions[name] = (x, y)
+        x += w + padding
+        shelf_height = max(shelf_height, h)
+    return positions, y + shelf_height
+
+
+def build(sprites=SPRITES, width=ATLAS_WIDTH):
+    """加载并缩放各精灵，写出图集图像和索引，返回索引内容"""
+    images = {}
+    for name, size in sprites.items():
+        try:
+            images[name] = pygame.transform.scale(pygame.image.load(image_path(f"{name}.png")), size)
+        except (pygame.error, FileNotFoundError) as e:
+            print(f"跳过 {name}: {e}")
+    positions, height = pack({name: image.get_size() for name, image in images.items()}, width)
+
+    atlas = pygame.Surface((width, height), pygame.SRCALPHA)
+    index = {"image": ATLAS_IMAGE, "size": [width, height], "sprites": {}}
+    for name, (x, y) in sorted(positions.items()):
+        image = images[name]
+        # 带透明通道的精灵按通道取最大值拷贝到透明底上，避免边缘与黑色混合
+        flags = pygame.BLEND_RGBA_MAX if image.get_flags() & pygame.SRCALPHA else 0
+        atlas.blit(image, (x, y), special_flags=flags)
+        index["sprites"][name] = [x, y, image.get_width(), image.get_height()]
+
+    pygame.image.save(atlas, image_path(ATLAS_IMAGE))
+    with open(image_path(ATLAS_INDEX), "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=4, ensure_ascii=False)
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="把游戏精灵打包成图集")
+    parser.add_argument("--width", type=int, default=ATLAS_WIDTH, help="图集宽度（像素）")
+    args = parser.parse_args()
+    index = build(width=args.width)
+    width, height = index["size"]
+    print(f"图集已生成: {os.path.normpath(image_path(ATLAS_IMAGE))} "
+          f"({width}x{height}，{len(index['sprites'])} 个精灵)")
+    # 资源包中包含图集，一并重新生成
+    entries = asset_pack.build()
+    print(f"资源包已生成: {asset_pack.PACK_PATH}（{len(entries)} 张图片）")
+
+
+if __name__ == "__main__":
+    main()
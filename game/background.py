@@ -1,11 +1,11 @@
 import pygame
+from assets import asset_cache, image_path
 
 class Background:
     def __init__(self, screen_width, screen_height):
         try:
-            self.original_image = pygame.image.load("../assets/images/cloud.png").convert_alpha()
-            # 调整图片大小以适应屏幕
-            self.image = pygame.transform.scale(self.original_image, (screen_width, screen_height))
+            # 调整图片大小以适应屏幕（背景不透明，使用 convert 加快绘制）
+            self.image = asset_cache.image(image_path("cloud.png"), (screen_width, screen_height), alpha=False)
             self.image_loaded = True
         except (pygame.error, FileNotFoundError) as e:
             print(f"Error loading background image: {e}")
@@ -0,0 +1,305 @@
+"""可复现的负载场景基准测试
+
+每个场景通过 EnemyManager、Player 以及各自的 draw 调用驱动一局无窗口游戏
+（SDL dummy 视频驱动），统计每帧更新和绘制耗时的分位数、内存分配和实体数量，
+以 JSON 输出，便于比较不同版本：
+
+    python benchmark.py --output before.json
+    python benchmark.py --compare before.json after.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import numpy as np
+import pygame
+
+from background import Background
+from config import load_config
+from headless import HeadlessGame
+from text_cache import NumberText
+
+
+def _fill_normal_enemies(game, count=200):
+    """在屏幕上铺满普通敌人"""
+    manager = game.enemies
+    for i in range(count):
+        manager.enemies.append(manager.create_enemy((i * 37) % 736, -50 + (i * 53) % 600, "enemy_normal"))
+
+
+def _recycle_enemies(game):
+    """飞出屏幕底部的敌人回到顶部，被消灭的敌人重新补齐，保持负载恒定"""
+    for enemy in game.enemies.enemies:
+        if enemy.rect.top > 600:
+            enemy.rect.bottom = 0
+    _fill_normal_enemies(game, 200 - len(game.enemies.enemies))
+
+
+def _setup_normal_200(game):
+    # 生成计时器拉到无穷远，负载只来自固定的敌人
+    game.enemies.spawn_interval = float("inf")
+    game.enemies.elite_spawn_interval = float("inf")
+    _fill_normal_enemies(game, 200)
+
+
+def _setup_boss_phase2(game):
+    manager = game.enemies
+    manager.spawn_boss()
+    boss = manager.boss
+    boss.health = boss.max_health = 10 ** 6  # 基准测试期间 Boss 不会被击败
+    boss.phase = 2
+    boss.attack_pattern = "circle"
+    boss.attack_interval = float("inf")  # 固定为圆形弹幕
+    boss.shoot_cooldown = 800
+    boss.max_bullets = 4096
+    for player in game.players:
+        player.weapon_level = 3
+
+
+def _setup_two_players_items(game):
+    game.enemies.spawn_interval = float("inf")
+    game.enemies.elite_spawn_interval = float("inf")
+
+
+def _fill_items(game):
+    """保持道具数量为对象池容量上限，道具停在玩家够不到的位置"""
+    manager = game.enemies
+    types = ["health", "weapon", "shield"]
+    while True:
+        item = manager.item_pool.acquire(30 + (len(manager.items) * 47) % 740, 40, types[len(manager.items) % 3])
+        if item is None:
+            break
+        manager.add_item(item)
+    for item in manager.items:
+        if item.rect.top > 300:
+            item.rect.top = 40
+
+
+def _shoot_all(game):
+    return [{"shoot"} for _ in game.players]
+
+
+def _strafe(game):
+    # 左右往返移动并持续射击
+    direction = "left" if (game.tick // 90) % 2 else "right"
+    return [{"shoot", direction} for _ in game.players]
+
+
+SCENARIOS = {
+    "normal_200": {
+        "description": "200 个普通敌人",
+        "two_player": False,
+        "setup": _setup_normal_200,
+        "tick": _recycle_enemies,
+        "inputs": _strafe,
+    },
+    "boss_phase2_circle_weapon3": {
+        "description": "Boss 第二阶段圆形弹幕，玩家武器等级 3",
+        "two_player": False,
+        "setup": _setup_boss_phase2,
+        "tick": None,
+        "inputs": _shoot_all,
+    },
+    "two_players_max_items": {
+        "description": "双人模式，道具数量达到上限",
+        "two_player": True,
+        "setup": _setup_two_players_items,
+        "tick": _fill_items,
+        "inputs": _strafe,
+    },
+}
+
+
+def _percentiles(samples):
+    values = np.asarray(samples) * 1000.0  # 毫秒
+    return {
+        "mean": round(float(values.mean()), 4),
+        "p50": round(float(np.percentile(values, 50)), 4),
+        "p90": round(float(np.percentile(values, 90)), 4),
+        "p99": round(float(np.percentile(values, 99)), 4),
+        "max": round(float(values.max()), 4),
+    }
+
+
+def _entity_counts(game):
+    manager = game.enemies
+    return {
+        "enemies": len(manager.enemies),
+        "player_bullets": sum(len(player.bullets) for player in game.players),
+        "enemy_bullets": len(manager.enemy_bullets),
+        "items": len(manager.items),
+        "explosions": len(manager.explosions),
+    }
+
+
+def _draw(game, screen, background, hud):
+    screen.fill((0, 0, 0))
+    background.draw(screen)
+    for player in game.players:
+        player.draw(screen)
+    game.enemies.draw(screen)
+    # 与 main.py 相同：HUD 数值由预渲染字形拼接，单人模式不带 P1 前缀
+    prefix = len(game.players) == 2
+    for i, player in enumerate(game.players):
+        label = f"P{player.player_id}" if prefix else ""
+        x = screen.get_width() - 200 if i else 10
+        screen.blit(hud[label + "得分: "].render(player.score), (x, 10))
+        screen.blit(hud[label + "生命: "].render(player.lives), (x, 50))
+    pygame.display.flip()
+
+
+def _make_game(name, seed):
+    scenario = SCENARIOS[name]
+    game = HeadlessGame(seed=seed, two_player=scenario["two_player"])
+    scenario["setup"](game)
+    return game, scenario
+
+
+def _tick(game, scenario, screen, background, hud):
+    if scenario["tick"]:
+        scenario["tick"](game)
+    start = time.perf_counter()
+    game.step(scenario["inputs"](game))
+    for player in game.players:
+        player.lives = player.max_lives  # 基准测试期间玩家不会死亡
+    middle = time.perf_counter()
+    background.update()
+    _draw(game, screen, background, hud)
+    end = time.perf_counter()
+    return middle - start, end - middle
+
+
+def run_scenario(name, frames=600, warmup=60, seed=0):
+    """运行一个场景并返回统计结果"""
+    screen = pygame.display.get_surface()
+    background = Background(screen.get_width(), screen.get_height())
+    font = pygame.font.SysFont(load_config()["font"], 36)
+    hud = {label: NumberText(font, label, (255, 255, 255))
+           for label in ("得分: ", "生命: ", "P1得分: ", "P1生命: ", "P2得分: ", "P2生命: ")}
+
+    # 第一遍：计时
+    game, scenario = _make_game(name, seed)
+    for _ in range(warmup):
+        _tick(game, scenario, screen, background, hud)
+    update_times = []
+    draw_times = []
+    counts = []
+    for _ in range(frames):
+        update_time, draw_time = _tick(game, scenario, screen, background, hud)
+        update_times.append(update_time)
+        draw_times.append(draw_time)
+        counts.append(_entity_counts(game))
+
+    # 第二遍：统计内存分配（tracemalloc 会拖慢运行，因此与计时分开）
+    game, scenario = _make_game(name, seed)
+    for _ in range(warmup):
+        _tick(game, scenario, screen, background, hud)
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    before = tracemalloc.take_snapshot()
+    for _ in range(frames):
+        _tick(game, scenario, screen, background, hud)
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    diff = after.compare_to(before, "filename")
+    allocated = sum(stat.size_diff for stat in diff if stat.size_diff > 0)
+    blocks = sum(stat.count_diff for stat in diff if stat.count_diff > 0)
+
+    return {
+        "description": scenario["description"],
+        "frames": frames,
+        "update_ms": _percentiles(update_times),
+        "draw_ms": _percentiles(draw_times),
+        "frame_ms": _percentiles([u + d for u, d in zip(update_times, draw_times)]),
+        "allocations": {
+            "net_bytes": allocated,
+            "net_blocks": blocks,
+            "net_bytes_per_frame": round(allocated / frames, 1),
+            "peak_traced_bytes": peak,
+        },
+        "entities": {
+            key: {"mean": round(statistics.mean(c[key] for c in counts), 1), "max": max(c[key] for c in counts)}
+            for key in counts[0]
+        },
+    }
+
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(names, frames, seed):
+    pygame.init()
+    pygame.display.set_mode((800, 600))
+    report = {
+        "revision": _git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "numpy": np.__version__,
+        "seed": seed,
+        "scenarios": {name: run_scenario(name, frames=frames, seed=seed) for name in names},
+    }
+    pygame.quit()
+    return report
+
+
+def compare(old_path, new_path):
+    """对比两次结果中各场景的 p50/p99 帧耗时"""
+    with open(old_path, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(new_path, encoding="utf-8") as f:
+        new = json.load(f)
+    for name, result in new["scenarios"].items():
+        if name not in old["scenarios"]:
+            continue
+        before = old["scenarios"][name]
+        print(name)
+        for section in ("update_ms", "draw_ms", "frame_ms"):
+            for key in ("p50", "p99"):
+                a, b = before[section][key], result[section][key]
+                change = (b - a) / a * 100 if a else 0.0
+                print(f"  {section:<10}{key:<4}{a:>10.3f} -> {b:>10.3f} ms ({change:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="负载场景基准测试")
+    parser.add_argument("scenarios", nargs="*", help=f"场景名称，默认全部：{', '.join(SCENARIOS)}")
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="结果写入 JSON 文件（默认输出到标准输出）")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="对比两次结果")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+    names = args.scenarios or list(SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"未知场景: {', '.join(unknown)}")
+    report = run(names, args.frames, args.seed)
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        sys.stdout.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+import pygame
+
+
+class SystemClock:
+    """实时计时器，读取 pygame 的运行时间"""
+
+    def get_ticks(self):
+        return pygame.time.get_ticks()
+
+
+class TickClock:
+    """手动推进的计时器，每次 advance 前进固定的毫秒数，用于无窗口模拟"""
+
+    def __init__(self, step_ms=1000 / 60, start=0):
+        self.step_ms = step_ms
+        self.time = start
+        self.frame = 0
+
+    def get_ticks(self):
+        return int(self.time)
+
+    def advance(self, ms=None):
+        """前进一帧（或指定毫秒数），返回当前时间"""
+        self.time += self.step_ms if ms is None else ms
+        self.frame += 1
+        return self.get_ticks()
+
+
+# 默认使用的实时计时器
+system_clock = SystemClock()
@@ -0,0 +1,44 @@
+class SpatialHash:
+    """均匀网格空间哈希：每帧重建一次，碰撞查询只检查同一格子内的候选对象"""
+
+    def __init__(self, cell_size=64):
+        self.cell_size = cell_size
+        self.cells = {}
+
+    def clear(self):
+        self.cells.clear()
+
+    def _cell_range(self, rect):
+        size = self.cell_size
+        return (range(rect.left // size, (rect.right - 1) // size + 1),
+                range(rect.top // size, (rect.bottom - 1) // size + 1))
+
+    def insert(self, rect, key):
+        """插入对象，key 需可比较（通常是列表下标），查询结果按 key 排序"""
+        xs, ys = self._cell_range(rect)
+        cells = self.cells
+        for cx in xs:
+            for cy in ys:
+                bucket = cells.get((cx, cy))
+                if bucket is None:
+                    cells[(cx, cy)] = [key]
+                else:
+                    bucket.append(key)
+
+    def query(self, rect):
+        """返回与 rect 所在格子重叠的候选 key（去重并排序），仍需精确检测"""
+        xs, ys = self._cell_range(rect)
+        cells = self.cells
+        found = set()
+        for cx in xs:
+            for cy in ys:
+                bucket = cells.get((cx, cy))
+                if bucket:
+                    found.update(bucket)
+        return sorted(found)
+
+    def build(self, rects):
+        """用一组矩形重建网格，key 为其下标"""
+        self.cells.clear()
+        for i, rect in enumerate(rects):
+            self.insert(rect, i)
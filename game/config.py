@@ -1,26 +1,18 @@
+import copy
 import json
 import os
-import pygame
-
-# 按键名称到 pygame 常量的映射
-KEY_MAPPING = {
-    "LEFT": pygame.K_LEFT,
-    "RIGHT": pygame.K_RIGHT,
-    "UP": pygame.K_UP,
-    "DOWN": pygame.K_DOWN,
-    "SPACE": pygame.K_SPACE,
-    "A": pygame.K_a,
-    "D": pygame.K_d,
-    "W": pygame.K_w,
-    "S": pygame.K_s,
-    "F": pygame.K_f
-}
+import time
+import weakref
+from collections.abc import Mapping
+from types import MappingProxyType
+from resources import resource_path, user_path
 
 # 默认配置（可用于首次生成 settings.json 或作为 fallback）
 DEFAULT_CONFIG = {
     "screen_width": 800,
     "screen_height": 600,
     "volume": 0.5,  # 音量设置 (0.0 到 1.0)
+    "dirty_rects": False,  # 只刷新画面中变化的区域
     "font": "SimHei",
     "key_bindings": {
         "player1": {
@@ -63,63 +55,147 @@ DEFAULT_CONFIG = {
     "enemy_spawn_rate": 1.0  # 每秒生成一个敌人
 }
 
-# 保存上次修改时间
-_last_modified_time = 0
+CONFIG_PATH = user_path("config", "settings.json")
+# 随游戏分发的配置，用户配置不存在时以它为初始值
+BUNDLED_CONFIG_PATH = resource_path("config", "settings.json")
 
-CONFIG_PATH = os.path.join("../config", "settings.json")
+def freeze_config(value):
+    """将配置转换为只读结构（dict -> MappingProxyType，list -> tuple）"""
+    if isinstance(value, Mapping):
+        return MappingProxyType({key: freeze_config(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze_config(item) for item in value)
+    return value
 
-def get_key_constant(key_name):
-    """将按键名称转换为 pygame 按键常量"""
-    return KEY_MAPPING.get(key_name, key_name)
+def thaw_config(value):
+    """将只读配置还原为可修改、可序列化的 dict/list"""
+    if isinstance(value, Mapping):
+        return {key: thaw_config(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [thaw_config(item) for item in value]
+    return value
 
-def load_config():
-    """加载配置文件，如果文件不存在则生成默认配置"""
-    global _last_modified_time
-    try:
-        # 检查文件是否存在
-        if not os.path.exists(CONFIG_PATH):
-            save_config(DEFAULT_CONFIG)
+def merge_defaults(config):
+    """补全缺失的配置项"""
+    for key, value in DEFAULT_CONFIG.items():
+        if key not in config:
+            config[key] = copy.deepcopy(value)
+        elif key == "key_bindings":
+            # 确保按键绑定配置完整
+            for player, actions in DEFAULT_CONFIG[key].items():
+                if player not in config[key]:
+                    config[key][player] = {}
+                for action, key_name in actions.items():
+                    if action not in config[key][player]:
+                        config[key][player][action] = key_name
+    return config
+
+
+class ConfigStore:
+    """配置存储：内存中保留一份只读快照，仅在文件变化时重新解析并通知订阅者"""
+
+    def __init__(self, path=CONFIG_PATH, poll_interval=500):
+        self.path = path
+        self.poll_interval = poll_interval  # 检查文件修改时间的最小间隔（毫秒）
+        self.snapshot = None
+        self.version = 0
+        self._mtime = None
+        self._last_poll = 0.0
+        self._subscribers = []
+
+    def get(self):
+        """返回当前配置快照（不访问文件系统）"""
+        if self.snapshot is None:
+            self.reload()
+        return self.snapshot
+
+    def poll(self, force=False):
+        """按限定频率检查文件修改时间，有变化时重新加载，返回是否产生了新版本"""
+        now = time.monotonic()
+        if not force and (now - self._last_poll) * 1000 < self.poll_interval:
+            return False
+        self._last_poll = now
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            mtime = None
+        if self.snapshot is not None and mtime == self._mtime:
+            return False
+        return self.reload()
+
+    def reload(self):
+        """从文件读取配置，文件不存在时生成默认配置"""
+        if not os.path.exists(self.path):
             print("配置文件未找到，已生成默认配置文件。")
-            return DEFAULT_CONFIG
-
-        # 检查文件是否被修改
-        current_modified_time = os.path.getmtime(CONFIG_PATH)
-        if current_modified_time == _last_modified_time:
-            # 文件未修改，返回当前配置
-            with open(CONFIG_PATH, "r", encoding="utf-8") as f:
-                return json.load(f)
-
-        # 文件已修改，更新修改时间并加载新配置
-        _last_modified_time = current_modified_time
-        with open(CONFIG_PATH, "r", encoding="utf-8") as f:
-            config = json.load(f)
-            # 确保所有必要的配置项都存在
-            for key, value in DEFAULT_CONFIG.items():
-                if key not in config:
-                    config[key] = value
-                elif key == "key_bindings":
-                    # 确保按键绑定配置完整
-                    for player, actions in DEFAULT_CONFIG[key].items():
-                        if player not in config[key]:
-                            config[key][player] = {}
-                        for action, key_name in actions.items():
-                            if action not in config[key][player]:
-                                config[key][player][action] = key_name
-            return config
-    except Exception as e:
-        print(f"读取配置文件失败，使用默认配置: {e}")
+            self.set(self._initial_config())
+            return True
+        try:
+            mtime = os.path.getmtime(self.path)
+            with open(self.path, "r", encoding="utf-8") as f:
+                config = merge_defaults(json.load(f))
+        except Exception as e:
+            # 文件可能正在被写入，保留当前快照，下次轮询时重试
+            if self.snapshot is None:
+                print(f"读取配置文件失败，使用默认配置: {e}")
+                self._publish(merge_defaults(copy.deepcopy(DEFAULT_CONFIG)))
+            else:
+                print(f"读取配置文件失败，保留当前配置: {e}")
+            return False
+        self._mtime = mtime
+        self._publish(config)
+        return True
+
+    def set(self, config):
+        """保存配置到文件并立即推送新版本"""
+        config = thaw_config(config)
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump(config, f, indent=4, ensure_ascii=False)
+            self._mtime = os.path.getmtime(self.path)
+        except Exception as e:
+            print(f"Error saving config: {e}")
+        self._publish(merge_defaults(config))
+
+    def _initial_config(self):
+        """新建配置文件时的初始内容：优先复制随游戏分发的配置"""
+        if os.path.abspath(self.path) != os.path.abspath(BUNDLED_CONFIG_PATH):
+            try:
+                with open(BUNDLED_CONFIG_PATH, "r", encoding="utf-8") as f:
+                    return merge_defaults(json.load(f))
+            except (OSError, ValueError):
+                pass
         return DEFAULT_CONFIG
 
+    def subscribe(self, callback):
+        """订阅配置变化；绑定方法以弱引用保存，对象销毁后自动退订"""
+        if hasattr(callback, "__self__"):
+            self._subscribers.append(weakref.WeakMethod(callback))
+        else:
+            self._subscribers.append(lambda: callback)
+
+    def _publish(self, config):
+        self.snapshot = freeze_config(config)
+        self.version += 1
+        alive = []
+        for ref in self._subscribers:
+            callback = ref()
+            if callback is not None:
+                alive.append(ref)
+                callback(self.snapshot)
+        self._subscribers = alive
+
+
+# 全局配置存储
+config_store = ConfigStore()
+
+def load_config():
+    """返回当前配置快照（只读，热路径上不会读取文件）"""
+    return config_store.get()
+
 def save_config(config):
     """保存配置到文件"""
-    global _last_modified_time
-    try:
-        os.makedirs(os.path.dirname(CONFIG_PATH), exist_ok=True)
-        with open(CONFIG_PATH, "w", encoding="utf-8") as f:
-            json.dump(config, f, indent=4, ensure_ascii=False)
-        _last_modified_time = os.path.getmtime(CONFIG_PATH)
-    except Exception as e:
-        print(f"Error saving config: {e}")
+    config_store.set(config)
 
 def reset_to_default():
     """重置配置为默认"""
@@ -128,7 +204,7 @@ def reset_to_default():
 
 def update_key_binding(player, action, key):
     """更新按键绑定"""
-    config = load_config()
+    config = thaw_config(load_config())
     if config:
         config["key_bindings"][player][action] = key
         save_config(config)
@@ -137,7 +213,7 @@ def update_key_binding(player, action, key):
 
 def update_volume(volume):
     """更新音量设置"""
-    config = load_config()
+    config = thaw_config(load_config())
     if config:
         config["volume"] = max(0.0, min(1.0, volume))  # 确保音量在0.0到1.0之间
         save_config(config)
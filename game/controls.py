@@ -0,0 +1,153 @@
+import pygame
+from config import config_store
+
+# 玩家动作及其在动作位掩码中的位
+ACTIONS = ("left", "right", "up", "down", "shoot")
+LEFT, RIGHT, UP, DOWN, SHOOT = (1 << i for i in range(len(ACTIONS)))
+ACTION_BITS = dict(zip(ACTIONS, (LEFT, RIGHT, UP, DOWN, SHOOT)))
+
+# 配置中使用的按键名称 -> pygame 按键常量
+# 单个字母、数字和符号不在表中，由 pygame.key.key_code 解析
+NAMED_KEYS = {
+    "LEFT": pygame.K_LEFT,
+    "RIGHT": pygame.K_RIGHT,
+    "UP": pygame.K_UP,
+    "DOWN": pygame.K_DOWN,
+    "SPACE": pygame.K_SPACE,
+    "ESCAPE": pygame.K_ESCAPE,
+    "RETURN": pygame.K_RETURN,
+    "TAB": pygame.K_TAB,
+    "BACKSPACE": pygame.K_BACKSPACE,
+    "DELETE": pygame.K_DELETE,
+    "INSERT": pygame.K_INSERT,
+    "HOME": pygame.K_HOME,
+    "END": pygame.K_END,
+    "PAGEUP": pygame.K_PAGEUP,
+    "PAGEDOWN": pygame.K_PAGEDOWN,
+    "F1": pygame.K_F1,
+    "F2": pygame.K_F2,
+    "F3": pygame.K_F3,
+    "F4": pygame.K_F4,
+    "F5": pygame.K_F5,
+    "F6": pygame.K_F6,
+    "F7": pygame.K_F7,
+    "F8": pygame.K_F8,
+    "F9": pygame.K_F9,
+    "F10": pygame.K_F10,
+    "F11": pygame.K_F11,
+    "F12": pygame.K_F12,
+    "LSHIFT": pygame.K_LSHIFT,
+    "RSHIFT": pygame.K_RSHIFT,
+    "LCTRL": pygame.K_LCTRL,
+    "RCTRL": pygame.K_RCTRL,
+    "LALT": pygame.K_LALT,
+    "RALT": pygame.K_RALT,
+    "LSUPER": pygame.K_LSUPER,
+    "RSUPER": pygame.K_RSUPER,
+    "MENU": pygame.K_MENU,
+    "NUMLOCK": pygame.K_NUMLOCK,
+    "CAPSLOCK": pygame.K_CAPSLOCK,
+    "SCROLLLOCK": pygame.K_SCROLLLOCK,
+    "PRINTSCREEN": pygame.K_PRINTSCREEN,
+    "PAUSE": pygame.K_PAUSE,
+    "SLASH": pygame.K_SLASH,
+    "BACKSLASH": pygame.K_BACKSLASH,
+    "MINUS": pygame.K_MINUS,
+    "EQUALS": pygame.K_EQUALS,
+    "LEFTBRACKET": pygame.K_LEFTBRACKET,
+    "RIGHTBRACKET": pygame.K_RIGHTBRACKET,
+    "SEMICOLON": pygame.K_SEMICOLON,
+    "QUOTE": pygame.K_QUOTE,
+    "COMMA": pygame.K_COMMA,
+    "PERIOD": pygame.K_PERIOD,
+    "BACKQUOTE": pygame.K_BACKQUOTE,
+}
+KEY_NAMES = {code: name for name, code in NAMED_KEYS.items()}
+KEY_NAMES[pygame.K_BREAK] = "PAUSE"  # 两者在 SDL2 中是同一个按键
+
+
+def key_code(name):
+    """按键名称 -> pygame 按键常量，无法识别时返回 None"""
+    code = NAMED_KEYS.get(name)
+    if code is not None:
+        return code
+    try:
+        return pygame.key.key_code(name.lower())
+    except ValueError:
+        return None
+
+
+def key_name(code):
+    """pygame 按键常量 -> 写入配置的按键名称"""
+    return KEY_NAMES.get(code) or pygame.key.name(code).upper()
+
+
+def to_mask(actions):
+    """把动作名称集合转换为动作位掩码（已经是掩码时原样返回）"""
+    if isinstance(actions, int):
+        return actions
+    mask = 0
+    for action in actions:
+        mask |= ACTION_BITS[action]
+    return mask
+
+
+def to_actions(mask):
+    """把动作位掩码转换为动作名称集合"""
+    return {action for action, bit in ACTION_BITS.items() if mask & bit}
+
+
+def compile_bindings(bindings):
+    """把 {动作: 按键名称} 编译成 ((按键常量, 动作位), ...)，跳过无法识别的按键"""
+    compiled = []
+    for action, bit in ACTION_BITS.items():
+        code = key_code(bindings.get(action, ""))
+        if code is not None:
+            compiled.append((code, bit))
+    return tuple(compiled)
+
+
+class InputMapper:
+    """键盘输入：按键绑定只在配置变化时编译，每帧为每名玩家生成动作位掩码"""
+
+    def __init__(self, store=config_store):
+        self.store = store
+        self.key_bindings = None
+        self.bindings = {}  # 玩家编号 -> ((按键常量, 动作位), ...)
+        store.subscribe(self.apply_config)
+
+    def apply_config(self, config):
+        # 还没读过键盘时不编译（无窗口模拟不需要按键绑定）
+        if self.key_bindings is not None:
+            self.compile(config)
+
+    def compile(self, config):
+        key_bindings = config["key_bindings"]
+        if key_bindings == self.key_bindings:
+            return
+        self.key_bindings = key_bindings
+        self.bindings = {int(player[len("player"):]): compile_bindings(actions)
+                         for player, actions in key_bindings.items()}
+
+    def mask(self, player_id, keys=None):
+        """返回某名玩家当前按下的动作位掩码"""
+        if self.key_bindings is None:
+            self.compile(self.store.get())
+        if keys is None:
+            keys = pygame.key.get_pressed()
+        mask = 0
+        for code, bit in self.bindings.get(player_id, ()):
+            if keys[code]:
+                mask |= bit
+        return mask
+
+    def poll(self):
+        """读取一次键盘状态，返回 {玩家编号: 动作位掩码}"""
+        if self.key_bindings is None:
+            self.compile(self.store.get())
+        keys = pygame.key.get_pressed()
+        return {player_id: self.mask(player_id, keys) for player_id in self.bindings}
+
+
+# 全局共享的输入映射
+input_mapper = InputMapper()
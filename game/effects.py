@@ -0,0 +1,61 @@
+import weakref
+
+import pygame
+
+# 透明度分级：第 i 级对应 alpha = i * ALPHA_STEP（最高 255）
+ALPHA_STEP = 5
+ALPHA_LEVELS = 255 // ALPHA_STEP + 1
+
+SHIELD_SIZE = 80
+SHIELD_COLOR = (0, 255, 255)
+
+
+def alpha_index(alpha):
+    """把透明度换算成分级下标"""
+    return max(0, min(255, int(alpha))) // ALPHA_STEP
+
+
+def pulse(low, high, step):
+    """一个完整闪烁周期内每帧的分级下标：从 high 渐隐到 low，再渐显回 high"""
+    down = list(range(high - step, low, -step)) + [low]
+    up = list(range(low + step, high, step)) + [high]
+    return tuple(alpha_index(alpha) for alpha in down + up)
+
+
+# 护盾呼吸、护盾到期前的警告闪烁、受伤后无敌闪烁
+SHIELD_PULSE = pulse(100, 255, 5)
+SHIELD_WARNING_PULSE = pulse(50, 255, 25)
+INVINCIBLE_PULSE = pulse(50, 255, 10)
+OPAQUE = alpha_index(255)
+
+_shield_frames = []
+_fade_frames = weakref.WeakKeyDictionary()
+
+
+def shield_frames():
+    """所有玩家共享的护盾帧，每个透明度分级一张"""
+    if not _shield_frames:
+        radius = SHIELD_SIZE // 2
+        for i in range(ALPHA_LEVELS):
+            frame = pygame.Surface((SHIELD_SIZE, SHIELD_SIZE), pygame.SRCALPHA)
+            pygame.draw.circle(frame, (*SHIELD_COLOR, min(255, i * ALPHA_STEP)), (radius, radius), radius)
+            _shield_frames.append(frame)
+    return _shield_frames
+
+
+def fade_frames(image):
+    """返回 image 按透明度分级预先生成的帧，同一张图像的所有使用者共享"""
+    frames = _fade_frames.get(image)
+    if frames is None:
+        frames = []
+        for i in range(ALPHA_LEVELS):
+            alpha = min(255, i * ALPHA_STEP)
+            if alpha == 255:
+                frames.append(image)
+                continue
+            frame = pygame.Surface(image.get_size(), pygame.SRCALPHA)
+            frame.blit(image, (0, 0))
+            frame.fill((255, 255, 255, alpha), special_flags=pygame.BLEND_RGBA_MULT)
+            frames.append(frame)
+        _fade_frames[image] = frames
+    return frames
@@ -3,76 +3,61 @@ import random
 from explosion import Explosion
 import math
 from item import Item
-
-
-class EnemyBullet:
-    def __init__(self, x, y, speed=4):
-        self.image = pygame.Surface((5, 15))
-        self.image.fill((255, 0, 0))  # 红色子弹
-        self.rect = self.image.get_rect(center=(x, y))
-        self.speed = speed
-        self.speed_x = 0
-        self.speed_y = speed
-
-    def update(self):
-        self.rect.x += self.speed_x
-        self.rect.y += self.speed_y
-
-    def draw(self, screen):
-        screen.blit(self.image, self.rect)
-
-    def is_off_screen(self):
-        return (self.rect.top > 600 or self.rect.bottom < 0 or 
-                self.rect.left > 800 or self.rect.right < 0)
+from assets import asset_cache
+from sound_bank import sound_bank
+from collision import SpatialHash
+from pool import ObjectPool
+from projectiles import ProjectileField, ENEMY_BULLET
+from clock import system_clock
+
+# 各类敌人的图像尺寸，以及图片加载失败时使用的颜色
+ENEMY_SIZES = {
+    "enemy_normal": (64, 64),   # 普通敌人默认大小
+    "enemy_special": (80, 80),  # 精英怪稍大
+    "enemy_boss": (128, 128),   # Boss更大
+}
+ENEMY_COLORS = {
+    "enemy_normal": (255, 255, 0),  # 黄色
+    "enemy_special": (255, 165, 0),  # 橙色
+    "enemy_boss": (255, 0, 0),      # 红色
+}
+
+
+def draw_boss_health(screen, health, max_health, phase):
+    """在屏幕顶部居中绘制 Boss 血条"""
+    # 血条背景
+    bar_width = 200
+    bar_height = 20
+    bar_x = (800 - bar_width) // 2  # 居中显示
+    bar_y = 10
+    pygame.draw.rect(screen, (100, 100, 100), (bar_x, bar_y, bar_width, bar_height))
+
+    # 当前血量
+    health_width = int((health / max_health) * bar_width)
+    health_color = (255, 0, 0) if phase == 1 else (255, 100, 0)  # 第二阶段血条颜色变化
+    pygame.draw.rect(screen, health_color, (bar_x, bar_y, health_width, bar_height))
+
+    # 血条边框
+    pygame.draw.rect(screen, (255, 255, 255), (bar_x, bar_y, bar_width, bar_height), 2)
 
 
 class Enemy:
-    def __init__(self, config, x, y, enemy_type="enemy_normal"):
-        # Initialize pygame mixer if not already initialized
-        if not pygame.mixer.get_init():
-            pygame.mixer.init()
-            
-        # Load sound effects
-        try:
-            self.sounds = {
-                'shoot': pygame.mixer.Sound('../assets/sounds/enemy_shoot.wav'),
-                'explosion': pygame.mixer.Sound('../assets/sounds/explosion.wav')
-            }
-            # Set volume for all sounds (0.0 to 1.0)
-            for sound in self.sounds.values():
-                sound.set_volume(0.5)
-        except (pygame.error, FileNotFoundError) as e:
-            print(f"Error loading enemy sound effects: {e}")
-            self.sounds = {}
+    def __init__(self, config, x, y, enemy_type="enemy_normal", bullets=None, enemy_id=0, clock=None, rng=None):
+        self.clock = clock or system_clock  # 可注入的计时器
+        self.rng = rng or random  # 每局的随机数生成器，没有注入时使用全局 random
 
         self.config = config["enemies"]
         self.game_config = config  # 保存完整配置
+        size = ENEMY_SIZES.get(enemy_type, ENEMY_SIZES["enemy_normal"])
         try:
-            self.original_image = pygame.image.load("../assets/images/"+enemy_type+".png")
-            # 根据敌人类型设置不同的大小
-            if enemy_type == "enemy_boss":
-                size = (128, 128)  # Boss更大
-            elif enemy_type == "enemy_special":
-                size = (80, 80)    # 精英怪稍大
-            else:
-                size = (64, 64)    # 普通敌人默认大小
-            self.image = pygame.transform.scale(self.original_image, size)
+            self.image = asset_cache.sprite(enemy_type, size)
             self.image_loaded = True
         except (pygame.error, FileNotFoundError) as e:
             print(f"Error loading enemy image ({enemy_type}): {e}")
             self.image_loaded = False
             # 根据敌人类型创建不同大小的彩色矩形
-            if enemy_type == "enemy_boss":
-                size = (128, 128)
-                color = (255, 0, 0)  # 红色
-            elif enemy_type == "enemy_special":
-                size = (80, 80)
-                color = (255, 165, 0)  # 橙色
-            else:
-                size = (64, 64)
-                color = (255, 255, 0)  # 黄色
             self.image = pygame.Surface(size)
-            self.image.fill(color)
+            self.image.fill(ENEMY_COLORS.get(enemy_type, ENEMY_COLORS["enemy_normal"]))
             
         self.rect = self.image.get_rect(topleft=(x, y))
         self.speed = self.config[enemy_type]["speed"]
@@ -82,7 +67,11 @@ class Enemy:
         self.max_health = self.health  # 保存最大生命值用于血条显示
         
         # 射击相关属性
-        self.bullets = []
+        self.id = enemy_id  # 子弹所属者标识
+        self.max_bullets = 120 if enemy_type == "enemy_boss" else 20  # 同时存在的子弹上限
+        # 子弹存放在 EnemyManager 共享的 ProjectileField 中，单独使用时自带一个
+        self.owns_bullets = bullets is None
+        self.bullets = ProjectileField(self.max_bullets) if bullets is None else bullets
         self.shoot_cooldown = 2000 if enemy_type == "enemy_special" else 1000  # 精英敌人2秒一发，Boss 1秒一发
         self.last_shot_time = 0
         
@@ -113,82 +102,73 @@ class Enemy:
         # 道具类型权重
         self.item_weights = config["item_drop"]["item_weights"]
 
+    def fire(self, x, y, speed_x=0, speed_y=4):
+        """发射一颗子弹，达到上限或对象池已满时放弃"""
+        if self.bullets.count_owner(self.id) >= self.max_bullets:
+            return False
+        return self.bullets.spawn(x, y, speed_x, speed_y, self.id, ENEMY_BULLET)
+
     def shoot(self):
-        now = pygame.time.get_ticks()
+        now = self.clock.get_ticks()
         if now - self.last_shot_time >= self.shoot_cooldown:
             if self.type == "enemy_special":
                 # 精英敌人发射单发子弹
-                bullet = EnemyBullet(self.rect.centerx, self.rect.bottom)
-                self.bullets.append(bullet)
+                self.fire(self.rect.centerx, self.rect.bottom)
             elif self.type == "enemy_boss":
                 # Boss根据攻击模式和阶段发射子弹
                 if self.phase == 1:
                     if self.attack_pattern == "normal":
                         # 普通模式：发射三发直线子弹
                         for offset in [-20, 0, 20]:
-                            bullet = EnemyBullet(self.rect.centerx + offset, self.rect.bottom)
-                            self.bullets.append(bullet)
+                            self.fire(self.rect.centerx + offset, self.rect.bottom)
                     elif self.attack_pattern == "circle":
                         # 圆形模式：发射四发子弹，形成十字形
                         for angle in [0, 90, 180, 270]:
                             rad = math.radians(angle)
-                            bullet = EnemyBullet(self.rect.centerx, self.rect.bottom)
-                            bullet.speed_x = math.sin(rad) * 2
-                            bullet.speed_y = math.cos(rad) * 2
-                            self.bullets.append(bullet)
+                            self.fire(self.rect.centerx, self.rect.bottom,
+                                      math.sin(rad) * 2, math.cos(rad) * 2)
                     elif self.attack_pattern == "zigzag":
                         # Z字形模式：发射两发子弹，呈V字形
                         for angle in [-30, 30]:
                             rad = math.radians(angle)
-                            bullet = EnemyBullet(self.rect.centerx, self.rect.bottom)
-                            bullet.speed_x = math.sin(rad) * 2
-                            bullet.speed_y = math.cos(rad) * 2
-                            self.bullets.append(bullet)
+                            self.fire(self.rect.centerx, self.rect.bottom,
+                                      math.sin(rad) * 2, math.cos(rad) * 2)
                 else:
                     # 第二阶段：更复杂的攻击模式
                     if self.attack_pattern == "normal":
                         # 普通模式：发射五发子弹，呈扇形分布
                         for angle in [-45, -22.5, 0, 22.5, 45]:
                             rad = math.radians(angle)
-                            bullet = EnemyBullet(self.rect.centerx, self.rect.bottom)
-                            bullet.speed_x = math.sin(rad) * 3
-                            bullet.speed_y = math.cos(rad) * 3
-                            self.bullets.append(bullet)
+                            self.fire(self.rect.centerx, self.rect.bottom,
+                                      math.sin(rad) * 3, math.cos(rad) * 3)
                     elif self.attack_pattern == "circle":
                         # 圆形模式：发射八发子弹，形成星形
                         for angle in range(0, 360, 45):
                             rad = math.radians(angle)
-                            bullet = EnemyBullet(self.rect.centerx, self.rect.bottom)
-                            bullet.speed_x = math.sin(rad) * 3
-                            bullet.speed_y = math.cos(rad) * 3
-                            self.bullets.append(bullet)
+                            self.fire(self.rect.centerx, self.rect.bottom,
+                                      math.sin(rad) * 3, math.cos(rad) * 3)
                     elif self.attack_pattern == "zigzag":
                         # Z字形模式：发射三发子弹，呈W字形
                         for angle in [-45, 0, 45]:
                             rad = math.radians(angle)
-                            bullet = EnemyBullet(self.rect.centerx, self.rect.bottom)
-                            bullet.speed_x = math.sin(rad) * 3
-                            bullet.speed_y = math.cos(rad) * 3
-                            self.bullets.append(bullet)
+                            self.fire(self.rect.centerx, self.rect.bottom,
+                                      math.sin(rad) * 3, math.cos(rad) * 3)
             self.last_shot_time = now
             # Play shoot sound
-            if 'shoot' in self.sounds:
-                self.sounds['shoot'].play()
+            sound_bank.play("enemy_shoot")
 
     def update(self):
-        # 更新子弹
-        for bullet in self.bullets[:]:
-            bullet.update()
-            if bullet.is_off_screen():
-                self.bullets.remove(bullet)
+        # 共享的子弹由 EnemyManager 统一批量更新
+        if self.owns_bullets:
+            self.bullets.step()
 
         if self.type == "enemy_boss":
-            now = pygame.time.get_ticks()
+            now = self.clock.get_ticks()
             if now - self.attack_timer > self.attack_interval:
                 # 切换攻击模式时，保持当前位置和速度
                 current_x = self.rect.centerx
                 current_y = self.rect.centery
-                self.attack_pattern = random.choice(["normal", "circle", "zigzag"])
+                self.attack_pattern = self.rng.choice(["normal", "circle", "zigzag"])
                 self.attack_timer = now
                 # 重置移动参数
                 if self.attack_pattern == "normal":
@@ -288,47 +268,40 @@ class Enemy:
         else:
             screen.blit(self.image, self.rect)
             
-        # 绘制子弹
-        for bullet in self.bullets:
-            bullet.draw(screen)
+        # 绘制子弹（共享的子弹由 EnemyManager 统一绘制）
+        if self.owns_bullets:
+            self.bullets.draw(screen)
         
         # 如果是Boss，绘制血条
         if self.type == "enemy_boss":
-            # 血条背景
-            bar_width = 200
-            bar_height = 20
-            bar_x = (800 - bar_width) // 2  # 居中显示
-            bar_y = 10
-            pygame.draw.rect(screen, (100, 100, 100), (bar_x, bar_y, bar_width, bar_height))
-            
-            # 当前血量
-            health_width = int((self.health / self.max_health) * bar_width)
-            health_color = (255, 0, 0) if self.phase == 1 else (255, 100, 0)  # 第二阶段血条颜色变化
-            pygame.draw.rect(screen, health_color, (bar_x, bar_y, health_width, bar_height))
-            
-            # 血条边框
-            pygame.draw.rect(screen, (255, 255, 255), (bar_x, bar_y, bar_width, bar_height), 2)
+            draw_boss_health(screen, self.health, self.max_health, self.phase)
 
     def take_damage(self):
         self.health -= 1
-        if self.health <= 0 and 'explosion' in self.sounds:
-            self.sounds['explosion'].play()
+        if self.health <= 0:
+            sound_bank.play("enemy_explosion")
         return self.health <= 0
 
-    def drop_item(self):
-        if random.random() < self.drop_rates[self.type]:
+    def drop_item(self, item_pool=None):
+        if self.rng.random() < self.drop_rates[self.type]:
             # 根据权重选择道具类型
-            item_type = random.choices(
+            item_type = self.rng.choices(
                 list(self.item_weights.keys()),
                 weights=list(self.item_weights.values())
             )[0]
+            if item_pool is not None:
+                return item_pool.acquire(self.rect.centerx, self.rect.centery, item_type)
             return Item(self.rect.centerx, self.rect.centery, item_type)
         return None
 
 
 class EnemyManager:
-    def __init__(self, config):
+    def __init__(self, config, clock=None, rng=None, store=None):
         self.config = config
+        self.clock = clock or system_clock  # 可注入的计时器，无窗口模拟时使用 TickClock
+        # 本局的随机数生成器：敌人生成、掉落和 Boss 攻击模式都从这里取随机数，
+        # 同一个种子得到完全相同的一局，不受其他代码使用全局 random 的影响
+        self.rng = rng or random.Random()
         self.enemies = []
         self.spawn_timer = 0
         self.spawn_interval = config["enemy_spawn_rate"] * 1000
@@ -343,14 +316,38 @@ class EnemyManager:
         self.boss_defeated = False
         self.boss = None  # 保存Boss引用
         self.items = []  # 存储掉落的道具
+        # 碰撞检测用的空间哈希（每帧重建）
+        self.enemy_grid = SpatialHash()
+        self.item_grid = SpatialHash()
+        # 所有敌人共享的子弹存储
+        self.enemy_bullets = ProjectileField(4096)
+        self.next_enemy_id = 1
+        self.next_item_id = 1
+        # 对象池：爆炸和道具循环使用
+        self.explosion_pool = ObjectPool(Explosion, 64, "explosion")
+        self.item_pool = ObjectPool(Item, 64, "item")
+        if store is not None:
+            store.subscribe(self.apply_config)  # 只有交互游戏跟随配置热重载
+
+    def apply_config(self, config):
+        """应用新的配置快照，之后生成的敌人使用新配置"""
+        self.config = config
+        self.spawn_interval = config["enemy_spawn_rate"] * 1000
 
-    def update(self, player):
-        now = pygame.time.get_ticks()
-        
-        # 更新游戏阶段
-        if not self.boss_spawned and player.score >= self.stage_score + self.stage_threshold:
+    def update(self, players):
+        """推进世界一帧，并在同一遍中处理所有玩家的碰撞
+
+        players 为玩家列表（也接受单个玩家），返回 "victory" 表示 Boss 被击败。
+        """
+        if not isinstance(players, (list, tuple)):
+            players = [players]
+        now = self.clock.get_ticks()
+
+        # 更新游戏阶段（按所有玩家的总分推进）
+        total_score = sum(player.score for player in players)
+        if not self.boss_spawned and total_score >= self.stage_score + self.stage_threshold:
             self.game_stage += 1
-            self.stage_score = player.score
+            self.stage_score = total_score
             if self.game_stage % self.boss_stage_interval == 0:  # 使用配置的Boss出现间隔
                 self.spawn_boss()
             else:
@@ -358,87 +355,171 @@ class EnemyManager:
 
         # 生成普通敌人
         if not self.boss_spawned and now - self.spawn_timer > self.spawn_interval:
-            self.enemies.append(Enemy(self.config, random.randint(0, 700), -50, "enemy_normal"))
+            self.enemies.append(self.create_enemy(self.rng.randint(0, 700), -50, "enemy_normal"))
             self.spawn_timer = now
 
         # 生成精英敌人
         if not self.boss_spawned and now - self.elite_spawn_timer > self.elite_spawn_interval:
-            self.enemies.append(Enemy(self.config, random.randint(0, 700), -50, "enemy_special"))
+            self.enemies.append(self.create_enemy(self.rng.randint(0, 700), -50, "enemy_special"))
             self.elite_spawn_timer = now
 
-        for enemy in self.enemies[:]:
+        # 批量移动所有敌人子弹（新发射的子弹本帧不移动）
+        self.enemy_bullets.step()
+        for enemy in self.enemies:
             enemy.update()
-            # 检查子弹碰撞
-            if player.bullets:
-                for bullet in player.bullets[:]:
-                    if enemy.rect.colliderect(bullet.rect):
-                        if enemy.take_damage():
-                            self.explosions.append(Explosion(enemy.rect.centerx, enemy.rect.centery))
-                            # 检查是否掉落道具
-                            item = enemy.drop_item()
-                            if item:
-                                self.items.append(item)
-                            self.enemies.remove(enemy)
-                            player.score += enemy.score
-                            if enemy.type == "enemy_boss":
-                                self.boss_defeated = True
-                                self.boss_spawned = False
-                                return "victory"
-                        player.bullets.remove(bullet)
-                        break
-
-            # 检查敌人子弹碰撞
-            for bullet in enemy.bullets[:]:
-                if bullet.rect.colliderect(player.hitbox):  # 使用hitbox进行碰撞检测
-                    player.take_damage()
-                    enemy.bullets.remove(bullet)
-                    break
 
-            # 检查与玩家的碰撞
-            if enemy.rect.colliderect(player.hitbox):  # 使用hitbox进行碰撞检测
-                player.take_damage()
-                if enemy.type != "enemy_boss":  # Boss不会因为碰撞而消失或产生爆炸
-                    self.explosions.append(Explosion(enemy.rect.centerx, enemy.rect.centery))
-                    # 检查是否掉落道具
-                    item = enemy.drop_item()
-                    if item:
-                        self.items.append(item)
-                    self.enemies.remove(enemy)
-                    player.score += enemy.score  # 添加分数
-
-        for explosion in self.explosions[:]:
+        # 已阵亡的玩家不再参与碰撞
+        active = [player for player in players if player.is_alive()]
+        enemies = self.enemies[:]
+        result = self.resolve_player_bullets(active)
+        if not result:
+            self.resolve_player_contacts(active)
+        # 被消灭的敌人的子弹随敌人一起消失
+        for enemy in enemies:
+            if enemy.health <= 0:
+                self.enemy_bullets.remove_owner(enemy.id)
+        if result:
+            return result
+
+        for explosion in self.explosions:
             explosion.update()
-            if explosion.is_finished():
-                self.explosions.remove(explosion)
+        finished = [explosion for explosion in self.explosions if explosion.is_finished()]
+        if finished:
+            self.explosions = [explosion for explosion in self.explosions if not explosion.is_finished()]
+            self.explosion_pool.release_all(finished)
 
         # 更新道具
-        for item in self.items[:]:
+        gone = []
+        for item in self.items:
             item.update()
-            # 检查道具是否被玩家拾取
-            if item.rect.colliderect(player.hitbox):
-                item.apply_effect(player)
-                self.items.remove(item)
             # 移除超出屏幕的道具
-            elif item.is_off_screen():
-                self.items.remove(item)
+            if item.is_off_screen():
+                gone.append(item)
+        if gone:
+            self.items = [item for item in self.items if not item.is_off_screen()]
+            self.item_pool.release_all(gone)
+        # 检查道具是否被玩家拾取，多名玩家同时接触时归先检测到的玩家
+        self.item_grid.build([item.rect for item in self.items])
+        picked = set()
+        for player in active:
+            for k in self.item_grid.query(player.hitbox):
+                item = self.items[k]
+                if k not in picked and item.rect.colliderect(player.hitbox):
+                    picked.add(k)
+                    item.apply_effect(player)
+        if picked:
+            taken = [self.items[k] for k in picked]
+            self.items = [item for k, item in enumerate(self.items) if k not in picked]
+            self.item_pool.release_all(taken)
+
+    def resolve_player_bullets(self, players):
+        """依次结算每名玩家的子弹，击杀得分记在发射子弹的玩家名下"""
+        for player in players:
+            enemies = self.enemies[:]
+            if not enemies or not len(player.bullets):
+                continue
+            # 每个敌人本帧最多被同一名玩家的一颗子弹命中
+            bullet_hits = player.bullets.first_hits([enemy.rect for enemy in enemies])
+            spent = []  # 本帧已命中的子弹下标
+            for enemy, j in zip(enemies, bullet_hits):
+                if j < 0:
+                    continue
+                spent.append(j)
+                if enemy.take_damage():
+                    self.destroy_enemy(enemy)
+                    player.score += enemy.score
+                    if enemy.type == "enemy_boss":
+                        self.boss_defeated = True
+                        self.boss_spawned = False
+                        player.bullets.remove(spent)
+                        return "victory"
+            player.bullets.remove(spent)
+        return None
+
+    def resolve_player_contacts(self, players):
+        """结算敌人子弹和敌人机体与各玩家的碰撞"""
+        enemies = self.enemies[:]
+        # 敌人与玩家的碰撞使用空间哈希粗筛
+        self.enemy_grid.build([enemy.rect for enemy in enemies])
+        used = []  # 本帧命中玩家的敌人子弹下标
+        for player in players:
+            # 每个敌人的子弹本帧最多命中同一名玩家一次
+            for j in self.enemy_bullets.hits_by_owner(player.hitbox).values():
+                if j not in used:
+                    player.take_damage()
+                    used.append(j)
+
+            # 检查与玩家的碰撞
+            for i in self.enemy_grid.query(player.hitbox):
+                enemy = enemies[i]
+                if enemy.health <= 0 or not enemy.rect.colliderect(player.hitbox):  # 使用hitbox进行碰撞检测
+                    continue
+                player.take_damage()
+                if enemy.type != "enemy_boss":  # Boss不会因为碰撞而消失或产生爆炸
+                    enemy.health = 0
+                    self.destroy_enemy(enemy)
+                    player.score += enemy.score  # 添加分数
+        self.enemy_bullets.remove(used)
+
+    def create_enemy(self, x, y, enemy_type):
+        """生成敌人，子弹写入共享的 ProjectileField"""
+        enemy = Enemy(self.config, x, y, enemy_type, bullets=self.enemy_bullets,
+                      enemy_id=self.next_enemy_id, clock=self.clock, rng=self.rng)
+        self.next_enemy_id += 1
+        return enemy
+
+    def destroy_enemy(self, enemy):
+        """移除敌人并生成爆炸和掉落道具"""
+        explosion = self.explosion_pool.acquire(enemy.rect.centerx, enemy.rect.centery)
+        if explosion:
+            self.explosions.append(explosion)
+        # 检查是否掉落道具
+        item = enemy.drop_item(self.item_pool)
+        if item:
+            self.add_item(item)
+        self.enemies.remove(enemy)
+
+    def add_item(self, item):
+        """加入一个道具并分配编号（网络快照用来识别同一个道具）"""
+        item.id = self.next_item_id
+        self.next_item_id += 1
+        self.items.append(item)
+
+    def pool_stats(self):
+        """返回各对象池的占用统计"""
+        stats = [pool.stats() for pool in (self.explosion_pool, self.item_pool)]
+        stats.append(dict(self.enemy_bullets.stats(), name="enemy_bullet"))
+        return stats
 
     def spawn_elite(self):
         # 这个方法现在只用于阶段切换时生成精英敌人
-        self.enemies.append(Enemy(self.config, random.randint(0, 700), -50, "enemy_special"))
+        self.enemies.append(self.create_enemy(self.rng.randint(0, 700), -50, "enemy_special"))
         # 重置精英敌人生成计时器，确保不会立即生成下一个
-        self.elite_spawn_timer = pygame.time.get_ticks()
+        self.elite_spawn_timer = self.clock.get_ticks()
 
     def spawn_boss(self):
         self.boss_spawned = True
         # 将Boss生成在屏幕上方中央位置
-        self.boss = Enemy(self.config, 400 - 64, 50, "enemy_boss")  # 64是Boss宽度的一半
+        self.boss = self.create_enemy(400 - 64, 50, "enemy_boss")  # 64是Boss宽度的一半
         self.enemies.append(self.boss)
 
+    def dirty_rects(self):
+        """返回本帧绘制涉及的区域"""
+        rects = [enemy.rect for enemy in self.enemies]
+        if self.boss in self.enemies:
+            rects.append(pygame.Rect((800 - 200) // 2, 10, 200, 20))  # Boss 血条
+        rects.extend(self.enemy_bullets.rects())
+        rects.extend(explosion.rect for explosion in self.explosions)
+        rects.extend(item.rect for item in self.items)
+        return rects
+
     def draw(self, screen):
         for enemy in self.enemies:
-            enemy.draw(screen)        
-            for explosion in self.explosions:
-                explosion.draw(screen)
+            enemy.draw(screen)
+        self.enemy_bullets.draw(screen)
+        # 爆炸单独一层，每帧每个爆炸只绘制一次
+        if self.explosions:
+            screen.blits([(explosion.image, explosion.rect) for explosion in self.explosions], doreturn=False)
         # 绘制道具
         for item in self.items:
             item.draw(screen)
@@ -1,15 +1,80 @@
 # explosion.py
 import pygame
+from assets import asset_cache, image_path
+
+EXPLOSION_SIZE = 64
+EXPLOSION_FRAMES = 8     # 没有精灵表时生成的帧数
+EXPLOSION_DURATION = 15  # 爆炸持续帧数
+
+_frames = []
+
+
+def _build_sheet(image, count):
+    """由单张爆炸图生成横向排列的精灵表：先由小变大，再逐渐淡出"""
+    size = EXPLOSION_SIZE
+    sheet = pygame.Surface((size * count, size), pygame.SRCALPHA)
+    for i in range(count):
+        t = i / (count - 1)
+        scale = 0.4 + 0.6 * min(1.0, t * 2)
+        alpha = 255 if t <= 0.5 else int(255 * (1 - (t - 0.5) * 1.6))
+        side = max(1, int(size * scale))
+        frame = pygame.transform.smoothscale(image, (side, side))
+        if alpha < 255:
+            frame.fill((255, 255, 255, alpha), special_flags=pygame.BLEND_RGBA_MULT)
+        sheet.blit(frame, (i * size + (size - side) // 2, (size - side) // 2))
+    return sheet
+
+
+def _load_sheet():
+    """优先使用 explosion_sheet.png（横向排列的正方形帧），否则由 explosion.png 生成"""
+    try:
+        sheet = asset_cache.image(image_path("explosion_sheet.png"))
+        count = max(1, sheet.get_width() // sheet.get_height())
+        if sheet.get_height() != EXPLOSION_SIZE:
+            sheet = asset_cache.image(image_path("explosion_sheet.png"),
+                                      (EXPLOSION_SIZE * count, EXPLOSION_SIZE))
+        return sheet, count
+    except (pygame.error, FileNotFoundError):
+        pass
+    try:
+        image = asset_cache.sprite("explosion", (EXPLOSION_SIZE, EXPLOSION_SIZE))
+    except (pygame.error, FileNotFoundError) as e:
+        print(f"Error loading explosion image: {e}")
+        image = pygame.Surface((EXPLOSION_SIZE, EXPLOSION_SIZE), pygame.SRCALPHA)
+        pygame.draw.circle(image, (255, 140, 0), (EXPLOSION_SIZE // 2, EXPLOSION_SIZE // 2), EXPLOSION_SIZE // 2)
+    return _build_sheet(image, EXPLOSION_FRAMES), EXPLOSION_FRAMES
+
+
+def explosion_frames():
+    """所有爆炸共享的动画帧（精灵表的子表面，只切分一次）"""
+    if not _frames:
+        sheet, count = _load_sheet()
+        size = sheet.get_height()
+        _frames.extend(sheet.subsurface((i * size, 0, size, size)) for i in range(count))
+    return _frames
+
 
 class Explosion:
-    def __init__(self, x, y):
-        self.original_image = pygame.image.load("../assets/images/explosion.png")
-        self.image = pygame.transform.scale(self.original_image, (64, 64))
-        self.rect = self.image.get_rect(center=(x, y))
-        self.timer = 15  # 爆炸持续帧数
+    def __init__(self, x=0, y=0):
+        self.frames = explosion_frames()
+        self.rect = self.frames[0].get_rect()
+        self.reset(x, y)
+
+    def reset(self, x, y):
+        """重置爆炸状态，供对象池复用"""
+        self.rect.center = (x, y)
+        self.timer = EXPLOSION_DURATION
+        self.frame = 0
+
+    @property
+    def image(self):
+        return self.frames[self.frame]
 
     def update(self):
         self.timer -= 1
+        # 按已播放的时间比例选取动画帧
+        elapsed = EXPLOSION_DURATION - self.timer
+        self.frame = min(len(self.frames) - 1, elapsed * len(self.frames) // EXPLOSION_DURATION)
 
     def draw(self, screen):
         screen.blit(self.image, self.rect)
@@ -0,0 +1,192 @@
+"""无窗口、无音频的游戏模拟
+
+使用手动推进的 TickClock 驱动与正式游戏相同的 Player / EnemyManager 逻辑，
+按 CPU 能力尽快运行，可用于测试、数值平衡和性能分析。
+
+    python headless.py --seed 1 --boss
+    python headless.py --seed 1 --record replays/seed1.rpl   # 同时录制回放
+    python headless.py --check-config    # 检查注入配置的一局不受配置文件热重载影响
+"""
+import argparse
+import os
+import random
+import time
+
+# 不创建窗口、不打开音频设备
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+from clock import TickClock
+from config import config_store, freeze_config, load_config, thaw_config
+from controls import to_mask
+from enemy import EnemyManager
+from player import Player
+from replay import ReplayRecorder
+from statehash import world_hash
+
+
+class HeadlessGame:
+    """一局无窗口模拟；step(inputs) 推进一帧并返回世界状态"""
+
+    def __init__(self, config=None, seed=0, two_player=False, step_ms=1000 / 60):
+        self.config = load_config() if config is None else freeze_config(config)
+        self.seed = seed
+        self.rng = random.Random(seed)  # 本局的随机数，只由种子决定
+        self.clock = TickClock(step_ms)
+        # 不订阅 config_store：一局只使用开局时的配置，配置文件的变化不影响模拟结果
+        self.players = [Player(self.config, x=300, y=500, player_id=1, clock=self.clock)]
+        if two_player:
+            self.players.append(Player(self.config, x=500, y=500, player_id=2, clock=self.clock))
+        self.enemies = EnemyManager(self.config, clock=self.clock, rng=self.rng)
+        self.result = None  # None / "victory" / "game_over"
+        self.recorder = None  # 设置 ReplayRecorder 后录制每帧输入
+
+    @property
+    def tick(self):
+        return self.clock.frame
+
+    def step(self, inputs=None):
+        """推进一帧
+
+        inputs 为每名玩家的输入组成的列表，每项可以是动作位掩码或动作名称集合，
+        例如 [{"left", "shoot"}, set()]，缺省时视为没有按键。
+        """
+        if self.result:
+            return self.state()
+        self.clock.advance()
+        inputs = inputs or []
+        masks = [to_mask(inputs[i]) if i < len(inputs) else 0 for i in range(len(self.players))]
+        if self.recorder is not None:
+            self.recorder.record(masks)
+        for player, mask in zip(self.players, masks):
+            player.update(mask)
+        if self.enemies.update(self.players) == "victory":
+            self.result = "victory"
+        elif not any(player.is_alive() for player in self.players):
+            self.result = "game_over"
+        if self.recorder is not None:
+            self.recorder.record_hash(self.hash())
+        return self.state()
+
+    def hash(self):
+        """当前世界状态的哈希，见 statehash.py"""
+        return world_hash(self.clock.frame, self.players, self.enemies)
+
+    def run(self, ticks, policy=None):
+        """连续模拟 ticks 帧或直到分出胜负；policy(game) 返回每帧的输入"""
+        for _ in range(ticks):
+            self.step(policy(self) if policy else None)
+            if self.result:
+                break
+        return self.state()
+
+    def state(self):
+        """返回当前世界状态"""
+        enemies = self.enemies
+        boss = enemies.boss if enemies.boss in enemies.enemies else None
+        return {
+            "tick": self.clock.frame,
+            "time": self.clock.get_ticks(),
+            "result": self.result,
+            "stage": enemies.game_stage,
+            "players": [{
+                "id": player.player_id,
+                "x": player.rect.x,
+                "y": player.rect.y,
+                "lives": player.lives,
+                "score": player.score,
+                "weapon_level": player.weapon_level,
+                "shield": player.has_shield,
+                "bullets": len(player.bullets),
+            } for player in self.players],
+            "enemies": [{
+                "id": enemy.id,
+                "type": enemy.type,
+                "x": enemy.rect.x,
+                "y": enemy.rect.y,
+                "health": enemy.health,
+            } for enemy in enemies.enemies],
+            "boss": None if boss is None else {
+                "health": boss.health,
+                "phase": boss.phase,
+                "pattern": boss.attack_pattern,
+            },
+            "enemy_bullets": len(enemies.enemy_bullets),
+            "items": [{"type": item.type, "x": item.rect.x, "y": item.rect.y} for item in enemies.items],
+        }
+
+
+def autopilot(game):
+    """简单的自动驾驶：一直射击，并对准最近的敌人"""
+    inputs = []
+    for player in game.players:
+        actions = {"shoot"}
+        targets = game.enemies.enemies
+        if targets:
+            target = min(targets, key=lambda enemy: abs(enemy.rect.centerx - player.rect.centerx))
+            if target.rect.centerx < player.rect.centerx - 10:
+                actions.add("left")
+            elif target.rect.centerx > player.rect.centerx + 10:
+                actions.add("right")
+        inputs.append(actions)
+    return inputs
+
+
+def check_config(seed=1, ticks=1200):
+    """用非默认配置模拟两局，其中一局中途重新加载全局配置，结果应完全相同
+
+    返回不一致的说明（一致时为 None）。
+    """
+    config = thaw_config(load_config())
+    config["player"]["max_speed"] = 3
+    config["player"]["acceleration"] = 0.1
+    reference = HeadlessGame(config, seed)
+    reference.run(ticks, autopilot)
+    game = HeadlessGame(config, seed)
+    game.run(ticks // 2, autopilot)
+    config_store.reload()
+    game.run(ticks - game.tick, autopilot)
+    speeds = [player.max_speed for player in game.players]
+    if speeds != [3] * len(game.players):
+        return f"重新加载配置后玩家速度变为 {speeds}"
+    if (game.tick, game.hash()) != (reference.tick, reference.hash()):
+        return f"重新加载配置后结果不同: 第 {game.tick} 帧哈希 {game.hash():08x}，预期 {reference.hash():08x}"
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="无窗口模拟")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--ticks", type=int, default=60 * 60 * 10)
+    parser.add_argument("--two-player", action="store_true")
+    parser.add_argument("--boss", action="store_true", help="直接生成 Boss")
+    parser.add_argument("--record", metavar="PATH", help="把这一局录制为回放文件")
+    parser.add_argument("--check-config", action="store_true", help="检查注入的配置不受 config_store 重新加载影响")
+    args = parser.parse_args()
+
+    if args.check_config:
+        error = check_config(args.seed)
+        if error:
+            raise SystemExit(error)
+        print("注入配置的一局不受配置重新加载影响")
+        return
+
+    game = HeadlessGame(seed=args.seed, two_player=args.two_player)
+    if args.boss:
+        game.enemies.spawn_boss()
+    if args.record:
+        game.recorder = ReplayRecorder(game.seed, game.config, len(game.players), boss=args.boss)
+    start = time.perf_counter()
+    state = game.run(args.ticks, autopilot)
+    elapsed = time.perf_counter() - start
+    if args.record:
+        game.recorder.finish(game.players, game.result)
+        print(f"回放已保存: {game.recorder.save(args.record)}")
+    print(f"结果: {state['result']}，共 {state['tick']} 帧（游戏时间 {state['time'] / 1000:.1f} 秒），"
+          f"耗时 {elapsed:.3f} 秒，{state['tick'] / max(elapsed, 1e-9):.0f} 帧/秒")
+    for player in state["players"]:
+        print(f"P{player['id']}: 得分 {player['score']}，生命 {player['lives']}")
+
+
+if __name__ == "__main__":
+    main()
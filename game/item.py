@@ -1,12 +1,35 @@
 import pygame
 import random
+from assets import asset_cache
 
 class Item:
-    def __init__(self, x, y, item_type):
+    # 道具颜色
+    colors = {
+        "health": (255, 0, 0),     # 红色
+        "shield": (0, 255, 0),     # 绿色
+        "weapon": (0, 0, 255),     # 蓝色
+        # "bomb": (255, 255, 0)     # 黄色
+    }
+
+    # 道具效果
+    effects = {
+        "health": 1,     # 恢复生命值
+        "shield": 1,     # 获得护盾
+        "weapon": 1,     # 武器升级
+        # "bomb": 1    # 获得炸弹
+    }
+
+    def __init__(self, x=0, y=0, item_type="health"):
+        self.rect = pygame.Rect(0, 0, 32, 32)
+        self.speed = 2  # 道具下落速度
+        self.id = 0  # 由 EnemyManager.add_item 分配
+        self.reset(x, y, item_type)
+
+    def reset(self, x, y, item_type):
+        """重置道具状态，供对象池复用"""
         self.type = item_type
         try:
-            self.original_image = pygame.image.load(f"../assets/images/item_{item_type}.png")
-            self.image = pygame.transform.scale(self.original_image, (32, 32))
+            self.image = asset_cache.sprite(f"item_{item_type}", (32, 32))
             self.image_loaded = True
         except (pygame.error, FileNotFoundError) as e:
             print(f"Error loading item image ({item_type}): {e}")
@@ -14,25 +37,8 @@ class Item:
             # 创建一个彩色矩形作为替代
             self.image = pygame.Surface((32, 32))
             self.image.fill(self.colors[item_type])
-            
+
         self.rect = self.image.get_rect(center=(x, y))
-        self.speed = 2  # 道具下落速度
-        
-        # 道具效果
-        self.effects = {
-            "health": 1,     # 恢复生命值
-            "shield": 1,     # 获得护盾
-            "weapon": 1,     # 武器升级
-            # "bomb": 1    # 获得炸弹
-        }
-        
-        # 道具颜色
-        self.colors = {
-            "health": (255, 0, 0),     # 红色
-            "shield": (0, 255, 0),     # 绿色
-            "weapon": (0, 0, 255),     # 蓝色
-            # "bomb": (255, 255, 0)     # 黄色
-        }
 
     def update(self):
         self.rect.y += self.speed
@@ -55,7 +61,7 @@ class Item:
             player.upgrade_weapon()  # 使用 upgrade_weapon 方法来升级武器
         elif self.type == "shield":
             player.shield = True
-            player.shield_time = pygame.time.get_ticks()
+            player.shield_time = player.clock.get_ticks()
             player.activate_shield()  # 使用 activate_shield 方法来触发音效
         # elif self.type == "bomb":
         #     player.bombs += self.effects["bomb"] 
\ No newline at end of file
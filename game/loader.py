@@ -0,0 +1,142 @@
+import itertools
+import os
+import queue
+import threading
+from concurrent.futures import Future
+
+import pygame
+
+from assets import asset_cache, image_path, sound_path
+from atlas import ATLAS_IMAGE
+
+# 加载优先级：数值越小越先加载
+CRITICAL = 0  # 进入游戏就要用到的精灵和音效
+NORMAL = 1
+LOW = 2
+
+# 启动时预加载的资源：(优先级, 类型, 参数)
+PRELOAD = [
+    (CRITICAL, "image", (image_path(ATLAS_IMAGE), None, True)),
+    (CRITICAL, "sound", (sound_path("player_shoot.wav"),)),
+    (CRITICAL, "sound", (sound_path("enemy_shoot.wav"),)),
+    (CRITICAL, "sound", (sound_path("explosion.wav"),)),
+    (NORMAL, "sound", (sound_path("shield.wav"),)),
+    (LOW, "sound", (sound_path("victory.wav"),)),
+]
+
+
+class AssetLoader:
+    """后台资源加载器
+
+    解码（读盘、解压、缩放）在线程池中按优先级进行；像素格式转换和写入缓存
+    在主线程完成：每帧调用 update() 收取已完成的资源。游戏代码照常通过
+    asset_cache 取资源，遇到尚未完成的资源时只等待这一个。
+    """
+
+    def __init__(self, cache=asset_cache, workers=None):
+        self.cache = cache
+        self.workers = workers or max(1, min(4, (os.cpu_count() or 1) - 1))
+        self.queue = queue.PriorityQueue()
+        self.futures = {}  # 资源键 -> Future，写入缓存后移除
+        self.total = 0
+        self._order = itertools.count()  # 同优先级按提交顺序
+        self._threads = []
+        self._lock = threading.Lock()
+        # 资源包要在主线程打开，工作线程只读取
+        cache.open_pack()
+        cache.loader = self
+
+    def request(self, kind, args, priority=NORMAL):
+        """提交一个资源（kind 为 "image" 或 "sound"），返回对应的 Future"""
+        key = (kind,) + tuple(args)
+        with self._lock:
+            future = self.futures.get(key)
+            if future is not None:
+                return future
+            future = Future()
+            self.futures[key] = future
+            self.total += 1
+        self.queue.put((priority, next(self._order), key, future))
+        self._start_workers()
+        return future
+
+    def image(self, path, size=None, alpha=True, priority=NORMAL):
+        return self.request("image", (path, size, alpha), priority)
+
+    def sound(self, path, priority=NORMAL):
+        return self.request("sound", (path,), priority)
+
+    def preload(self, manifest=PRELOAD):
+        """提交启动时的预加载清单；没有初始化混音器时跳过音效"""
+        for priority, kind, args in manifest:
+            if kind == "sound" and not pygame.mixer.get_init():
+                continue
+            self.request(kind, args, priority)
+
+    def _start_workers(self):
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._work, name=f"asset-loader-{len(self._threads)}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _work(self):
+        while True:
+            _, _, key, future = self.queue.get()
+            if key is None:
+                return
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                if key[0] == "image":
+                    result = self.cache.decode_image(*key[1:])
+                else:
+                    result = self.cache.decode_sound(*key[1:])
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+
+    def take(self, key):
+        """取走某个资源的解码结果，必要时等待它完成；未提交过的资源返回 None"""
+        with self._lock:
+            future = self.futures.pop(key, None)
+        if future is None:
+            return None
+        return future.result()
+
+    def update(self):
+        """在主线程收取已完成的资源，完成像素格式转换并写入缓存"""
+        with self._lock:
+            done = [key for key, future in self.futures.items() if future.done()]
+        for key in done:
+            try:
+                if key[0] == "image":
+                    self.cache.image(*key[1:])
+                else:
+                    self.cache.sound(*key[1:])
+            except (pygame.error, FileNotFoundError):
+                pass  # 失败已记录在缓存中，真正使用时再报告
+            # 资源在提交之前已被同步加载过时，缓存不会取走结果，这里一并丢弃
+            with self._lock:
+                self.futures.pop(key, None)
+
+    def progress(self):
+        """返回 (已完成数, 总数)"""
+        with self._lock:
+            pending = sum(1 for future in self.futures.values() if not future.done())
+        return self.total - pending, self.total
+
+    def finished(self):
+        done, total = self.progress()
+        return done == total
+
+    def shutdown(self):
+        """取消尚未开始的任务并结束工作线程"""
+        with self._lock:
+            for future in self.futures.values():
+                future.cancel()
+        for _ in self._threads:
+            self.queue.put((float("inf"), next(self._order), None, None))
+        self._threads = []
+        if self.cache.loader is self:
+            self.cache.loader = None
@@ -0,0 +1,136 @@
+"""确定性锁步模式
+
+每台机器运行完整的模拟，只交换每帧的输入，输入消息同时带上发送方最新一帧的
+世界哈希。凑齐所有玩家的第 t 帧输入后推进一帧；对方某一帧的哈希与本机同一帧
+的哈希不同，就说明两边从这一帧开始不同步。
+
+确定性依赖：随机数只来自每局的 random.Random(种子)（EnemyManager.rng），计时只
+来自按帧推进的 TickClock，配置在开局时确定。
+
+    python lockstep.py --seconds 60                  # 两个本机对等端锁步运行并逐帧比较
+    python lockstep.py --seconds 60 --desync-at 900  # 在第 900 帧扰动一端，检查能否当帧发现
+"""
+import argparse
+import random
+import struct
+import time
+
+from headless import HeadlessGame, autopilot
+from controls import ACTION_BITS, to_mask
+from statehash import HASH_MASK
+
+INPUT = struct.Struct("<IBBIH")  # 输入的帧号 | 玩家编号 | 动作位掩码 | 哈希的帧号 | 世界哈希
+
+
+class DesyncError(Exception):
+    """两端的世界状态不一致"""
+
+    def __init__(self, tick, local, remote):
+        super().__init__(f"第 {tick} 帧不同步: 本机哈希 {local:04x}，对方 {remote:04x}")
+        self.tick = tick
+
+
+class LockstepPeer:
+    """锁步的一端：本机玩家编号 player_id，players 名玩家"""
+
+    def __init__(self, seed, config=None, players=2, player_id=1):
+        self.game = HeadlessGame(config=config, seed=seed, two_player=players == 2)
+        self.players = players
+        self.player_id = player_id
+        self.inputs = {}  # 帧号 -> {玩家编号: 动作位掩码}
+        self.next_input = 0  # 本机下一个输入的帧号
+        self.hashes = [self.game.hash() & HASH_MASK]  # 第 t 项为推进 t 帧之后的哈希
+        self.remote_hashes = {}  # 本机还没推进到的帧的对方哈希
+        self.hash_time = 0.0
+
+    @property
+    def tick(self):
+        return self.game.tick
+
+    def local_input(self, mask):
+        """登记本机下一帧的输入，返回要发给对方的消息"""
+        mask = to_mask(mask)
+        self.inputs.setdefault(self.next_input, {})[self.player_id] = mask
+        self.next_input += 1
+        return INPUT.pack(self.next_input - 1, self.player_id, mask, self.tick, self.hashes[self.tick])
+
+    def receive(self, data):
+        """处理对方的输入消息；发现不同步时抛出 DesyncError"""
+        tick, player_id, mask, hash_tick, remote_hash = INPUT.unpack(data)
+        self.inputs.setdefault(tick, {})[player_id] = mask
+        self.check(hash_tick, remote_hash)
+
+    def check(self, tick, remote_hash):
+        if tick < len(self.hashes):
+            if self.hashes[tick] != remote_hash:
+                raise DesyncError(tick, self.hashes[tick], remote_hash)
+        else:
+            self.remote_hashes[tick] = remote_hash
+
+    def advance(self):
+        """凑齐输入的帧全部推进，返回推进的帧数"""
+        steps = 0
+        while not self.game.result:
+            masks = self.inputs.get(self.tick)
+            if masks is None or len(masks) < self.players:
+                break
+            del self.inputs[self.tick]
+            self.game.step([masks.get(i + 1, 0) for i in range(self.players)])
+            start = time.perf_counter()
+            self.hashes.append(self.game.hash() & HASH_MASK)
+            self.hash_time += time.perf_counter() - start
+            steps += 1
+            remote_hash = self.remote_hashes.pop(self.tick, None)
+            if remote_hash is not None:
+                self.check(self.tick, remote_hash)
+        return steps
+
+
+def run_pair(seed, ticks, desync_at=None):
+    """两个本机对等端按锁步运行 ticks 帧，返回 (检测到不同步的帧号或 None, 对等端列表)
+
+    desync_at 指定时在推进那一帧时把第二个对等端的 1P 挪动 1 像素（模拟只在
+    一端生效的代码），用来验证能否在那一帧发现不同步。
+    """
+    peers = [LockstepPeer(seed, player_id=1), LockstepPeer(seed, player_id=2)]
+    rng = random.Random(seed)
+    try:
+        while peers[0].tick < ticks and not peers[0].game.result:
+            if peers[1].tick + 1 == desync_at:
+                peers[1].game.players[0].rect.x += 1
+            # 各自按自己看到的世界决定输入，只把输入发给对方
+            masks = [to_mask(autopilot(peer.game)[peer.player_id - 1]) for peer in peers]
+            if rng.random() < 0.2:
+                masks = [mask ^ rng.choice([0, ACTION_BITS["up"], ACTION_BITS["down"]]) for mask in masks]
+            messages = [peer.local_input(mask) for peer, mask in zip(peers, masks)]
+            peers[0].receive(messages[1])
+            peers[1].receive(messages[0])
+            for peer in peers:
+                peer.advance()
+    except DesyncError as e:
+        return e.tick, peers
+    return None, peers
+
+
+def main():
+    parser = argparse.ArgumentParser(description="确定性锁步模式")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--seconds", type=float, default=60)
+    parser.add_argument("--desync-at", type=int, metavar="TICK", help="在这一帧扰动第二个对等端")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    desync, peers = run_pair(args.seed, int(args.seconds * 60), args.desync_at)
+    elapsed = time.perf_counter() - start
+    game = peers[0].game
+    hash_us = peers[0].hash_time / max(game.tick, 1) * 1e6
+    print(f"种子 {args.seed}: {game.tick} 帧，结局 {game.result}，耗时 {elapsed:.2f} 秒，"
+          f"哈希每帧 {hash_us:.0f} us，每帧交换 {INPUT.size} 字节/玩家")
+    if desync is None:
+        print("两端逐帧哈希一致")
+    else:
+        print(f"第 {desync} 帧检测到不同步" + (f"（扰动发生在第 {args.desync_at} 帧）" if args.desync_at else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,39 +1,60 @@
+import argparse
+import random
 import pygame
-from config import load_config, update_volume
-from ui import show_main_menu, show_game_mode_menu, show_pause_settings, show_settings_menu, show_key_binding_prompt
+from clock import TickClock
+from config import config_store, load_config, update_volume, update_key_binding
+from controls import input_mapper, key_name
+from ui import MainMenu, GameModeMenu, PauseMenu, SettingsMenu, show_key_binding_prompt, show_loading_progress
 from player import Player
 from enemy import EnemyManager
 from background import Background
+from assets import asset_cache
+from sound_bank import sound_bank
+from profiler import FrameProfiler
+from renderer import Renderer
+from text_cache import NumberText, text_cache
+from loader import AssetLoader, LOW
+from assets import image_path
+from replay import ReplayRecorder, new_seed
+from network import NetworkClient, DEFAULT_PORT
+from remote import RemoteWorld
+from prediction import Predictor
+from statehash import world_hash
 
-def apply_config_changes(config, player1, player2, enemies):
-    """应用配置更改"""
-    if config:
-        # 更新音量
-        volume = config.get("volume", 0.5)
-        for sound_name, sound in player1.sounds.items():
-            sound.set_volume(volume)
-        if player2:
-            for sound_name, sound in player2.sounds.items():
-                sound.set_volume(volume)
-        
-        # 更新玩家配置
-        player1.max_speed = config["player"]["max_speed"]
-        player1.acceleration = config["player"]["acceleration"]
-        if player2:
-            player2.max_speed = config["player"]["max_speed"]
-            player2.acceleration = config["player"]["acceleration"]
-        
-        # 更新敌人配置
-        enemies.config = config
-
-def main():
+
+def save_replay(recorder, players, result=None):
+    """保存这一局的回放（未开启录制或已经保存过时忽略）"""
+    if recorder is None or recorder.saved:
+        return
+    recorder.finish(players, result)
+    path = recorder.save()
+    if path:
+        print(f"回放已保存: {path}")
+
+def main(connect=None, room=None):
     pygame.init()
     config = load_config()
     screen = pygame.display.set_mode((config["screen_width"], config["screen_height"]))
     pygame.display.set_caption("打飞机大战")
     clock = pygame.time.Clock()
 
+    # 后台加载资源，主菜单立即可以操作；游戏中要用的精灵和音效优先加载，
+    # 用到尚未加载完成的资源时只等待该资源
+    asset_loader = AssetLoader()
+    asset_loader.preload()
+    background_request = asset_loader.image(image_path("cloud.png"), (config["screen_width"], config["screen_height"]),
+                                            alpha=False, priority=LOW)
+
     font = pygame.font.SysFont(config["font"], 36)
+    # HUD 数值字段：数字由预渲染字形拼接，数值不变时直接复用
+    hud_fields = {label: NumberText(font, label, (255, 255, 255))
+                  for label in ("得分: ", "生命: ", "P1得分: ", "P1生命: ", "P2得分: ", "P2生命: ")}
+    # 菜单只构建一次，悬停或设置变化时才重新合成
+    screen_size = screen.get_size()
+    main_menu = MainMenu(font, screen_size)
+    mode_menu = GameModeMenu(font, screen_size)
+    pause_menu = PauseMenu(font, screen_size)
+    settings_menu = SettingsMenu(font, screen_size)
 
     game_state = "menu"
     previous_state = None
@@ -41,22 +62,45 @@ def main():
     current_key_binding = None
     is_two_player = False  # 是否双人模式
 
-    player1 = Player(config, x=300, y=500, player_id=1)
+    # 玩家和敌人管理器在每局开始（进入游戏状态）时创建，背景在图片加载完成后创建
+    player1 = None
     player2 = None  # 第二个玩家初始为None
-    enemies = EnemyManager(config)
+    enemies = None
+    background = None
+    # 游戏逻辑使用固定步长的计时器，只在游戏状态下每帧推进一次（暂停时计时也暂停），
+    # 这样一局游戏由随机种子和逐帧输入完全确定，可以录制为回放
+    game_clock = None
+    recorder = None
 
-    # 初始化背景
-    background = Background(config["screen_width"], config["screen_height"])
+    # 联机模式：连接权威服务器，发送输入并预测自己的飞机，其余按服务器快照插值绘制
+    client = None
+    remote = None
+    predictor = None
+    if connect:
+        host, _, port = connect.partition(":")
+        try:
+            client = NetworkClient(host, int(port or DEFAULT_PORT), room=room)
+            remote = RemoteWorld()
+            game_state = "online"
+        except OSError as e:
+            print(f"无法连接服务器 {connect}: {e}")
+
+    # 帧耗时分析：F3 显示/隐藏叠加层，F4 导出逐帧数据
+    profiler = FrameProfiler()
+    # 画面提交：可选只刷新脏矩形
+    renderer = Renderer(screen)
+    last_state = None
+    loading = True
 
     running = True
     while running:
-        # 检查配置更新
-        new_config = load_config()
-        if new_config:
-            apply_config_changes(new_config, player1, player2, enemies)
-            config = new_config
+        profiler.begin_frame()
+        # 检查配置更新（限频检查修改时间，变化时推送给订阅者）
+        config_store.poll()
+        config = config_store.get()
+        renderer.dirty_rects = config.get("dirty_rects", False)
+        profiler.mark("config")
 
-        screen.fill((0, 0, 0))
         mouse_pos = pygame.mouse.get_pos()
         mouse_click = False
         for event in pygame.event.get():
@@ -64,7 +108,21 @@ def main():
                 running = False
             if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
                 mouse_click = True
+                renderer.invalidate()
             if event.type == pygame.KEYDOWN:
+                renderer.invalidate()
+                # 按键绑定捕获：ESC 取消，其余按键（包括 F3/F4）都作为新的绑定
+                if game_state == "key_binding" and event.key != pygame.K_ESCAPE:
+                    if current_key_binding:
+                        player, action = current_key_binding
+                        update_key_binding(player, action, key_name(event.key))
+                    game_state = "settings"
+                    continue
+                if event.key == pygame.K_F3:
+                    profiler.toggle()
+                elif event.key == pygame.K_F4:
+                    profiler.dump("frame_profile.csv")
+                    profiler.dump("frame_profile.json")
                 if event.key == pygame.K_ESCAPE:
                     if game_state == "playing":
                         previous_state = game_state
@@ -78,6 +136,9 @@ def main():
                             game_state = previous_state
                     elif game_state == "key_binding":
                         game_state = "settings"
+                    elif game_state == "online":
+                        client.close()
+                        game_state = "menu"
 
             if game_state == "menu":
                 if event.type == pygame.KEYDOWN:
@@ -87,147 +148,250 @@ def main():
             if game_state in ["game_over", "victory"]:
                 if event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_r:
-                       # 重新开始游戏
-                       player1 = Player(config, x=300, y=500, player_id=1)
+                       # 重新开始游戏（进入游戏状态时创建新的一局）
+                       player1 = None
                        player2 = None
-                       enemies = EnemyManager(config)
+                       enemies = None
                        game_state = "playing"
                     elif event.key == pygame.K_ESCAPE:
                        running = False
 
         screen.fill((0, 0, 0))
+        asset_loader.update()
+        if game_state == "playing" and player1 is None:
+            # 新的一局：新的随机种子和计时器
+            seed = new_seed()
+            game_clock = TickClock()
+            player1 = Player(config, x=300, y=500, player_id=1, clock=game_clock, store=config_store)
+            if is_two_player:
+                player2 = Player(config, x=500, y=500, player_id=2, clock=game_clock, store=config_store)
+            enemies = EnemyManager(config, clock=game_clock, rng=random.Random(seed), store=config_store)
+            recorder = None
+            if config.get("record_replays", True):
+                recorder = ReplayRecorder(seed, config, 2 if player2 else 1, store=config_store)
+        if background is None and (background_request.done() or game_state in ("playing", "online")):
+            background = Background(config["screen_width"], config["screen_height"])
+            renderer.invalidate()
+        profiler.mark("events")
 
         # 更新和绘制背景
-        if game_state == "playing":
+        if game_state in ("playing", "online"):
             background.update()
+            if background.scroll_speed:
+                renderer.invalidate()  # 背景滚动时整屏都在变化
         # 在所有状态下都绘制背景
-        background.draw(screen)
+        if background:
+            background.draw(screen)
+        profiler.mark("background")
 
         if game_state == "menu":
-            buttons = show_main_menu(screen, font)
-            for text, rect in buttons:
-                if mouse_click and rect.collidepoint(mouse_pos):
-                    if text == "开始游戏":
-                        game_state = "mode_select"
-                    elif text == "设置":
-                        previous_state = game_state
-                        game_state = "settings"
-                    elif text == "退出游戏":
-                        running = False
+            renderer.mark(main_menu.draw(screen, mouse_pos))
+            text = main_menu.click(mouse_pos, mouse_click)
+            if text == "开始游戏":
+                game_state = "mode_select"
+            elif text == "设置":
+                previous_state = game_state
+                game_state = "settings"
+            elif text == "退出游戏":
+                running = False
         elif game_state == "pause":
-            buttons = show_pause_settings(screen, font)
-            for text, rect in buttons:
-                if mouse_click and rect.collidepoint(mouse_pos):
-                    if text == "继续游戏":
-                        game_state = "playing"
-                    elif text == "设置":
-                        previous_state = game_state
-                        game_state = "settings"
-                    elif text == "退出到主菜单":
-                        game_state = "menu"
-                        # 重置游戏状态
-                        player1 = Player(config, x=300, y=500, player_id=1)
-                        player2 = None
-                        enemies = EnemyManager(config)
-                        is_two_player = False
-                    elif text == "退出游戏":
-                        running = False
+            renderer.mark(pause_menu.draw(screen, mouse_pos))
+            text = pause_menu.click(mouse_pos, mouse_click)
+            if text == "继续游戏":
+                game_state = "playing"
+            elif text == "设置":
+                previous_state = game_state
+                game_state = "settings"
+            elif text == "退出到主菜单":
+                game_state = "menu"
+                # 保存中途放弃的这一局，重置游戏状态
+                save_replay(recorder, [player for player in (player1, player2) if player])
+                player1 = None
+                player2 = None
+                enemies = None
+                is_two_player = False
+            elif text == "退出游戏":
+                running = False
         elif game_state == "playing":
-            # 更新玩家
-            player1.update()
-            if player2:
-                player2.update()
-            result = enemies.update(player1)
+            # 更新玩家：每帧读取一次键盘，按绑定生成每名玩家的动作位掩码
+            game_clock.advance()
+            actions = input_mapper.poll()
+            if recorder:
+                recorder.record([actions.get(1, 0), actions.get(2, 0)])
+            player1.update(actions.get(1, 0))
             if player2:
-                enemies.update(player2)
+                player2.update(actions.get(2, 0))
+            profiler.mark("players")
+            # 世界每帧只推进一次，同时结算所有玩家的碰撞
+            players = [player1, player2] if player2 else [player1]
+            result = enemies.update(players)
+            if recorder:
+                recorder.record_hash(world_hash(game_clock.frame, players, enemies))
             if result == "victory":
                 game_state = "victory"
                 player1.play_victory_sound()
+            profiler.mark("enemies")
             player1.draw(screen)
             if player2:
                 player2.draw(screen)
             enemies.draw(screen)
+            renderer.mark_all(player1.dirty_rects())
+            if player2:
+                renderer.mark_all(player2.dirty_rects())
+            renderer.mark_all(enemies.dirty_rects())
+            profiler.mark("draw")
             
             # 显示分数和生命值
             if is_two_player:
                 # 双人模式：左侧显示P1，右侧显示P2
                 # P1信息
-                score_text1 = font.render(f"P1得分: {player1.score}", True, (255, 255, 255))
-                life_text1 = font.render(f"P1生命: {player1.lives}", True, (255, 255, 255))
-                screen.blit(score_text1, (10, 10))
-                screen.blit(life_text1, (10, 50))
+                score_text1 = hud_fields["P1得分: "].render(player1.score)
+                life_text1 = hud_fields["P1生命: "].render(player1.lives)
+                renderer.mark(screen.blit(score_text1, (10, 10)))
+                renderer.mark(screen.blit(life_text1, (10, 50)))
                 
                 # P2信息
-                score_text2 = font.render(f"P2得分: {player2.score}", True, (255, 255, 255))
-                life_text2 = font.render(f"P2生命: {player2.lives}", True, (255, 255, 255))
-                screen.blit(score_text2, (screen.get_width() - 200, 10))
-                screen.blit(life_text2, (screen.get_width() - 200, 50))
+                score_text2 = hud_fields["P2得分: "].render(player2.score)
+                life_text2 = hud_fields["P2生命: "].render(player2.lives)
+                renderer.mark(screen.blit(score_text2, (screen.get_width() - 200, 10)))
+                renderer.mark(screen.blit(life_text2, (screen.get_width() - 200, 50)))
             else:
                 # 单人模式：只显示P1信息
-                score_text = font.render(f"得分: {player1.score}", True, (255, 255, 255))
-                life_text = font.render(f"生命: {player1.lives}", True, (255, 255, 255))
-                screen.blit(score_text, (10, 10))
-                screen.blit(life_text, (10, 50))
+                score_text = hud_fields["得分: "].render(player1.score)
+                life_text = hud_fields["生命: "].render(player1.lives)
+                renderer.mark(screen.blit(score_text, (10, 10)))
+                renderer.mark(screen.blit(life_text, (10, 50)))
+            profiler.mark("hud")
 
-            # 判断生命是否结束
-            if not player1.is_alive() and (not player2 or not player2.is_alive()):
+            # 判断生命是否结束（与 Boss 同一帧被击败时算通关）
+            if game_state == "playing" and not player1.is_alive() and (not player2 or not player2.is_alive()):
                 game_state = "game_over"
+            if game_state != "playing":
+                save_replay(recorder, players, game_state)
+        elif game_state == "online":
+            # 取走后台线程收到的消息（不阻塞），再发送本帧输入（使用 1P 的按键绑定）
+            for message in client.poll():
+                if message["type"] in ("reject", "disconnected"):
+                    print(f"与服务器断开: {message['reason']}")
+                remote.apply(message)
+                if message["type"] == "snapshot" and predictor is not None:
+                    me = remote.player(client.player_id)
+                    if me is not None:
+                        predictor.reconcile(me, message["ack"])
+            if predictor is None and client.player_id and client.config is not None:
+                predictor = Predictor(client.config, client.player_id)
+            # 收到第一份快照（开局）之后才发送输入，每个输入同时在本地预测
+            if predictor is not None and predictor.synced and client.connected and not remote.result:
+                mask = input_mapper.mask(1)
+                for _ in range(client.inputs_due()):
+                    predictor.apply_input(client.send_input(mask), mask)
+            if predictor is not None and predictor.synced:
+                predictor.decay()
+                remote.draw(screen, (client.player_id,) + predictor.position)
+            else:
+                remote.draw(screen)
+            me = remote.player(client.player_id)
+            if me:
+                renderer.mark(screen.blit(hud_fields["得分: "].render(me["score"]), (10, 10)))
+                renderer.mark(screen.blit(hud_fields["生命: "].render(me["lives"]), (10, 50)))
+            if remote.result == "victory":
+                status = "恭喜通关！按 ESC 返回"
+            elif remote.result == "game_over":
+                status = "游戏结束！按 ESC 返回"
+            elif not client.connected:
+                status = "与服务器的连接已断开，按 ESC 返回"
+            elif remote.state is None:
+                status = "等待其他玩家加入…"
+            elif not client.player_id:
+                status = "观战中"
+            else:
+                status = None
+            if status:
+                renderer.mark(screen.blit(text_cache.render(font, status, (255, 255, 255)), (100, 250)))
+            renderer.invalidate()  # 画面完全由快照决定，整屏刷新
         elif game_state == "mode_select":
-            buttons = show_game_mode_menu(screen, font)
-            for text, rect in buttons:
-                if mouse_click and rect.collidepoint(mouse_pos):
-                    if text == "单人游戏":
-                        is_two_player = False
-                        game_state = "playing"
-                    elif text == "双人游戏":
-                        is_two_player = True
-                        player2 = Player(config, x=500, y=500, player_id=2)
-                        game_state = "playing"
-                    elif text == "设置":
-                        previous_state = game_state
-                        game_state = "settings"
-                    elif text == "退出游戏":
-                        running = False
+            renderer.mark(mode_menu.draw(screen, mouse_pos))
+            text = mode_menu.click(mouse_pos, mouse_click)
+            if text == "单人游戏":
+                is_two_player = False
+                game_state = "playing"
+            elif text == "双人游戏":
+                is_two_player = True
+                game_state = "playing"
+            elif text == "设置":
+                previous_state = game_state
+                game_state = "settings"
+            elif text == "退出游戏":
+                running = False
         elif game_state == "settings":
-            buttons = show_settings_menu(screen, font)
-            for button_id, rect in buttons:
-                if mouse_click and rect.collidepoint(mouse_pos):
-                    if button_id == "volume_down":
-                        config = load_config()
-                        new_volume = max(0.0, config["volume"] - 0.1)
-                        update_volume(new_volume)
-                    elif button_id == "volume_up":
-                        config = load_config()
-                        new_volume = min(1.0, config["volume"] + 0.1)
-                        update_volume(new_volume)
-                    elif button_id == "back":
-                        if previous_state == "pause":
-                            game_state = "pause"
-                        else:
-                            game_state = previous_state
-                    elif button_id.startswith("bind_"):
-                        _, player, action = button_id.split("_")
-                        game_state = "key_binding"
-                        current_key_binding = (player, action)
+            # 音量和按键绑定变化通过配置订阅触发重新合成
+            renderer.mark(settings_menu.draw(screen, mouse_pos))
+            button_id = settings_menu.click(mouse_pos, mouse_click)
+            if button_id == "volume_down":
+                config = load_config()
+                new_volume = max(0.0, config["volume"] - 0.1)
+                update_volume(new_volume)
+            elif button_id == "volume_up":
+                config = load_config()
+                new_volume = min(1.0, config["volume"] + 0.1)
+                update_volume(new_volume)
+            elif button_id == "back":
+                if previous_state == "pause":
+                    game_state = "pause"
+                else:
+                    game_state = previous_state
+            elif button_id and button_id.startswith("bind_"):
+                _, player, action = button_id.split("_")
+                game_state = "key_binding"
+                current_key_binding = (player, action)
         elif game_state == "key_binding":
             if current_key_binding:
                 player, action = current_key_binding
-                if show_key_binding_prompt(screen, font, player, action):
-                    game_state = "settings"
-                else:
-                    running = False
+                renderer.mark(show_key_binding_prompt(screen, font, player, action))
         elif game_state == "game_over":
-            game_over_text = font.render("游戏结束！按 R 重新开始，ESC 退出", True, (255, 0, 0))
+            game_over_text = text_cache.render(font, "游戏结束！按 R 重新开始，ESC 退出", (255, 0, 0))
             screen.blit(game_over_text, (100, 250))
         elif game_state == "victory":
-            victory_text = font.render("恭喜通关！按 R 重新开始，ESC 退出", True, (255, 215, 0))
+            victory_text = text_cache.render(font, "恭喜通关！按 R 重新开始，ESC 退出", (255, 215, 0))
             screen.blit(victory_text, (100, 250))
 
-        pygame.display.flip()
+        # 资源加载进度，加载完成后整屏刷新一次把进度条擦掉
+        if loading:
+            done, total = asset_loader.progress()
+            if done < total:
+                renderer.mark(show_loading_progress(screen, font, done, total))
+            else:
+                loading = False
+                renderer.invalidate()
+        profiler.mark("draw")
+
+        renderer.mark(profiler.draw(screen))
+        profiler.mark("overlay")
+        # 切换界面时整屏刷新
+        if game_state != last_state:
+            renderer.invalidate()
+            last_state = game_state
+        renderer.present()
+        profiler.mark("flip")
         clock.tick(60)
+        profiler.mark("tick")
+        profiler.end_frame()
 
+    save_replay(recorder, [player for player in (player1, player2) if player])
+    if client:
+        client.close()
+    asset_loader.shutdown()
+    stats = asset_cache.stats()
+    print(f"资源缓存: 命中 {stats['hits']} 次, 未命中 {stats['misses']} 次")
+    stats = sound_bank.stats()
+    print(f"音效: 播放 {stats['played']} 次, 同帧合并 {stats['throttled']} 次, "
+          f"超出发声上限 {stats['voice_limited']} 次, 打断 {stats['preempted']} 次, 丢弃 {stats['dropped']} 次")
     pygame.quit()
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="打飞机大战")
+    parser.add_argument("--connect", metavar="HOST[:PORT]", help="连接联机服务器")
+    parser.add_argument("--room", help="多房间服务器上要加入的房间名（缺省时自动分配）")
+    args = parser.parse_args()
+    main(args.connect, args.room)
@@ -0,0 +1,136 @@
+"""本机网络延迟模拟：在客户端和服务器之间转发 TCP 数据并加上延迟和抖动
+
+每个方向分别延迟 latency / 2 ± jitter / 2 毫秒；与真实的 TCP 连接一样保持数据
+顺序，抖动只会让数据成批晚到，不会乱序。用来在本机验证客户端预测和快照插值。
+
+    python netsim.py --target 127.0.0.1:5555 --listen 5556 --latency 120 --jitter 30
+    python main.py --connect 127.0.0.1:5556
+"""
+import argparse
+import asyncio
+import random
+
+from network import DEFAULT_PORT
+
+CHUNK_SIZE = 64 * 1024
+
+
+class LatencyProxy:
+    """延迟转发代理：监听 host:port，把每个连接转发到 target_host:target_port"""
+
+    def __init__(self, target_host, target_port, latency_ms=100, jitter_ms=0, host="127.0.0.1", port=0, seed=None):
+        self.target_host = target_host
+        self.target_port = target_port
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.host = host
+        self.port = port
+        self.rng = random.Random(seed)
+        self.server = None
+        self.tasks = set()
+        self.bytes_forwarded = 0
+
+    async def start(self):
+        """开始监听；port 为 0 时使用系统分配的端口"""
+        self.server = await asyncio.start_server(self.handle_client, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        print(f"延迟代理: {self.host}:{self.port} -> {self.target_host}:{self.target_port}，"
+              f"延迟 {self.latency * 1000:.0f} ms，抖动 {self.jitter * 1000:.0f} ms")
+
+    def delay(self):
+        """单程延迟（秒）"""
+        return max(0.0, self.latency / 2 + self.rng.uniform(-self.jitter / 2, self.jitter / 2))
+
+    async def handle_client(self, client_reader, client_writer):
+        try:
+            server_reader, server_writer = await asyncio.open_connection(self.target_host, self.target_port)
+        except OSError as e:
+            print(f"无法连接 {self.target_host}:{self.target_port}: {e}")
+            client_writer.close()
+            return
+        pumps = [asyncio.create_task(self.pump(client_reader, server_writer)),
+                 asyncio.create_task(self.pump(server_reader, client_writer))]
+        self.tasks.update(pumps)
+        try:
+            await asyncio.wait(pumps, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in pumps:
+                task.cancel()
+                self.tasks.discard(task)
+            await asyncio.gather(*pumps, return_exceptions=True)
+            client_writer.close()
+            server_writer.close()
+
+    async def pump(self, reader, writer):
+        """单向转发：读到的数据按到达时间加上延迟后写出，不早于之前的数据"""
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+
+        async def deliver():
+            while True:
+                due, data = await queue.get()
+                if data is None:
+                    return
+                delay = due - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                writer.write(data)
+                await writer.drain()
+                self.bytes_forwarded += len(data)
+
+        sender = asyncio.create_task(deliver())
+        last_due = 0.0
+        try:
+            while True:
+                data = await reader.read(CHUNK_SIZE)
+                last_due = max(loop.time() + self.delay(), last_due)
+                await queue.put((last_due, data or None))
+                if not data:
+                    break
+            await sender
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            sender.cancel()
+            await asyncio.gather(sender, return_exceptions=True)
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            for task in list(self.tasks):
+                task.cancel()
+            await self.server.wait_closed()
+            self.server = None
+
+
+def parse_address(address, default_host="127.0.0.1"):
+    """把 HOST:PORT 或 PORT 解析为 (host, port)"""
+    host, _, port = address.rpartition(":")
+    return host or default_host, int(port)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本机网络延迟模拟")
+    parser.add_argument("--target", default=f"127.0.0.1:{DEFAULT_PORT}", help="服务器地址 HOST:PORT")
+    parser.add_argument("--listen", default=str(DEFAULT_PORT + 1), help="监听地址 [HOST:]PORT")
+    parser.add_argument("--latency", type=float, default=100, help="往返延迟（毫秒）")
+    parser.add_argument("--jitter", type=float, default=0, help="抖动（毫秒）")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+    target_host, target_port = parse_address(args.target)
+    host, port = parse_address(args.listen)
+
+    async def serve():
+        proxy = LatencyProxy(target_host, target_port, args.latency, args.jitter, host, port, args.seed)
+        await proxy.start()
+        async with proxy.server:
+            await proxy.server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
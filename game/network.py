@@ -1,16 +1,368 @@
+"""联机协议与客户端
+
+服务器（server.py）是权威的一方：只有它运行 Player / EnemyManager 模拟，客户端
+发送每帧的动作位掩码，接收服务器广播的世界快照。
+
+消息以二进制帧传输（小端）：
+    uint32 负载长度 | uint8 消息类型 | 负载
+    HELLO     客户端 -> 服务器   uint16 协议版本 | 可选的 UTF-8 房间名
+    WELCOME   服务器 -> 客户端   uint8 玩家编号（0 为观战）| uint32 当前帧 | uint16 每秒帧数 | uint32 随机种子
+    INPUT     客户端 -> 服务器   uint32 输入序号 | uint8 动作位掩码
+    SNAPSHOT  服务器 -> 客户端   uint32 已处理的最后一个输入序号 | 增量快照（格式见 snapshot.py）
+    REJECT    服务器 -> 客户端   UTF-8 原因
+    ACK       客户端 -> 服务器   uint32 已收到的快照帧号（服务器以它为之后增量的基线）
+    CONFIG    服务器 -> 客户端   UTF-8 JSON 本局配置（客户端预测自己的飞机时使用相同的移动参数）
+    REDIRECT  大厅 -> 客户端     uint16 房间端口（多房间服务器 rooms.py 把客户端分到某个房间，
+                                 客户端改连同一主机的这个端口并重新发送 HELLO）
+
+客户端的接收在后台守护线程中进行，收到的消息放进队列，主循环每帧调用 poll()
+取走，不会阻塞渲染。
+
+    python network.py --clients 3 --seconds 10             # 连接本机服务器的模拟客户端
+    python network.py --clients 2 --predict --port 5556    # 模拟客户端预测自己的飞机并统计校正量
+"""
+import argparse
+import json
+import queue
+import random
 import socket
+import struct
 import threading
+import time
+
+from controls import ACTION_BITS
+from prediction import Predictor
+from remote import RemoteWorld
+from snapshot import SnapshotDecoder, to_view
+
+PROTOCOL_VERSION = 4
+DEFAULT_PORT = 5555
+
+FRAME = struct.Struct("<IB")
+MAX_FRAME = 1 << 20  # 单条消息的负载上限，超过视为协议错误
+
+MSG_HELLO = 1
+MSG_WELCOME = 2
+MSG_INPUT = 3
+MSG_SNAPSHOT = 4
+MSG_REJECT = 5
+MSG_ACK = 6
+MSG_CONFIG = 7
+MSG_REDIRECT = 8
+
+HELLO = struct.Struct("<H")
+WELCOME = struct.Struct("<BIHI")
+INPUT = struct.Struct("<IB")
+SNAPSHOT = struct.Struct("<I")
+ACK = struct.Struct("<I")
+REDIRECT = struct.Struct("<H")
+
+SPECTATOR = 0  # 玩家编号 0 表示观战
+MAX_REDIRECTS = 3
+MAX_INPUT_BURST = 4  # 一帧内最多补发的输入数
+
+
+class ProtocolError(Exception):
+    pass
+
+
+def pack_frame(msg_type, payload=b""):
+    return FRAME.pack(len(payload), msg_type) + payload
+
+
+def unpack_header(header):
+    """解析帧头，返回 (负载长度, 消息类型)"""
+    length, msg_type = FRAME.unpack(header)
+    if length > MAX_FRAME:
+        raise ProtocolError(f"消息过长: {length} 字节")
+    return length, msg_type
+
+
+async def read_frame(reader):
+    """从 asyncio StreamReader 读取一帧，返回 (消息类型, 负载)"""
+    length, msg_type = unpack_header(await reader.readexactly(FRAME.size))
+    return msg_type, await reader.readexactly(length)
+
+
+def pack_hello(room=None):
+    return pack_frame(MSG_HELLO, HELLO.pack(PROTOCOL_VERSION) + (room or "").encode("utf-8"))
+
+
+def unpack_hello(payload):
+    """解析 HELLO，返回 (协议版本, 房间名或 None)"""
+    (version,) = HELLO.unpack_from(payload)
+    return version, payload[HELLO.size:].decode("utf-8") or None
+
+
+def encode_snapshot(ack, data):
+    """data 为 SnapshotEncoder.encode() 的结果"""
+    return pack_frame(MSG_SNAPSHOT, SNAPSHOT.pack(ack) + data)
+
+
+def decode_message(msg_type, payload, decoder):
+    """把服务器发来的消息解码为字典，快照由 decoder（SnapshotDecoder）按基线还原"""
+    if msg_type == MSG_WELCOME:
+        player_id, tick, tick_rate, seed = WELCOME.unpack(payload)
+        return {"type": "welcome", "player_id": player_id, "tick": tick, "tick_rate": tick_rate, "seed": seed}
+    if msg_type == MSG_SNAPSHOT:
+        (ack,) = SNAPSHOT.unpack_from(payload)
+        world = decoder.decode(payload[SNAPSHOT.size:])
+        return {"type": "snapshot", "tick": world["tick"], "ack": ack, "state": to_view(world),
+                "size": FRAME.size + len(payload)}
+    if msg_type == MSG_CONFIG:
+        return {"type": "config", "config": json.loads(payload.decode("utf-8"))}
+    if msg_type == MSG_REJECT:
+        return {"type": "reject", "reason": payload.decode("utf-8", "replace")}
+    raise ProtocolError(f"未知的消息类型: {msg_type}")
+
 
 class NetworkClient:
-    def __init__(self, host='127.0.0.1', port=5555):
-        self.client = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.client.connect((host, port))
-        threading.Thread(target=self.receive).start()
+    """联机客户端
+
+    连接后由守护线程阻塞接收消息并放入队列，主线程每帧调用 poll() 取走已收到的
+    消息、调用 send_input() 发送本帧输入，都不会阻塞。快照在接收线程中解码并
+    立即回复 ACK。断线时队列中出现 {"type": "disconnected"} 消息。
+    连接的是多房间服务器的大厅时，按 REDIRECT 改连分到的房间；room 指定房间名。
+    """
+
+    def __init__(self, host="127.0.0.1", port=DEFAULT_PORT, timeout=5.0, room=None):
+        self.messages = queue.Queue()
+        self.connected = True
+        self.player_id = None  # 收到 WELCOME 之前为 None
+        self.tick_rate = None
+        self.seed = None
+        self.config = None  # 收到 CONFIG 之前为 None
+        self.input_seq = 0
+        self.input_start = None  # 按服务器帧率发送输入的起点（本地时间, 输入序号）
+        self.bytes_received = 0
+        self.bytes_sent = 0
+        self.decoder = SnapshotDecoder()
+        self._send_lock = threading.Lock()
+        self.port = port
+        self.client = self.handshake(host, port, timeout, room)
+        threading.Thread(target=self.receive, name="network-client", daemon=True).start()
+
+    def handshake(self, host, port, timeout, room):
+        """连接并发送 HELLO；收到 REDIRECT 时改连新的端口，返回连接好的 socket
+
+        第一条回复在这里同步读取，不是 REDIRECT 时放回队列，由 poll() 正常取走。
+        """
+        for _ in range(MAX_REDIRECTS + 1):
+            client = socket.create_connection((host, port), timeout=timeout)
+            client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self.client = client
+            try:
+                hello = pack_hello(room)
+                client.sendall(hello)
+                self.bytes_sent += len(hello)
+                length, msg_type = unpack_header(self._recv_exact(FRAME.size))
+                payload = self._recv_exact(length)
+                self.bytes_received += FRAME.size + length
+                if msg_type == MSG_REDIRECT:
+                    (port,) = REDIRECT.unpack(payload)
+                    client.close()
+                    continue
+                message = decode_message(msg_type, payload, self.decoder)
+            except (OSError, ProtocolError, ValueError, struct.error) as e:
+                client.close()
+                raise e if isinstance(e, OSError) else ConnectionError(f"握手失败: {e}")
+            client.settimeout(None)
+            self.port = port
+            self.messages.put(message)
+            return client
+        raise ConnectionError("重定向次数过多")
 
-    def send(self, data):
-        self.client.send(data.encode())
+    def send(self, msg_type, payload=b""):
+        if not self.connected:
+            return False
+        frame = pack_frame(msg_type, payload)
+        try:
+            with self._send_lock:
+                self.client.sendall(frame)
+        except OSError as e:
+            self._disconnect(str(e))
+            return False
+        self.bytes_sent += len(frame)
+        return True
+
+    def send_input(self, mask):
+        """发送本帧的动作位掩码，返回它的输入序号"""
+        self.input_seq += 1
+        self.send(MSG_INPUT, INPUT.pack(self.input_seq, mask))
+        return self.input_seq
+
+    def inputs_due(self, now=None):
+        """本帧应发送的输入个数
+
+        服务器每帧消耗一个输入，没有新输入时沿用上一个按键，这一帧就不在客户端的
+        预测之内；按服务器帧率而不是本地帧率发送输入，两边的移动次数才一致。
+        本地卡顿太久时不补发，从现在重新计时。
+        """
+        now = time.perf_counter() if now is None else now
+        if self.input_start is None:
+            self.input_start = (now, self.input_seq)
+        start, first_seq = self.input_start
+        due = int((now - start) * (self.tick_rate or 60)) + 1 - (self.input_seq - first_seq)
+        if due > MAX_INPUT_BURST:
+            self.input_start = (now, self.input_seq)
+            due = 1
+        return max(due, 0)
+
+    def _recv_exact(self, size):
+        data = bytearray()
+        while len(data) < size:
+            chunk = self.client.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("服务器关闭了连接")
+            data += chunk
+        return bytes(data)
 
     def receive(self):
+        try:
+            while True:
+                length, msg_type = unpack_header(self._recv_exact(FRAME.size))
+                payload = self._recv_exact(length)
+                self.bytes_received += FRAME.size + length
+                message = decode_message(msg_type, payload, self.decoder)
+                if message["type"] == "snapshot":
+                    self.send(MSG_ACK, ACK.pack(message["tick"]))
+                self.messages.put(message)
+        except (OSError, ProtocolError, ValueError, struct.error) as e:
+            self._disconnect(str(e))
+
+    def _disconnect(self, reason):
+        if self.connected:
+            self.connected = False
+            self.messages.put({"type": "disconnected", "reason": reason})
+
+    def poll(self):
+        """取走所有已收到的消息（不阻塞）"""
+        messages = []
         while True:
-            data = self.client.recv(1024)
-            print("Received:", data.decode())
+            try:
+                message = self.messages.get_nowait()
+            except queue.Empty:
+                return messages
+            if message["type"] == "welcome":
+                self.player_id = message["player_id"]
+                self.tick_rate = message["tick_rate"]
+                self.seed = message["seed"]
+            elif message["type"] == "config":
+                self.config = message["config"]
+            messages.append(message)
+
+    def close(self):
+        self.connected = False
+        try:
+            self.client.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.client.close()
+
+
+def run_simulated_client(host, port, seconds, seed=0, results=None, predict=False):
+    """模拟客户端：按 60 帧/秒随机改变按键并发送输入，统计收到的快照
+
+    predict 为 True 时像真正的客户端一样预测自己的飞机、插值绘制世界（不创建窗口），
+    统计预测校正量和插值缺快照的帧数。
+    """
+    rng = random.Random(seed)
+    stats = {"snapshots": 0, "bytes": 0, "player_id": None, "result": None, "ack": 0, "error": None,
+             "prediction": None, "starved": None}
+    try:
+        client = NetworkClient(host, port)
+    except OSError as e:
+        stats["error"] = str(e)
+        if results is not None:
+            results.append(stats)
+        return stats
+    remote = RemoteWorld()
+    predictor = None
+    mask = 0
+    frames = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline and client.connected:
+        for message in client.poll():
+            remote.apply(message)
+            if message["type"] == "snapshot":
+                stats["snapshots"] += 1
+                stats["ack"] = message["ack"]
+                stats["result"] = message["state"]["result"]
+                me = remote.player(client.player_id)
+                if predictor is not None and me is not None:
+                    predictor.reconcile(me, message["ack"])
+            elif message["type"] == "reject":
+                stats["error"] = message["reason"]
+        if predict and predictor is None and client.player_id and client.config is not None:
+            predictor = Predictor(client.config, client.player_id)
+        if client.player_id and stats["result"] is None and (not predict or predictor and predictor.synced):
+            if rng.random() < 0.1:
+                mask = ACTION_BITS["shoot"] | rng.choice([0, ACTION_BITS["left"], ACTION_BITS["right"],
+                                                          ACTION_BITS["up"], ACTION_BITS["down"]])
+            for _ in range(client.inputs_due()):
+                seq = client.send_input(mask)
+                if predictor is not None:
+                    predictor.apply_input(seq, mask)
+        if predict and remote.state is not None:
+            remote.interpolated()
+            frames += 1
+        if predictor is not None:
+            predictor.decay()
+        time.sleep(1 / 60)
+    stats["player_id"] = client.player_id
+    stats["bytes"] = client.bytes_received
+    if predict:
+        stats["prediction"] = predictor.stats() if predictor else None
+        stats["starved"] = (remote.starved, frames)
+    client.close()
+    if results is not None:
+        results.append(stats)
+    return stats
+
+
+def run_simulated_clients(host, port, count, seconds, predict=False):
+    """在各自的线程中运行 count 个模拟客户端，返回它们的统计"""
+    results = []
+    threads = [threading.Thread(target=run_simulated_client, args=(host, port, seconds, i, results, predict),
+                                daemon=True)
+               for i in range(count)]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.05)  # 按顺序入座
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def report(results, seconds):
+    for stats in sorted(results, key=lambda s: s["player_id"] or 0):
+        role = f"P{stats['player_id']}" if stats["player_id"] else "观战"
+        if stats["error"]:
+            print(f"{role}: {stats['error']}")
+            continue
+        print(f"{role}: 快照 {stats['snapshots']} 个（{stats['snapshots'] / seconds:.1f}/秒），"
+              f"接收 {stats['bytes'] / 1024:.1f} KB（{stats['bytes'] / seconds / 1024:.1f} KB/秒），"
+              f"已确认输入 {stats['ack']}，结局 {stats['result']}")
+        prediction = stats.get("prediction")
+        if prediction:
+            print(f"    预测: 对账 {prediction['reconciles']} 次，校正 {prediction['corrections']} 次"
+                  f"（平均 {prediction['mean_correction']:.1f} 像素，最大 {prediction['max_correction']:.1f} 像素），"
+                  f"未确认输入 {prediction['pending']} 个")
+        if stats.get("starved"):
+            starved, frames = stats["starved"]
+            print(f"    插值: {frames} 帧中 {starved} 帧没有更新的快照（{starved / max(frames, 1):.1%}）")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="连接联机服务器的模拟客户端")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--clients", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--predict", action="store_true", help="预测自己的飞机并统计校正量")
+    args = parser.parse_args()
+    report(run_simulated_clients(args.host, args.port, args.clients, args.seconds, args.predict), args.seconds)
+
+
+if __name__ == "__main__":
+    main()
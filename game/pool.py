@@ -0,0 +1,53 @@
+class ObjectPool:
+    """固定容量对象池：回收实体对象，避免频繁分配
+
+    factory 创建空对象，对象需实现 reset(*args) 方法以便重复使用。
+    池满时 acquire 返回 None，由调用方决定放弃本次生成。
+    """
+
+    def __init__(self, factory, capacity, name=""):
+        self.factory = factory
+        self.capacity = capacity
+        self.name = name or getattr(factory, "__name__", "pool")
+        self.free = []
+        self.in_use = 0
+        self.high_water = 0  # 同时使用的最大数量
+        self.created = 0  # 实际创建的对象数
+        self.rejected = 0  # 因池满而拒绝的次数
+
+    def acquire(self, *args, **kwargs):
+        """取出一个对象并用给定参数重置"""
+        if self.in_use >= self.capacity:
+            self.rejected += 1
+            return None
+        if self.free:
+            obj = self.free.pop()
+        else:
+            obj = self.factory()
+            self.created += 1
+        obj.reset(*args, **kwargs)
+        self.in_use += 1
+        if self.in_use > self.high_water:
+            self.high_water = self.in_use
+        return obj
+
+    def release(self, obj):
+        """归还对象"""
+        self.in_use -= 1
+        self.free.append(obj)
+
+    def release_all(self, objs):
+        """归还一组对象"""
+        self.in_use -= len(objs)
+        self.free.extend(objs)
+
+    def stats(self):
+        """返回占用统计"""
+        return {
+            "name": self.name,
+            "capacity": self.capacity,
+            "in_use": self.in_use,
+            "high_water": self.high_water,
+            "created": self.created,
+            "rejected": self.rejected,
+        }
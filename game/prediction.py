@@ -0,0 +1,92 @@
+"""客户端预测：本地立即按输入移动自己的飞机，收到快照后与服务器对账
+
+发送输入时用与服务器相同的 Player.move() 移动本地副本，画面不必等一个往返；
+快照带着服务器处理过的最后一个输入序号（ack）和飞机的位置、速度，对账时
+丢掉已处理的输入，从服务器状态出发重放其余输入。两边的移动代码和参数相同，
+正常情况下重放结果与预测一致；出现偏差（丢弃的输入、服务器补帧）时把差值
+记为视觉偏移，逐帧衰减，避免画面跳动。
+"""
+import collections
+
+from player import Player
+
+CORRECTION_DECAY = 0.85  # 每帧保留的视觉偏移比例
+SNAP_DISTANCE = 96  # 偏差超过此距离（像素）时直接跳到新位置
+MAX_PENDING = 120  # 最多保留的未确认输入（约 2 秒）
+
+
+class Predictor:
+    """预测并对账一名玩家的飞机；config 为服务器下发的本局配置"""
+
+    def __init__(self, config, player_id):
+        self.player = Player(config, player_id=player_id)
+        self.player_id = player_id
+        self.pending = collections.deque(maxlen=MAX_PENDING)  # (输入序号, 动作位掩码, 预测后的 x, y)
+        self.synced = False  # 收到第一份包含自己飞机的快照之后才开始预测
+        self.error_x = 0.0
+        self.error_y = 0.0
+        # 统计
+        self.reconciles = 0
+        self.corrections = 0
+        self.max_correction = 0.0
+        self.total_correction = 0.0
+
+    @property
+    def position(self):
+        """绘制位置：预测位置加上尚未衰减完的视觉偏移"""
+        return round(self.player.rect.x + self.error_x), round(self.player.rect.y + self.error_y)
+
+    def apply_input(self, seq, mask):
+        """发送输入的同时在本地执行它"""
+        if not self.synced:
+            return
+        self.player.move(mask)
+        self.pending.append((seq, mask, self.player.rect.x, self.player.rect.y))
+
+    def reconcile(self, state, ack):
+        """用快照中自己的飞机（to_view 的玩家字典）和输入确认号校正预测"""
+        player = self.player
+        before = self.position
+        predicted = None
+        while self.pending and self.pending[0][0] <= ack:
+            seq, _, x, y = self.pending.popleft()
+            if seq == ack:
+                predicted = (x, y)
+        player.rect.x, player.rect.y = state["x"], state["y"]
+        player.current_speed_x, player.current_speed_y = state["vx"], state["vy"]
+        for _, mask, _, _ in self.pending:
+            player.move(mask)
+        player.hitbox.center = player.rect.center
+        if not self.synced:
+            self.synced = True
+            return
+        self.reconciles += 1
+        if predicted is not None:
+            error = ((state["x"] - predicted[0]) ** 2 + (state["y"] - predicted[1]) ** 2) ** 0.5
+            if error:
+                self.corrections += 1
+                self.total_correction += error
+                self.max_correction = max(self.max_correction, error)
+        # 画面保持在原位置，偏差由 decay() 逐帧消除
+        self.error_x = before[0] - player.rect.x
+        self.error_y = before[1] - player.rect.y
+        if abs(self.error_x) > SNAP_DISTANCE or abs(self.error_y) > SNAP_DISTANCE:
+            self.error_x = self.error_y = 0.0
+
+    def decay(self):
+        """每帧调用一次，让视觉偏移向 0 收敛"""
+        self.error_x *= CORRECTION_DECAY
+        self.error_y *= CORRECTION_DECAY
+        if abs(self.error_x) < 0.5:
+            self.error_x = 0.0
+        if abs(self.error_y) < 0.5:
+            self.error_y = 0.0
+
+    def stats(self):
+        return {
+            "reconciles": self.reconciles,
+            "corrections": self.corrections,
+            "max_correction": self.max_correction,
+            "mean_correction": self.total_correction / max(self.corrections, 1),
+            "pending": len(self.pending),
+        }
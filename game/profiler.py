@@ -0,0 +1,126 @@
+import csv
+import json
+import time
+from collections import deque
+
+import numpy as np
+import pygame
+
+# 主循环各阶段（按执行顺序）
+PHASES = ("config", "events", "background", "players", "enemies", "draw", "hud", "overlay", "flip", "tick")
+
+FRAME_BUDGET_MS = 1000 / 60
+
+
+class FrameProfiler:
+    """主循环逐帧分阶段计时，支持叠加显示和导出 CSV/JSON
+
+    每帧调用 begin_frame()，每个阶段结束时调用 mark(阶段名)，
+    最后调用 end_frame()。同一阶段在一帧内多次出现时累加。
+    """
+
+    def __init__(self, history=600, refresh_interval=15):
+        self.history = history
+        self.refresh_interval = refresh_interval  # 叠加层文字每隔多少帧重新渲染
+        self.frames = deque(maxlen=history)  # 每帧一行：{阶段: 毫秒, "frame": 总耗时}
+        self.visible = False
+        self.current = None
+        self._frame_start = 0.0
+        self._last_mark = 0.0
+        self._font = None
+        self._text = None
+        self._frames_since_refresh = 0
+
+    def toggle(self):
+        self.visible = not self.visible
+        self._text = None
+
+    def begin_frame(self):
+        now = time.perf_counter()
+        self._frame_start = now
+        self._last_mark = now
+        self.current = dict.fromkeys(PHASES, 0.0)
+
+    def mark(self, phase):
+        """记录从上一次标记到现在的耗时，计入 phase"""
+        now = time.perf_counter()
+        self.current[phase] += (now - self._last_mark) * 1000
+        self._last_mark = now
+
+    def end_frame(self):
+        now = time.perf_counter()
+        self.current["frame"] = (now - self._frame_start) * 1000
+        self.frames.append(self.current)
+
+    def stats(self):
+        """返回各阶段在历史窗口内的平均值和 p99（毫秒）"""
+        if not self.frames:
+            return {}
+        result = {}
+        for phase in PHASES + ("frame",):
+            values = np.fromiter((frame[phase] for frame in self.frames), dtype=np.float64, count=len(self.frames))
+            result[phase] = {
+                "avg": float(values.mean()),
+                "p99": float(np.percentile(values, 99)),
+                "max": float(values.max()),
+            }
+        return result
+
+    def draw(self, screen):
+        """绘制叠加层：各阶段平均值/p99 以及帧耗时曲线，返回绘制区域"""
+        if not self.visible or not self.frames:
+            return None
+        if self._font is None:
+            self._font = pygame.font.Font(None, 18)
+        self._frames_since_refresh += 1
+        if self._text is None or self._frames_since_refresh >= self.refresh_interval:
+            self._frames_since_refresh = 0
+            self._text = self._render_text()
+
+        width, height = 260, self._text.get_height() + 70
+        panel = pygame.Rect(screen.get_width() - width - 10, screen.get_height() - height - 10, width, height)
+        overlay = pygame.Surface(panel.size, pygame.SRCALPHA)
+        overlay.fill((0, 0, 0, 170))
+        screen.blit(overlay, panel)
+        screen.blit(self._text, (panel.x + 6, panel.y + 6))
+
+        # 帧耗时曲线，虚线为 16.6 ms 预算
+        graph = pygame.Rect(panel.x + 6, panel.bottom - 60, width - 12, 54)
+        scale = graph.height / (FRAME_BUDGET_MS * 2)
+        budget_y = graph.bottom - int(FRAME_BUDGET_MS * scale)
+        for x in range(graph.left, graph.right, 6):
+            pygame.draw.line(screen, (255, 80, 80), (x, budget_y), (x + 3, budget_y))
+        frames = list(self.frames)[-graph.width:]
+        points = [(graph.left + i, graph.bottom - min(graph.height, int(frame["frame"] * scale)))
+                  for i, frame in enumerate(frames)]
+        if len(points) > 1:
+            pygame.draw.lines(screen, (120, 255, 120), False, points)
+        return panel
+
+    def _render_text(self):
+        stats = self.stats()
+        lines = [f"{'phase':<11}{'avg':>7}{'p99':>8}  ms"]
+        for phase in PHASES + ("frame",):
+            lines.append(f"{phase:<11}{stats[phase]['avg']:>7.2f}{stats[phase]['p99']:>8.2f}")
+        surfaces = [self._font.render(line, True, (255, 255, 255)) for line in lines]
+        text = pygame.Surface((max(s.get_width() for s in surfaces), sum(s.get_height() for s in surfaces)),
+                              pygame.SRCALPHA)
+        y = 0
+        for surface in surfaces:
+            text.blit(surface, (0, y))
+            y += surface.get_height()
+        return text
+
+    def dump(self, path):
+        """导出历史窗口内的逐帧数据，扩展名为 .json 时写 JSON，否则写 CSV"""
+        columns = PHASES + ("frame",)
+        if path.endswith(".json"):
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"phases": columns, "summary": self.stats(), "frames": list(self.frames)}, f, indent=2)
+        else:
+            with open(path, "w", encoding="utf-8", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=columns)
+                writer.writeheader()
+                for frame in self.frames:
+                    writer.writerow({key: f"{frame[key]:.4f}" for key in columns})
+        print(f"帧耗时数据已导出: {path}")
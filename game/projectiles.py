@@ -0,0 +1,188 @@
+import numpy as np
+import pygame
+
+# 子弹类型：尺寸和颜色
+PLAYER_BULLET = 0
+ENEMY_BULLET = 1
+BULLET_KINDS = {
+    PLAYER_BULLET: ((5, 15), (255, 255, 0)),  # 黄色
+    ENEMY_BULLET: ((5, 15), (255, 0, 0)),     # 红色
+}
+
+_images = {}
+
+
+def bullet_image(kind):
+    """返回某种子弹共享的预填充图像"""
+    image = _images.get(kind)
+    if image is None:
+        size, color = BULLET_KINDS[kind]
+        image = pygame.Surface(size)
+        image.fill(color)
+        _images[kind] = image
+    return image
+
+
+class ProjectileField:
+    """结构化数组形式的子弹存储
+
+    位置、速度、所属者和类型分别保存在 NumPy 数组中，存活的子弹紧密排列在
+    [0, count) 区间，移动、出屏剔除和碰撞检测都以整批数组运算完成。
+    数组保持发射顺序，碰撞时优先命中更早发射的子弹。
+    每颗子弹有一个稳定的编号（16 位循环递增），供网络快照识别同一颗子弹。
+    """
+
+    def __init__(self, capacity, screen_width=800, screen_height=600):
+        self.capacity = capacity
+        self.screen_width = screen_width
+        self.screen_height = screen_height
+        self.count = 0
+        self.high_water = 0
+        self.rejected = 0
+        # 以左上角坐标保存位置，与 pygame.Rect 保持一致
+        self.x = np.zeros(capacity, dtype=np.float32)
+        self.y = np.zeros(capacity, dtype=np.float32)
+        self.vx = np.zeros(capacity, dtype=np.float32)
+        self.vy = np.zeros(capacity, dtype=np.float32)
+        self.w = np.zeros(capacity, dtype=np.float32)
+        self.h = np.zeros(capacity, dtype=np.float32)
+        self.owner = np.zeros(capacity, dtype=np.int32)
+        self.kind = np.zeros(capacity, dtype=np.int8)
+        self.ids = np.zeros(capacity, dtype=np.uint16)
+        self.next_id = 0
+        self._arrays = (self.x, self.y, self.vx, self.vy, self.w, self.h, self.owner, self.kind, self.ids)
+
+    def __len__(self):
+        return self.count
+
+    def spawn(self, x, y, vx, vy, owner, kind):
+        """在 (x, y) 中心位置发射一颗子弹，容量已满时返回 False"""
+        i = self.count
+        if i >= self.capacity:
+            self.rejected += 1
+            return False
+        (w, h), _ = BULLET_KINDS[kind]
+        self.x[i] = x - w // 2
+        self.y[i] = y - h // 2
+        self.vx[i] = vx
+        self.vy[i] = vy
+        self.w[i] = w
+        self.h[i] = h
+        self.owner[i] = owner
+        self.kind[i] = kind
+        self.ids[i] = self.next_id
+        self.next_id = (self.next_id + 1) & 0xFFFF
+        self.count = i + 1
+        if self.count > self.high_water:
+            self.high_water = self.count
+        return True
+
+    def count_owner(self, owner):
+        """返回某个所属者当前存活的子弹数"""
+        return int(np.count_nonzero(self.owner[:self.count] == owner))
+
+    def step(self):
+        """移动所有子弹并剔除完全离开屏幕的子弹"""
+        n = self.count
+        if n == 0:
+            return
+        x = self.x[:n]
+        y = self.y[:n]
+        x += self.vx[:n]
+        y += self.vy[:n]
+        keep = ((y <= self.screen_height) & (y + self.h[:n] >= 0) &
+                (x <= self.screen_width) & (x + self.w[:n] >= 0))
+        self._compact(keep)
+
+    def overlaps(self, rects):
+        """返回 (矩形数, 子弹数) 的布尔矩阵，表示每个矩形与每颗子弹是否相交"""
+        n = self.count
+        bounds = np.array([(r.left, r.top, r.right, r.bottom) for r in rects],
+                          dtype=np.float32).reshape(-1, 4)
+        x = self.x[:n]
+        y = self.y[:n]
+        return ((x < bounds[:, 2:3]) & (x + self.w[:n] > bounds[:, 0:1]) &
+                (y < bounds[:, 3:4]) & (y + self.h[:n] > bounds[:, 1:2]))
+
+    def first_hits(self, rects):
+        """按矩形顺序为每个矩形分配第一颗与之相交、且未被前面矩形占用的子弹
+
+        返回与 rects 等长的列表，元素为子弹下标，未命中为 -1。
+        """
+        hits = [-1] * len(rects)
+        if self.count == 0 or not rects:
+            return hits
+        overlap = self.overlaps(rects)
+        spent = np.zeros(self.count, dtype=bool)
+        for i in np.flatnonzero(overlap.any(axis=1)):
+            candidates = np.flatnonzero(overlap[i] & ~spent)
+            if candidates.size:
+                j = candidates[0]
+                spent[j] = True
+                hits[i] = int(j)
+        return hits
+
+    def hits_by_owner(self, rect):
+        """返回与 rect 相交的子弹中，每个所属者最早发射的那一颗 {所属者: 下标}"""
+        if self.count == 0:
+            return {}
+        hit = np.flatnonzero(self.overlaps([rect])[0])
+        if hit.size == 0:
+            return {}
+        owners, first = np.unique(self.owner[hit], return_index=True)
+        return dict(zip(owners.tolist(), hit[first].tolist()))
+
+    def remove(self, indices):
+        """移除指定下标的子弹"""
+        if len(indices) == 0:
+            return
+        keep = np.ones(self.count, dtype=bool)
+        keep[np.asarray(indices, dtype=np.intp)] = False
+        self._compact(keep)
+
+    def remove_owner(self, owner):
+        """移除某个所属者的全部子弹"""
+        if self.count:
+            self._compact(self.owner[:self.count] != owner)
+
+    def clear(self):
+        self.count = 0
+
+    def _compact(self, keep):
+        n = self.count
+        k = int(np.count_nonzero(keep))
+        if k == n:
+            return
+        for array in self._arrays:
+            array[:k] = array[:n][keep]
+        self.count = k
+
+    def draw(self, screen):
+        """批量绘制所有子弹"""
+        n = self.count
+        if n == 0:
+            return
+        xs = self.x[:n].astype(np.int32).tolist()
+        ys = self.y[:n].astype(np.int32).tolist()
+        kinds = self.kind[:n].tolist()
+        screen.blits([(bullet_image(kind), (x, y)) for x, y, kind in zip(xs, ys, kinds)], doreturn=False)
+
+    def rect(self, i):
+        """返回第 i 颗子弹的矩形"""
+        return pygame.Rect(int(self.x[i]), int(self.y[i]), int(self.w[i]), int(self.h[i]))
+
+    def rects(self):
+        """返回所有子弹的矩形（供脏矩形渲染使用）"""
+        n = self.count
+        return [pygame.Rect(x, y, w, h) for x, y, w, h in zip(
+            self.x[:n].astype(np.int32).tolist(), self.y[:n].astype(np.int32).tolist(),
+            self.w[:n].astype(np.int32).tolist(), self.h[:n].astype(np.int32).tolist())]
+
+    def stats(self):
+        """返回占用统计"""
+        return {
+            "capacity": self.capacity,
+            "in_use": self.count,
+            "high_water": self.high_water,
+            "rejected": self.rejected,
+        }
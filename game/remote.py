@@ -0,0 +1,181 @@
+"""联机客户端的世界：缓存服务器快照，按略早于服务器的时间插值绘制
+
+快照每两帧左右到达一次，到达时间还受网络抖动影响，直接绘制最新快照会让
+其他飞机、敌机和子弹一顿一顿地跳。客户端估计服务器当前的帧号，绘制
+interpolation_delay 之前的时刻，在前后两份快照之间按编号线性插值；只要延迟
+大于快照间隔加上抖动，总能找到前后两份快照。自己的飞机不插值，按 Predictor
+的预测位置绘制。
+"""
+import collections
+import time
+
+import pygame
+from assets import asset_cache
+from effects import SHIELD_PULSE, INVINCIBLE_PULSE, shield_frames, fade_frames
+from enemy import ENEMY_SIZES, ENEMY_COLORS, draw_boss_health
+from item import Item
+from projectiles import bullet_image
+
+
+INTERPOLATION_DELAY = 0.1  # 秒
+BUFFER_SIZE = 32  # 保留的快照数
+CLOCK_DRIFT = 0.02  # 每份快照允许帧号偏移估计回落的量（帧），适应网络变慢
+
+
+def _lerp(a, b, t):
+    return a + (b - a) * t
+
+
+def _lerp_keyed(old, new, t, key, fields=("x", "y")):
+    """按编号在两组实体之间插值；只在新快照中出现的实体还没到出现时刻，跳过"""
+    previous = {key(entity): entity for entity in old}
+    result = []
+    for entity in new:
+        before = previous.get(key(entity))
+        if before is None:
+            continue
+        entity = dict(entity)
+        for field in fields:
+            entity[field] = round(_lerp(before[field], entity[field], t))
+        result.append(entity)
+    return result
+
+
+class RemoteWorld:
+    """联机客户端的世界：保存服务器发来的快照并插值绘制"""
+
+    def __init__(self, interpolation_delay=INTERPOLATION_DELAY, tick_rate=60):
+        self.state = None  # 最新快照
+        self.tick = 0
+        self.ack = 0
+        self.snapshots = 0
+        self.frame = 0  # 本地帧计数，用于护盾和无敌闪烁
+        self.interpolation_delay = interpolation_delay
+        self.tick_rate = tick_rate
+        self.buffer = collections.deque(maxlen=BUFFER_SIZE)  # (帧号, 快照)
+        self.offset = None  # 服务器帧号 - 本地时间 * 帧率 的估计
+        self.starved = 0  # 没有更新的快照可供插值、只能停在最新快照的帧数
+        self._sprites = {}
+
+    @property
+    def result(self):
+        return self.state["result"] if self.state else None
+
+    def apply(self, message, now=None):
+        """处理一条服务器消息；过期（帧号更早）的快照被忽略"""
+        if message["type"] == "welcome":
+            self.tick_rate = message["tick_rate"]
+        elif message["type"] == "snapshot" and message["tick"] >= self.tick:
+            self.state = message["state"]
+            self.tick = message["tick"]
+            self.ack = message["ack"]
+            self.snapshots += 1
+            self.buffer.append((self.tick, self.state))
+            # 延迟最小的快照最接近服务器的真实时间，取最大值；缓慢回落以跟上网络变慢
+            sample = self.tick - self.local_ticks(now)
+            self.offset = sample if self.offset is None else max(sample, self.offset - CLOCK_DRIFT)
+
+    def local_ticks(self, now=None):
+        return (time.perf_counter() if now is None else now) * self.tick_rate
+
+    def render_tick(self, now=None):
+        """当前应绘制的服务器帧号（可以是小数）"""
+        if self.offset is None:
+            return self.tick
+        return self.local_ticks(now) + self.offset - self.interpolation_delay * self.tick_rate
+
+    def interpolated(self, now=None):
+        """返回插值到 render_tick() 的快照；没有快照时返回 None"""
+        if not self.buffer:
+            return None
+        target = self.render_tick(now)
+        newest_tick, newest = self.buffer[-1]
+        if target >= newest_tick:
+            if target > newest_tick:
+                self.starved += 1
+            return newest
+        older = None
+        for tick, state in self.buffer:
+            if tick > target:
+                if older is None:
+                    return state
+                old_tick, old = older
+                return self.blend(old, state, (target - old_tick) / (tick - old_tick))
+            older = (tick, state)
+        return newest
+
+    def player(self, player_id):
+        if self.state:
+            for player in self.state["players"]:
+                if player["id"] == player_id:
+                    return player
+        return None
+
+    def sprite(self, name, size, color):
+        """返回共享的精灵图像，加载失败时用纯色方块代替"""
+        key = (name, size)
+        image = self._sprites.get(key)
+        if image is None:
+            try:
+                image = asset_cache.sprite(name, size)
+            except (pygame.error, FileNotFoundError) as e:
+                print(f"Error loading image ({name}): {e}")
+                image = pygame.Surface(size)
+                image.fill(color)
+            self._sprites[key] = image
+        return image
+
+    @staticmethod
+    def blend(old, new, t):
+        """在两份快照之间插值位置，其余字段取较新的快照"""
+        bullets = {(group, key): (x, y) for x, y, _, group, key in old["bullets"]}
+        blended = []
+        for x, y, kind, group, key in new["bullets"]:
+            before = bullets.get((group, key))
+            if before is not None:
+                blended.append([round(_lerp(before[0], x, t)), round(_lerp(before[1], y, t)), kind, group, key])
+        return dict(new,
+                    players=_lerp_keyed(old["players"], new["players"], t, lambda player: player["id"]),
+                    enemies=_lerp_keyed(old["enemies"], new["enemies"], t, lambda enemy: enemy["id"]),
+                    items=_lerp_keyed(old["items"], new["items"], t, lambda item: item["id"]),
+                    bullets=blended)
+
+    def draw(self, screen, own=None, now=None):
+        """绘制插值后的世界，返回是否有可绘制的快照
+
+        own 为 (玩家编号, x, y)：自己的飞机按预测位置绘制。
+        """
+        self.frame += 1
+        state = self.interpolated(now)
+        if state is None:
+            return False
+        latest = {player["id"]: player for player in self.state["players"]}
+        blits = []
+        for player in state["players"]:
+            if own and player["id"] == own[0]:
+                player = dict(latest.get(player["id"], player), x=own[1], y=own[2])
+            if player["lives"] <= 0:
+                continue
+            image = self.sprite(f"player{player['id']}", (64, 64), (0, 255, 0))
+            rect = image.get_rect(topleft=(player["x"], player["y"]))
+            if player["shield"]:
+                shield = shield_frames()[SHIELD_PULSE[self.frame % len(SHIELD_PULSE)]]
+                blits.append((shield, shield.get_rect(center=rect.center)))
+            if player.get("invincible"):
+                image = fade_frames(image)[INVINCIBLE_PULSE[self.frame % len(INVINCIBLE_PULSE)]]
+            blits.append((image, rect))
+        for enemy in state["enemies"]:
+            size = ENEMY_SIZES.get(enemy["type"], ENEMY_SIZES["enemy_normal"])
+            color = ENEMY_COLORS.get(enemy["type"], ENEMY_COLORS["enemy_normal"])
+            blits.append((self.sprite(enemy["type"], size, color), (enemy["x"], enemy["y"])))
+        for item in state["items"]:
+            blits.append((self.sprite(f"item_{item['type']}", (32, 32), Item.colors[item["type"]]),
+                          (item["x"], item["y"])))
+        blits.extend((bullet_image(bullet[2]), (bullet[0], bullet[1])) for bullet in state["bullets"])
+        screen.blits(blits, doreturn=False)
+        boss = self.state["boss"]
+        if boss:
+            max_health = next((enemy["max_health"] for enemy in self.state["enemies"]
+                               if enemy["type"] == "enemy_boss"), boss["health"])
+            draw_boss_health(screen, boss["health"], max(max_health, 1), boss["phase"])
+        return True
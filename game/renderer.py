@@ -0,0 +1,53 @@
+import pygame
+
+
+class Renderer:
+    """负责把每帧画面提交到显示器
+
+    默认每帧 pygame.display.flip()。开启脏矩形模式后，只提交本帧和上一帧
+    标记过的区域（pygame.display.update(rects)），背景滚动、画面切换或
+    脏区域过大时退回整屏 flip。
+    """
+
+    def __init__(self, screen, dirty_rects=False, max_dirty_ratio=0.4):
+        self.screen = screen
+        self.dirty_rects = dirty_rects
+        self.max_dirty_ratio = max_dirty_ratio  # 脏区域超过屏幕面积的该比例时整屏刷新
+        self.previous = []
+        self.current = []
+        self.full = True
+        self.full_frames = 0
+        self.partial_frames = 0
+
+    def mark(self, rect):
+        """标记本帧绘制过的区域"""
+        if rect:
+            self.current.append(pygame.Rect(rect))
+
+    def mark_all(self, rects):
+        for rect in rects:
+            self.mark(rect)
+
+    def invalidate(self):
+        """要求本帧整屏刷新（背景滚动、界面切换等）"""
+        self.full = True
+
+    def present(self):
+        if not self.dirty_rects or self.full:
+            pygame.display.flip()
+            self.full_frames += 1
+        else:
+            rects = self.previous + self.current
+            area = sum(rect.width * rect.height for rect in rects)
+            screen_area = self.screen.get_width() * self.screen.get_height()
+            if area > screen_area * self.max_dirty_ratio:
+                pygame.display.flip()
+                self.full_frames += 1
+            else:
+                if rects:
+                    pygame.display.update(rects)
+                self.partial_frames += 1
+        # 上一帧的区域在下一帧需要擦除，因此一起提交
+        self.previous = self.current
+        self.current = []
+        self.full = False
@@ -0,0 +1,347 @@
+"""输入回放：只记录随机种子和每帧每名玩家的动作位掩码
+
+游戏逻辑由固定步长的 TickClock 驱动，种子、配置和输入相同时结果完全一致，
+因此一局游戏只需保存这些数据就能原样重现，可用于复现问题报告、定位性能尖峰
+以及积累回归用例，不必录制视频。
+
+文件格式（小端）：
+    4 字节魔数 b"GRPL" | uint16 版本 | uint32 种子 | uint8 玩家数 | uint32 帧数 | uint32 信息长度 |
+    zlib 压缩的（UTF-8 JSON 信息 + 输入 + 状态哈希）
+输入按帧排列，每帧每名玩家 1 字节动作位掩码；按键状态大多连续多帧不变，压缩后
+平均每帧远不到 1 字节。信息中保存开局配置、局中的配置变化和结局，回放结束后
+用结局校验是否同步。版本 2 起每帧另存 16 位世界状态哈希（见 statehash.py），
+回放时逐帧比较，能指出从哪一帧开始不同步；版本 1 的文件没有哈希，只校验结局。
+
+    python replay.py info replays/xxx.rpl               # 查看回放信息
+    python replay.py play replays/xxx.rpl               # 按正常速度回放并显示画面
+    python replay.py play --headless replays/xxx.rpl    # 无窗口全速回放
+    python replay.py check replays/*.rpl                # 回归：逐个全速回放并核对结局
+    python replay.py selftest                           # 用非默认配置录制一局，全速和带画面各回放一遍
+"""
+import argparse
+import json
+import os
+import random
+import struct
+import sys
+import time
+import zlib
+
+import pygame
+
+from config import BUNDLED_CONFIG_PATH, freeze_config, merge_defaults, thaw_config
+from controls import to_mask
+from resources import user_path
+from statehash import HASH_MASK
+
+MAGIC = b"GRPL"
+VERSION = 2
+HEADER = struct.Struct("<4sHIBII")
+HASH = struct.Struct("<H")
+REPLAY_DIR = user_path("replays")
+
+
+def new_seed():
+    """为新的一局生成随机种子"""
+    return random.SystemRandom().randrange(1 << 32)
+
+
+def replay_path():
+    """按当前时间生成回放文件路径"""
+    return os.path.join(REPLAY_DIR, time.strftime("%Y%m%d-%H%M%S") + ".rpl")
+
+
+def summarize(players, result, tick):
+    """回放结束时用于校验的结局摘要"""
+    return {
+        "tick": tick,
+        "result": result,
+        "players": [[player.score, player.lives] for player in players],
+    }
+
+
+class Replay:
+    """一局游戏的回放数据：种子、开局配置和逐帧输入"""
+
+    def __init__(self, seed, config, players=1, inputs=b"", meta=None, hashes=None):
+        self.seed = seed
+        self.config = freeze_config(config)
+        self.players = players
+        self.inputs = bytearray(inputs)
+        self.hashes = list(hashes or [])  # 每帧推进之后的 16 位世界哈希，可以为空
+        # boss：开局直接生成 Boss；config_changes：[[帧号, 配置], ...]；final：结局摘要
+        self.meta = meta or {}
+
+    @property
+    def ticks(self):
+        return len(self.inputs) // self.players
+
+    def masks(self, tick):
+        """返回某一帧各玩家的动作位掩码"""
+        start = tick * self.players
+        return list(self.inputs[start:start + self.players])
+
+    def __iter__(self):
+        for tick in range(self.ticks):
+            yield self.masks(tick)
+
+    def config_changes(self):
+        """返回 {帧号: 配置快照}，在该帧推进之前生效"""
+        return {tick: freeze_config(config) for tick, config in self.meta.get("config_changes", ())}
+
+    def to_bytes(self):
+        meta = dict(self.meta, config=thaw_config(self.config))
+        meta = json.dumps(meta, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        header = HEADER.pack(MAGIC, VERSION, self.seed, self.players, self.ticks, len(meta))
+        hashes = struct.pack(f"<{len(self.hashes)}H", *self.hashes)
+        return header + zlib.compress(meta + bytes(self.inputs) + hashes, 9)
+
+    @classmethod
+    def from_bytes(cls, data):
+        magic, version, seed, players, ticks, meta_length = HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version not in (1, VERSION):
+            raise ValueError(f"不支持的回放格式: {magic!r} v{version}")
+        payload = zlib.decompress(data[HEADER.size:])
+        meta = json.loads(payload[:meta_length])
+        end = meta_length + ticks * players
+        inputs = payload[meta_length:end]
+        hashes = payload[end:]
+        if len(inputs) != ticks * players or len(hashes) not in (0, ticks * HASH.size):
+            raise ValueError(f"回放数据不完整: {len(payload) - meta_length} 字节，应为 {ticks * players} 字节"
+                             f"（另有哈希时为 {ticks * (players + HASH.size)} 字节）")
+        config = meta.pop("config")
+        return cls(seed, config, players, inputs, meta, struct.unpack(f"<{ticks}H", hashes) if hashes else None)
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+
+class ReplayRecorder:
+    """录制一局游戏：开局时创建，每帧推进之前调用 record()
+
+    局中的配置变化（热重载）同样会影响游戏逻辑；录制交互游戏时传入 store=config_store，
+    订阅配置并记下生效的帧号。
+    """
+
+    def __init__(self, seed, config, players=1, store=None, **meta):
+        self.replay = Replay(seed, config, players, meta=meta)
+        self.saved = None
+        if store is not None:
+            store.subscribe(self.apply_config)
+
+    @property
+    def ticks(self):
+        return self.replay.ticks
+
+    def apply_config(self, config):
+        changes = self.replay.meta.setdefault("config_changes", [])
+        changes.append([self.ticks, thaw_config(config)])
+
+    def record(self, inputs):
+        """记录一帧：inputs 为每名玩家的动作位掩码（或动作名称集合）"""
+        for i in range(self.replay.players):
+            self.replay.inputs.append(to_mask(inputs[i]) if i < len(inputs) else 0)
+
+    def record_hash(self, value):
+        """记录这一帧推进之后的世界哈希（statehash.world_hash）"""
+        self.replay.hashes.append(value & HASH_MASK)
+
+    def finish(self, players, result=None):
+        """记下结局摘要，回放时据此校验"""
+        self.replay.meta["final"] = summarize(players, result, self.ticks)
+
+    def save(self, path=None):
+        """写入回放文件并返回路径；没有录到任何帧或已经保存过时返回 None"""
+        if self.saved or not self.ticks:
+            return None
+        self.saved = self.replay.save(path or replay_path())
+        return self.saved
+
+
+def _start(replay):
+    """按回放的种子和开局配置创建一局游戏"""
+    # headless 模块导入时会设置 dummy 视频驱动，带画面回放必须在创建窗口之后才导入
+    from headless import HeadlessGame
+    game = HeadlessGame(config=replay.config, seed=replay.seed, two_player=replay.players == 2)
+    if replay.meta.get("boss"):
+        game.enemies.spawn_boss()
+    return game
+
+
+def _step(game, replay, tick, changes):
+    """推进一帧；有哈希时逐帧比较，返回不同步的说明（一致时为 None）"""
+    config = changes.get(tick)
+    if config is not None:
+        for target in game.players + [game.enemies]:
+            target.apply_config(config)
+    game.step(replay.masks(tick))
+    if tick < len(replay.hashes) and game.hash() & HASH_MASK != replay.hashes[tick]:
+        return f"第 {tick + 1} 帧起不同步（世界哈希 {game.hash() & HASH_MASK:04x}，录制时 {replay.hashes[tick]:04x}）"
+    return None
+
+
+def _verify(game, replay):
+    """比较回放结果与录制时的结局，返回不一致的说明（一致时为 None）"""
+    expected = replay.meta.get("final")
+    if expected is None:
+        return None
+    actual = summarize(game.players, game.result, game.tick)
+    if actual != expected:
+        return f"回放不同步: 录制时 {expected}，回放得到 {actual}"
+    return None
+
+
+def simulate(replay):
+    """无窗口全速回放，返回 (最终状态, 不一致说明)"""
+    game = _start(replay)
+    changes = replay.config_changes()
+    for tick in range(replay.ticks):
+        mismatch = _step(game, replay, tick, changes)
+        if mismatch:
+            return game.state(), mismatch
+        if game.result:
+            break
+    return game.state(), _verify(game, replay)
+
+
+def play(replay, speed=1.0):
+    """带画面按正常速度（乘以 speed）回放；ESC 或关闭窗口结束，空格暂停"""
+    config = replay.config
+    pygame.init()
+    screen = pygame.display.set_mode((config["screen_width"], config["screen_height"]))
+    pygame.display.set_caption("打飞机大战 - 回放")
+    from background import Background
+    from text_cache import text_cache
+    game = _start(replay)
+    background = Background(config["screen_width"], config["screen_height"])
+    font = pygame.font.SysFont(config["font"], 24)
+    changes = replay.config_changes()
+    clock = pygame.time.Clock()
+    tick = 0
+    desync = None
+    paused = False
+    running = True
+    while running and tick < replay.ticks and not game.result:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                running = False
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
+                paused = not paused
+        if not paused:
+            desync = desync or _step(game, replay, tick, changes)
+            background.update()
+            tick += 1
+        background.draw(screen)
+        for player in game.players:
+            player.draw(screen)
+        game.enemies.draw(screen)
+        scores = "  ".join(f"P{player.player_id}: {player.score}/{player.lives}" for player in game.players)
+        status = text_cache.render(font, f"回放 {tick}/{replay.ticks}  {scores}", (255, 255, 255))
+        screen.blit(status, (10, 10))
+        pygame.display.flip()
+        clock.tick(60 * speed)
+    mismatch = desync or (_verify(game, replay) if game.result or tick == replay.ticks else None)
+    pygame.quit()
+    return game.state(), mismatch
+
+
+def selftest(seed=5, ticks=1500):
+    """用非默认配置（局中还有一次配置变化）录制一局，再用 simulate() 和 play() 各回放一遍
+
+    play() 会初始化混音器，音效库第一次播放时会加载全局 config_store；回放的世界只应
+    使用录制的配置和配置变化，不受配置文件影响。返回不一致的说明列表。
+    """
+    from headless import HeadlessGame, autopilot
+    # 直接读取随游戏分发的配置，不经过 config_store，让回放时的 play() 第一次加载它
+    with open(BUNDLED_CONFIG_PATH, "r", encoding="utf-8") as f:
+        config = merge_defaults(json.load(f))
+    config["player"]["max_speed"] = 3
+    config["player"]["acceleration"] = 0.1
+    game = HeadlessGame(config, seed)
+    game.recorder = ReplayRecorder(seed, game.config, len(game.players))
+    game.run(ticks // 2, autopilot)
+    config["player"]["max_speed"] = 4
+    game.recorder.apply_config(config)
+    for target in game.players + [game.enemies]:
+        target.apply_config(freeze_config(config))
+    game.run(ticks - game.tick, autopilot)
+    game.recorder.finish(game.players, game.result)
+    replay = Replay.from_bytes(game.recorder.replay.to_bytes())
+    failures = []
+    for mode, run in (("simulate", simulate), ("play", lambda replay: play(replay, speed=1000))):
+        state, mismatch = run(replay)
+        if mismatch:
+            failures.append(f"{mode}: {mismatch}")
+        elif state["tick"] != game.tick:
+            failures.append(f"{mode}: 只回放到第 {state['tick']} 帧，录制了 {game.tick} 帧")
+    return failures
+
+
+def describe(path, replay):
+    size = os.path.getsize(path)
+    final = replay.meta.get("final") or {}
+    print(f"{path}: 种子 {replay.seed}，{replay.players} 名玩家，{replay.ticks} 帧"
+          f"（{replay.ticks / 60:.1f} 秒），{size} 字节（每帧 {size / max(replay.ticks, 1):.2f} 字节），"
+          f"结局 {final.get('result')}，{'有' if replay.hashes else '没有'}逐帧哈希")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="输入回放")
+    parser.add_argument("command", choices=["info", "play", "check", "selftest"])
+    parser.add_argument("paths", nargs="*")
+    parser.add_argument("--headless", action="store_true", help="无窗口全速回放")
+    parser.add_argument("--speed", type=float, default=1.0, help="带画面回放的速度倍数")
+    args = parser.parse_args()
+    if args.command in ("check", "selftest") or args.headless:
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    if args.command == "selftest":
+        failures = selftest()
+        for failure in failures:
+            print(failure)
+        if not failures:
+            print("非默认配置的回放在全速和带画面模式下都与录制一致")
+        sys.exit(1 if failures else 0)
+    if not args.paths:
+        parser.error("需要至少一个回放文件")
+
+    failures = 0
+    for path in args.paths:
+        try:
+            replay = Replay.load(path)
+        except (OSError, ValueError, struct.error, zlib.error) as e:
+            print(f"无法读取回放 {path}: {e}")
+            failures += 1
+            continue
+        if args.command == "info":
+            describe(path, replay)
+            continue
+        start = time.perf_counter()
+        if args.command == "play" and not args.headless:
+            state, mismatch = play(replay, args.speed)
+        else:
+            state, mismatch = simulate(replay)
+        elapsed = time.perf_counter() - start
+        if mismatch:
+            verdict = f"，{mismatch}"
+        elif state["result"] or state["tick"] == replay.ticks:
+            verdict = "，与录制一致"
+        else:
+            verdict = "，中途退出"
+        print(f"{path}: {state['result']}，{state['tick']} 帧，耗时 {elapsed:.3f} 秒"
+              f"（{state['tick'] / max(elapsed, 1e-9):.0f} 帧/秒）{verdict}")
+        if mismatch:
+            failures += 1
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+import os
+import sys
+
+# 只读资源的根目录：PyInstaller 打包后为解压目录，否则为项目根目录（game 的上一级），
+# 与启动时的工作目录无关
+BASE_DIR = getattr(sys, "_MEIPASS", None) or os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 可写文件（配置等）的根目录：打包后放在可执行文件旁边，onefile 的解压目录每次运行都会重建
+USER_DIR = os.path.dirname(os.path.abspath(sys.executable)) if getattr(sys, "frozen", False) else BASE_DIR
+
+
+def resource_path(*parts):
+    """返回随游戏分发的只读资源的绝对路径"""
+    return os.path.join(BASE_DIR, *parts)
+
+
+def user_path(*parts):
+    """返回可写文件的绝对路径"""
+    return os.path.join(USER_DIR, *parts)
@@ -0,0 +1,479 @@
+"""多房间服务器：把许多局游戏分散到多个工作进程
+
+一个 Python 进程受 GIL 限制只能用满一个核心，单个 GameServer 只承载一局。
+RoomManager 按 CPU 核心数启动工作进程，每个工作进程在自己的 asyncio 循环里运行
+多个房间（每个房间一个 GameServer，监听系统分配的端口）。管理进程只运行大厅：
+客户端连接大厅发送 HELLO，大厅把它分到一个房间并回复 REDIRECT，客户端改连
+房间端口，之后的数据不再经过管理进程。
+
+分配规则：HELLO 带房间名时进入同名房间（不存在则创建，已满时观战）；否则进入
+最早创建、还有空座位的自动房间，都满了就在房间最少的工作进程上新建一个。
+空座位按工作进程报告的已入座玩家数加上已重定向、还没连上房间的客户端计算：
+工作进程在有客户端连上或断开、房间结束时立即通过事件管道通知管理进程，开局前
+断开的玩家空出的座位马上可以分给下一个客户端，结束的房间马上移除。
+
+关闭时（Ctrl+C 或 SIGTERM）先停止接受新连接，各工作进程关闭还在等待玩家的房间，
+进行中的房间继续运行到结束，最多等待 --drain-timeout 秒，之后中止并通知客户端。
+
+    python rooms.py --players 2                   # 在默认端口运行大厅，工作进程数为 CPU 核心数
+    python rooms.py --test 16 --seconds 10        # 本机测试：16 个模拟客户端（8 个房间）
+    python rooms.py --test 4 --leavers 1          # 先有 1 个客户端入座后在开局前断开，检查座位能否补上
+    python main.py --connect 127.0.0.1:5555 --room 朋友局
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+import struct
+import threading
+import time
+
+from config import load_config, thaw_config
+from network import (DEFAULT_PORT, MSG_HELLO, MSG_REDIRECT, MSG_REJECT, PROTOCOL_VERSION, REDIRECT, NetworkClient,
+                     ProtocolError, pack_frame, read_frame, report, run_simulated_clients, unpack_hello)
+from replay import new_seed
+from snapshot import DEFAULT_BYTES_PER_TICK
+
+DRAIN_TIMEOUT = 30.0  # 关闭时等待进行中的房间结束的秒数
+REPORT_INTERVAL = 10.0
+REDIRECT_TIMEOUT = 10.0  # 重定向后超过此秒数还没连上房间的客户端不再占座
+
+
+class RoomWorker:
+    """工作进程：在一个 asyncio 循环中运行多个房间"""
+
+    def __init__(self, index, host, config, tick_rate=60, snapshot_rate=30, bytes_per_tick=DEFAULT_BYTES_PER_TICK,
+                 events=None):
+        self.index = index
+        self.events = events  # 向管理进程发送房间事件的管道
+        self.host = host
+        self.config = config
+        self.tick_rate = tick_rate
+        self.snapshot_rate = snapshot_rate
+        self.bytes_per_tick = bytes_per_tick
+        self.rooms = {}  # 房间名 -> (GameServer, Task)
+        self.draining = False
+        # 负载统计：两次汇报之间模拟耗时和进程 CPU 时间占墙钟时间的比例
+        self.retired_tick_time = 0.0
+        self.last_tick_time = 0.0
+        self.last_wall = time.perf_counter()
+        self.last_cpu = time.process_time()
+
+    async def create(self, name, players, seed):
+        """创建房间并开始监听，返回端口；正在关闭时返回 None"""
+        # 导入 server 会导入 headless，设置 dummy 视频驱动，只在工作进程中导入
+        from server import GameServer
+        if self.draining:
+            return None
+        server = GameServer(self.host, 0, players, self.tick_rate, self.snapshot_rate, seed, self.config,
+                            self.bytes_per_tick, name=name)
+        server.on_change = lambda: self.notify("room", server)
+        await server.start()
+        self.rooms[name] = (server, asyncio.create_task(self.run_room(name, server)))
+        return server.port
+
+    async def run_room(self, name, server):
+        try:
+            await server.run()
+        finally:
+            del self.rooms[name]
+            self.retired_tick_time += server.tick_time
+            self.notify("finished", server)
+
+    def notify(self, event, server):
+        """把房间的最新统计作为事件（"room" 或 "finished"）发给管理进程"""
+        if self.events is None:
+            return
+        try:
+            self.events.send((event, dict(server.stats(), worker=self.index)))
+        except OSError:
+            pass
+
+    def stats(self):
+        now = time.perf_counter()
+        cpu = time.process_time()
+        tick_time = self.retired_tick_time + sum(server.tick_time for server, _ in self.rooms.values())
+        elapsed = max(now - self.last_wall, 1e-9)
+        stats = {
+            "worker": self.index,
+            "pid": os.getpid(),
+            "rooms": [dict(server.stats(), worker=self.index) for server, _ in self.rooms.values()],
+            "tick_load": (tick_time - self.last_tick_time) / elapsed,
+            "cpu_load": (cpu - self.last_cpu) / elapsed,
+        }
+        self.last_tick_time, self.last_wall, self.last_cpu = tick_time, now, cpu
+        return stats
+
+    async def drain(self, timeout):
+        """不再创建房间；关闭等待中的房间，进行中的房间最多再运行 timeout 秒"""
+        self.draining = True
+        for server, task in list(self.rooms.values()):
+            if server.game is None:
+                await server.close("服务器正在关闭")
+                task.cancel()
+        running = [task for _, task in self.rooms.values()]
+        if running:
+            await asyncio.wait(running, timeout=timeout)
+        for server, task in list(self.rooms.values()):
+            await server.close("服务器关闭，本局中止")
+            task.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+        return self.stats()
+
+    async def handle(self, command, args):
+        if command == "create":
+            return await self.create(*args)
+        if command == "stats":
+            return self.stats()
+        if command == "drain":
+            return await self.drain(*args)
+        if command == "stop":
+            return await self.drain(0)
+        raise ValueError(f"未知的命令: {command}")
+
+    async def serve(self, conn):
+        """按管理进程的命令运行，直到收到 stop 或管道断开
+
+        命令在后台线程中阻塞接收，交给事件循环执行后把结果发回。
+        """
+        loop = asyncio.get_running_loop()
+        stopped = asyncio.Event()
+
+        def listen():
+            while True:
+                try:
+                    command, *args = conn.recv()
+                except (EOFError, OSError):
+                    command, args = "stop", ()
+                reply = asyncio.run_coroutine_threadsafe(self.handle(command, args), loop).result()
+                try:
+                    conn.send(reply)
+                except OSError:
+                    pass
+                if command == "stop":
+                    loop.call_soon_threadsafe(stopped.set)
+                    return
+
+        threading.Thread(target=listen, name=f"room-worker-{self.index}", daemon=True).start()
+        await stopped.wait()
+
+
+def worker_main(index, conn, events, host, config, tick_rate, snapshot_rate, bytes_per_tick):
+    """工作进程入口"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C 由管理进程处理，工作进程按 drain 命令收尾
+    worker = RoomWorker(index, host, config, tick_rate, snapshot_rate, bytes_per_tick, events)
+    try:
+        asyncio.run(worker.serve(conn))
+    finally:
+        events.close()  # 管理进程的事件线程读到 EOF 后结束
+
+
+class WorkerHandle:
+    """管理进程中的一个工作进程：通过管道同步调用命令，另一条管道接收房间事件"""
+
+    def __init__(self, index, process, conn, events):
+        self.index = index
+        self.process = process
+        self.conn = conn
+        self.events = events
+        self.listener = None  # 接收事件的线程
+        self.lock = threading.Lock()
+        self.stats = None
+
+    def call(self, *command):
+        with self.lock:
+            self.conn.send(command)
+            return self.conn.recv()
+
+
+class Room:
+    """管理进程记录的房间：所在的工作进程、端口和已分配的客户端数"""
+
+    def __init__(self, name, worker, port, players, named):
+        self.name = name
+        self.worker = worker
+        self.port = port
+        self.players = players
+        self.named = named  # 按名字加入的房间不参与自动分配
+        self.connected = 0  # 工作进程报告的已入座玩家数
+        self.joined = 0  # 工作进程报告的连上过的客户端总数
+        self.redirects = []  # 已重定向到这里、工作进程还没报告连上的客户端的重定向时间
+
+    @property
+    def assigned(self):
+        """已入座的玩家加上正在连过来的客户端"""
+        deadline = time.monotonic() - REDIRECT_TIMEOUT
+        self.redirects = [when for when in self.redirects if when > deadline]
+        return self.connected + len(self.redirects)
+
+    def redirect(self):
+        self.redirects.append(time.monotonic())
+
+    def update(self, stats):
+        """按工作进程报告的统计重建已分配数；事件和命令回复走不同的管道，忽略过时的统计"""
+        if stats["joined"] < self.joined:
+            return
+        del self.redirects[:stats["joined"] - self.joined]
+        self.joined = stats["joined"]
+        self.connected = stats["players"]
+
+
+class RoomManager:
+    """大厅和工作进程池"""
+
+    def __init__(self, host="127.0.0.1", port=DEFAULT_PORT, workers=None, players=2, tick_rate=60,
+                 snapshot_rate=30, config=None, bytes_per_tick=DEFAULT_BYTES_PER_TICK):
+        self.host = host
+        self.port = port
+        self.num_workers = workers or os.cpu_count() or 1
+        self.players = players
+        self.tick_rate = tick_rate
+        self.snapshot_rate = snapshot_rate
+        self.config = load_config() if config is None else config
+        self.bytes_per_tick = bytes_per_tick
+        self.workers = []
+        self.rooms = {}  # 房间名 -> Room
+        self.finished = []  # 已结束房间的最终统计
+        self.next_room = 1
+        self.server = None
+        self.draining = False
+        self.assign_lock = None
+
+    async def start(self):
+        """启动工作进程和大厅；port 为 0 时使用系统分配的端口"""
+        context = multiprocessing.get_context("spawn")
+        config = thaw_config(self.config)
+        loop = asyncio.get_running_loop()
+        for index in range(self.num_workers):
+            conn, child = context.Pipe()
+            events, child_events = context.Pipe(duplex=False)
+            process = context.Process(target=worker_main, name=f"room-worker-{index}", daemon=True,
+                                      args=(index, child, child_events, self.host, config, self.tick_rate,
+                                            self.snapshot_rate, self.bytes_per_tick))
+            process.start()
+            child.close()
+            child_events.close()
+            worker = WorkerHandle(index, process, conn, events)
+            worker.listener = threading.Thread(target=self.listen, args=(worker, loop),
+                                               name=f"room-events-{index}", daemon=True)
+            worker.listener.start()
+            self.workers.append(worker)
+        self.assign_lock = asyncio.Lock()
+        self.server = await asyncio.start_server(self.handle_client, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        print(f"大厅已启动: {self.host}:{self.port}，{self.num_workers} 个工作进程，每个房间 {self.players} 名玩家")
+
+    async def call(self, worker, *command):
+        return await asyncio.get_running_loop().run_in_executor(None, worker.call, *command)
+
+    def listen(self, worker, loop):
+        """事件线程：把工作进程发来的事件交给事件循环处理，直到管道关闭"""
+        while True:
+            try:
+                event, stats = worker.events.recv()
+            except (EOFError, OSError):
+                return
+            loop.call_soon_threadsafe(self.handle_event, worker, event, stats)
+
+    def handle_event(self, worker, event, stats):
+        room = self.rooms.get(stats["name"])
+        if room is None or room.worker is not worker or room.port != stats["port"]:
+            room = None  # 已移除的房间，或同名的旧房间
+        if event == "finished":
+            if room is not None:
+                del self.rooms[room.name]
+            self.finished.append(stats)
+        elif room is not None:
+            room.update(stats)
+
+    async def handle_client(self, reader, writer):
+        try:
+            msg_type, payload = await read_frame(reader)
+            version, name = unpack_hello(payload) if msg_type == MSG_HELLO else (None, None)
+            if version != PROTOCOL_VERSION:
+                writer.write(pack_frame(MSG_REJECT, "协议版本不匹配".encode("utf-8")))
+            elif self.draining:
+                writer.write(pack_frame(MSG_REJECT, "服务器正在关闭".encode("utf-8")))
+            else:
+                room = await self.assign(name)
+                if room is None:
+                    writer.write(pack_frame(MSG_REJECT, "服务器正在关闭".encode("utf-8")))
+                else:
+                    writer.write(pack_frame(MSG_REDIRECT, REDIRECT.pack(room.port)))
+            await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, ProtocolError, ValueError, struct.error) as e:
+            if not isinstance(e, (asyncio.IncompleteReadError, ConnectionError)):
+                print(f"大厅: 客户端协议错误: {e}")
+        finally:
+            writer.close()
+
+    async def assign(self, name=None):
+        """为一个客户端选择房间，需要时创建"""
+        async with self.assign_lock:
+            if name:
+                room = self.rooms.get(name) or await self.create_room(name, named=True)
+            else:
+                room = next((room for room in self.rooms.values()
+                             if not room.named and room.assigned < room.players), None)
+                if room is None:
+                    room = await self.create_room(str(self.next_room))
+                    self.next_room += 1
+            if room is not None:
+                room.redirect()
+            return room
+
+    async def create_room(self, name, named=False):
+        """在房间最少的工作进程上创建房间"""
+        counts = {worker: 0 for worker in self.workers}
+        for room in self.rooms.values():
+            counts[room.worker] += 1
+        worker = min(self.workers, key=counts.get)
+        port = await self.call(worker, "create", name, self.players, new_seed())
+        if port is None:
+            return None
+        room = self.rooms[name] = Room(name, worker, port, self.players, named)
+        return room
+
+    async def refresh(self):
+        """从所有工作进程收集统计"""
+        replies = await asyncio.gather(*(self.call(worker, "stats") for worker in self.workers))
+        for worker, stats in zip(self.workers, replies):
+            self.collect(worker, stats)
+
+    def collect(self, worker, stats):
+        worker.stats = stats
+        for current in stats["rooms"]:
+            room = self.rooms.get(current["name"])
+            if room is not None and room.worker is worker and room.port == current["port"]:
+                room.update(current)
+
+    async def monitor(self, interval):
+        """定期收集统计并输出报告"""
+        while True:
+            await asyncio.sleep(interval)
+            await self.refresh()
+            if self.rooms:
+                self.report()
+
+    def report(self, final=False):
+        for worker in self.workers:
+            stats = worker.stats
+            if stats is None:
+                continue
+            print(f"工作进程 {worker.index}（pid {stats['pid']}）: 房间 {len(stats['rooms'])} 个，"
+                  f"模拟占用 {stats['tick_load']:.1%}，CPU {stats['cpu_load']:.1%}")
+            rooms = sorted(stats["rooms"], key=lambda room: room["name"])
+            if final:
+                rooms = sorted((room for room in self.finished if room["worker"] == worker.index),
+                               key=lambda room: room["name"])
+            for room in rooms:
+                if room["result"]:
+                    result = room["result"]
+                elif final:
+                    result = "已中止" if room["started"] else "未开局"
+                else:
+                    result = "进行中" if room["started"] else "等待玩家"
+                print(f"    房间 {room['name']}: 端口 {room['port']}，玩家 {room['players']}，"
+                      f"{room['ticks']} 帧，每帧 {room['mean_tick_ms']:.2f} ms（最大 {room['max_tick_ms']:.2f} ms），"
+                      f"落后 {room['late_ticks']} 次，{result}")
+
+    async def shutdown(self, timeout=DRAIN_TIMEOUT):
+        """停止接受新连接，等各工作进程收尾后结束它们"""
+        self.draining = True
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+        running = len(self.rooms)
+        if running:
+            print(f"正在关闭: 等待 {running} 个房间结束（最多 {timeout:.0f} 秒）")
+        replies = await asyncio.gather(*(self.call(worker, "drain", timeout) for worker in self.workers))
+        for worker, stats in zip(self.workers, replies):
+            self.collect(worker, stats)
+        await asyncio.gather(*(self.call(worker, "stop") for worker in self.workers))
+        loop = asyncio.get_running_loop()
+        for worker in self.workers:
+            worker.process.join(5)
+            worker.conn.close()
+            # 等事件线程转交完最后的 finished 事件（工作进程退出时关闭事件管道）
+            await loop.run_in_executor(None, worker.listener.join, 5)
+            worker.events.close()
+        await asyncio.sleep(0)
+        self.report(final=True)
+
+    async def serve(self, report_interval=REPORT_INTERVAL, drain_timeout=DRAIN_TIMEOUT):
+        """运行到收到 Ctrl+C 或 SIGTERM，然后按 drain_timeout 收尾"""
+        await self.start()
+        loop = asyncio.get_running_loop()
+        stop = asyncio.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stop.set)
+            except (NotImplementedError, RuntimeError):
+                pass  # Windows 上没有信号处理，Ctrl+C 直接结束
+        monitor = asyncio.create_task(self.monitor(report_interval))
+        await stop.wait()
+        monitor.cancel()
+        await self.shutdown(drain_timeout)
+
+
+def run_test(manager, clients, seconds, drain_timeout=1.0, leavers=0):
+    """在本机运行大厅，同时用 clients 个模拟客户端连接，seconds 秒后关闭
+
+    leavers 个客户端先经大厅进入房间，入座后在开局前断开；它们空出的座位应当
+    分给之后的模拟客户端，不留下凑不齐玩家的房间。
+    """
+    def leave_early():
+        for _ in range(leavers):
+            NetworkClient("127.0.0.1", manager.port).close()  # 构造时已收到 WELCOME，即已入座
+        results.extend(run_simulated_clients("127.0.0.1", manager.port, clients, seconds))
+
+    async def serve():
+        await manager.start()
+        thread = threading.Thread(target=leave_early, daemon=True)
+        thread.start()
+        monitor = asyncio.create_task(manager.monitor(max(seconds / 2, 1)))
+        await asyncio.sleep(seconds)
+        monitor.cancel()
+        await manager.refresh()
+        manager.report()
+        await manager.shutdown(drain_timeout)
+        thread.join(seconds + 1)
+
+    results = []
+    asyncio.run(serve())
+    report(results, seconds)
+    waiting = sum(not room["started"] for room in manager.finished)
+    print(f"房间 {len(manager.finished)} 个，未开局 {waiting} 个")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="多房间服务器")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, help="工作进程数（缺省为 CPU 核心数）")
+    parser.add_argument("--players", type=int, choices=[1, 2], default=2, help="每个房间的玩家数")
+    parser.add_argument("--tick-rate", type=int, default=60)
+    parser.add_argument("--snapshot-rate", type=int, default=30)
+    parser.add_argument("--bytes-per-tick", type=int, default=DEFAULT_BYTES_PER_TICK, help="每帧快照的字节预算")
+    parser.add_argument("--report-interval", type=float, default=REPORT_INTERVAL, help="输出负载报告的间隔（秒）")
+    parser.add_argument("--drain-timeout", type=float, default=DRAIN_TIMEOUT, help="关闭时等待进行中房间的秒数")
+    parser.add_argument("--test", type=int, metavar="N", help="在本机启动 N 个模拟客户端进行测试")
+    parser.add_argument("--seconds", type=float, default=10, help="测试时长")
+    parser.add_argument("--leavers", type=int, default=0, metavar="K", help="测试时先有 K 个客户端入座后在开局前断开")
+    args = parser.parse_args()
+
+    if args.test:
+        args.host, args.port = "127.0.0.1", 0
+    manager = RoomManager(args.host, args.port, args.workers, args.players, args.tick_rate, args.snapshot_rate,
+                          bytes_per_tick=args.bytes_per_tick)
+    if args.test:
+        run_test(manager, args.test, args.seconds, leavers=args.leavers)
+    else:
+        asyncio.run(manager.serve(args.report_interval, args.drain_timeout))
+
+
+if __name__ == "__main__":
+    main()
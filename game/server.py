@@ -0,0 +1,304 @@
+"""权威联机服务器
+
+asyncio 单线程运行：每个连接一个读取协程，另有一个固定步长的模拟协程推进
+HeadlessGame（与单机相同的 Player / EnemyManager 逻辑），按 snapshot_rate 向所有
+客户端广播世界快照。快照相对每个客户端确认过的基线做增量编码（见 snapshot.py），
+协议见 network.py。
+
+    python server.py --players 2                 # 等待两名玩家入座后开局
+    python server.py --players 2 --test 3        # 在本机启动服务器和 3 个模拟客户端（第 3 个观战）
+    python server.py --test 2 --latency 120 --jitter 30   # 模拟客户端经延迟代理连接，预测并统计校正量
+"""
+import argparse
+import asyncio
+import collections
+import json
+import struct
+import threading
+import time
+
+from config import load_config, thaw_config
+from headless import HeadlessGame
+from netsim import LatencyProxy
+from network import (ACK, DEFAULT_PORT, INPUT, MSG_ACK, MSG_CONFIG, MSG_HELLO, MSG_INPUT, MSG_REJECT, MSG_WELCOME,
+                     PROTOCOL_VERSION, SPECTATOR, WELCOME, ProtocolError, encode_snapshot, pack_frame, read_frame,
+                     report, run_simulated_clients, unpack_hello)
+from replay import new_seed
+from snapshot import DEFAULT_BYTES_PER_TICK, SnapshotEncoder, capture
+
+MAX_PENDING_INPUTS = 8  # 每名玩家最多缓存的输入，超出时丢弃最旧的，避免延迟累积
+WRITE_BUFFER_LIMIT = 256 * 1024  # 发送缓冲超过此值的客户端跳过本次快照
+
+
+class Connection:
+    """一个客户端连接及其待处理的输入"""
+
+    def __init__(self, reader, writer, bytes_per_tick=DEFAULT_BYTES_PER_TICK):
+        self.reader = reader
+        self.writer = writer
+        self.encoder = SnapshotEncoder(bytes_per_tick)
+        self.player_id = SPECTATOR
+        self.inputs = collections.deque(maxlen=MAX_PENDING_INPUTS)  # (输入序号, 动作位掩码)
+        self.mask = 0  # 没有新输入时沿用上一帧的按键
+        self.ack = 0  # 已处理的最后一个输入序号
+        self.skipped = 0
+
+    def send(self, frame):
+        """写入发送缓冲；对方接收太慢时返回 False（快照会被下一份取代，直接丢弃）"""
+        if self.writer.is_closing():
+            return False
+        if self.writer.transport.get_write_buffer_size() > WRITE_BUFFER_LIMIT:
+            self.skipped += 1
+            return False
+        self.writer.write(frame)
+        return True
+
+    def next_input(self):
+        if self.inputs:
+            self.ack, self.mask = self.inputs.popleft()
+        return self.mask
+
+
+class GameServer:
+    """一局联机游戏的权威服务器
+
+    players 名玩家全部入座后开局，之后加入的连接观战；玩家断线后座位空出，
+    飞机保持不动，新的连接可以接替。分出胜负后广播最终快照并结束。
+    """
+
+    def __init__(self, host="127.0.0.1", port=DEFAULT_PORT, players=2, tick_rate=60, snapshot_rate=30,
+                 seed=None, config=None, bytes_per_tick=DEFAULT_BYTES_PER_TICK, name=None):
+        self.name = name  # 多房间服务器中的房间名，用于日志
+        self.host = host
+        self.port = port
+        self.num_players = players
+        self.tick_rate = tick_rate
+        self.snapshot_interval = max(1, round(tick_rate / snapshot_rate))
+        self.seed = new_seed() if seed is None else seed
+        self.config = load_config() if config is None else config
+        self.bytes_per_tick = bytes_per_tick  # 每帧快照的字节预算
+        self.game = None
+        self.seats = {}  # 玩家编号 -> Connection
+        self.connections = set()
+        self.joined = 0  # 连上过的客户端总数（含观战者）
+        self.on_change = None  # 有客户端连上或断开时调用（多房间服务器用来通知管理进程）
+        self.server = None
+        self.started = None  # 开局事件
+        self.finished = None
+        # 统计
+        self.tick_time = 0.0
+        self.max_tick_time = 0.0
+        self.late_ticks = 0
+        self.bytes_sent = 0
+        self.snapshots_sent = 0
+
+    async def start(self):
+        """开始监听；port 为 0 时使用系统分配的端口"""
+        self.started = asyncio.Event()
+        self.finished = asyncio.Event()
+        self.server = await asyncio.start_server(self.handle_client, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.log(f"服务器已启动: {self.host}:{self.port}，等待 {self.num_players} 名玩家")
+
+    def log(self, message):
+        print(f"[{self.name}] {message}" if self.name else message)
+
+    async def run(self):
+        """运行到这一局结束"""
+        if self.server is None:
+            await self.start()
+        try:
+            await self.started.wait()
+            self.game = HeadlessGame(config=self.config, seed=self.seed, two_player=self.num_players == 2)
+            self.log(f"开局: 种子 {self.seed}，{self.tick_rate} 帧/秒，快照每 {self.snapshot_interval} 帧一次")
+            await self.tick_loop()
+        finally:
+            await self.close()
+
+    async def tick_loop(self):
+        loop = asyncio.get_running_loop()
+        step = 1 / self.tick_rate
+        next_tick = loop.time()
+        while not self.game.result:
+            start = time.perf_counter()
+            self.tick()
+            elapsed = time.perf_counter() - start
+            self.tick_time += elapsed
+            self.max_tick_time = max(self.max_tick_time, elapsed)
+            next_tick += step
+            delay = next_tick - loop.time()
+            if delay < 0:
+                # 落后时不补帧，从现在重新计时
+                self.late_ticks += 1
+                next_tick = loop.time()
+                delay = 0
+            await asyncio.sleep(delay)
+        self.finished.set()
+
+    def tick(self):
+        """推进一帧：每名玩家消耗一个输入，按间隔广播快照"""
+        masks = []
+        for player_id in range(1, self.num_players + 1):
+            connection = self.seats.get(player_id)
+            masks.append(connection.next_input() if connection else 0)
+        self.game.step(masks)
+        if self.game.tick % self.snapshot_interval == 0 or self.game.result:
+            self.broadcast_snapshot()
+
+    def broadcast_snapshot(self):
+        world = capture(self.game)
+        for connection in list(self.connections):
+            # 每个客户端的基线不同，各自编码；没发出去的快照不会被确认，不影响之后的基线
+            frame = encode_snapshot(connection.ack, connection.encoder.encode(world))
+            if connection.send(frame):
+                self.bytes_sent += len(frame)
+                self.snapshots_sent += 1
+
+    async def handle_client(self, reader, writer):
+        connection = Connection(reader, writer, self.bytes_per_tick)
+        try:
+            msg_type, payload = await read_frame(reader)
+            if msg_type != MSG_HELLO or unpack_hello(payload)[0] != PROTOCOL_VERSION:
+                writer.write(pack_frame(MSG_REJECT, "协议版本不匹配".encode("utf-8")))
+                return
+            self.join(connection)
+            while True:
+                msg_type, payload = await read_frame(reader)
+                if msg_type == MSG_INPUT and connection.player_id != SPECTATOR:
+                    connection.inputs.append(INPUT.unpack(payload))
+                elif msg_type == MSG_ACK:
+                    connection.encoder.ack(ACK.unpack(payload)[0])
+        except (asyncio.IncompleteReadError, ConnectionError, ProtocolError, ValueError, struct.error) as e:
+            if not isinstance(e, (asyncio.IncompleteReadError, ConnectionError)):
+                self.log(f"客户端协议错误: {e}")
+        finally:
+            self.leave(connection)
+            writer.close()
+
+    def join(self, connection):
+        """分配空座位（没有空座位时观战）并发送 WELCOME"""
+        for player_id in range(1, self.num_players + 1):
+            if player_id not in self.seats:
+                connection.player_id = player_id
+                self.seats[player_id] = connection
+                break
+        self.connections.add(connection)
+        self.joined += 1
+        tick = self.game.tick if self.game else 0
+        connection.send(pack_frame(MSG_WELCOME, WELCOME.pack(connection.player_id, tick, self.tick_rate, self.seed)))
+        config = json.dumps(thaw_config(self.config), ensure_ascii=False, separators=(",", ":"))
+        connection.send(pack_frame(MSG_CONFIG, config.encode("utf-8")))
+        role = f"玩家 {connection.player_id}" if connection.player_id else "观战者"
+        self.log(f"{role} 已连接: {connection.writer.get_extra_info('peername')}")
+        if len(self.seats) == self.num_players:
+            self.started.set()
+        if self.on_change:
+            self.on_change()
+
+    def leave(self, connection):
+        self.connections.discard(connection)
+        if self.seats.get(connection.player_id) is connection:
+            del self.seats[connection.player_id]
+        if self.on_change:
+            self.on_change()
+
+    async def close(self, reason=None):
+        """停止监听并断开所有连接；指定 reason 时先向客户端发送 REJECT 说明原因"""
+        if self.server is not None:
+            self.server.close()
+            for connection in list(self.connections):
+                if reason:
+                    connection.send(pack_frame(MSG_REJECT, reason.encode("utf-8")))
+                connection.writer.close()
+            await self.server.wait_closed()
+            self.server = None
+
+    def stats(self):
+        ticks = self.game.tick if self.game else 0
+        return {
+            "name": self.name,
+            "port": self.port,
+            "players": len(self.seats),
+            "clients": len(self.connections),
+            "joined": self.joined,
+            "started": self.game is not None,
+            "ticks": ticks,
+            "result": self.game.result if self.game else None,
+            "tick_time": self.tick_time,
+            "mean_tick_ms": self.tick_time / max(ticks, 1) * 1000,
+            "max_tick_ms": self.max_tick_time * 1000,
+            "late_ticks": self.late_ticks,
+            "bytes_sent": self.bytes_sent,
+            "bytes_per_snapshot": self.bytes_sent / max(self.snapshots_sent, 1),
+        }
+
+
+def run_test(server, clients, seconds, latency=None, jitter=0):
+    """在本机运行服务器，同时用 clients 个模拟客户端连接，seconds 秒后结束
+
+    指定 latency（往返毫秒）时客户端经 LatencyProxy 连接，并预测自己的飞机。
+    """
+    async def serve():
+        await server.start()
+        port = server.port
+        proxy = None
+        if latency is not None:
+            proxy = LatencyProxy("127.0.0.1", server.port, latency, jitter)
+            await proxy.start()
+            port = proxy.port
+        task = asyncio.create_task(server.run())
+        thread = threading.Thread(target=lambda: results.extend(
+            run_simulated_clients("127.0.0.1", port, clients, seconds, predict=proxy is not None)), daemon=True)
+        thread.start()
+        threads.append(thread)
+        try:
+            await asyncio.wait_for(asyncio.shield(task), seconds + 1)
+        except asyncio.TimeoutError:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        if proxy is not None:
+            await proxy.close()
+
+    results = []
+    threads = []
+    asyncio.run(serve())
+    for thread in threads:
+        thread.join(seconds + 1)  # 等模拟客户端收尾
+    report(results, seconds)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="权威联机服务器")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--players", type=int, choices=[1, 2], default=2)
+    parser.add_argument("--tick-rate", type=int, default=60)
+    parser.add_argument("--snapshot-rate", type=int, default=30)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--bytes-per-tick", type=int, default=DEFAULT_BYTES_PER_TICK, help="每帧快照的字节预算")
+    parser.add_argument("--test", type=int, metavar="N", help="在本机启动 N 个模拟客户端进行测试")
+    parser.add_argument("--seconds", type=float, default=10, help="测试时长")
+    parser.add_argument("--latency", type=float, help="测试时模拟的往返延迟（毫秒）")
+    parser.add_argument("--jitter", type=float, default=0, help="测试时模拟的抖动（毫秒）")
+    args = parser.parse_args()
+
+    if args.test:
+        args.host, args.port = "127.0.0.1", 0
+    server = GameServer(args.host, args.port, args.players, args.tick_rate, args.snapshot_rate, args.seed,
+                        bytes_per_tick=args.bytes_per_tick)
+    try:
+        if args.test:
+            run_test(server, args.test, args.seconds, args.latency, args.jitter)
+        else:
+            asyncio.run(server.run())
+    except KeyboardInterrupt:
+        pass
+    stats = server.stats()
+    print(f"共 {stats['ticks']} 帧，结局 {stats['result']}，每帧 {stats['mean_tick_ms']:.2f} ms"
+          f"（最大 {stats['max_tick_ms']:.2f} ms），落后 {stats['late_ticks']} 次，"
+          f"发送 {stats['bytes_sent'] / 1024:.0f} KB（平均每个快照 {stats['bytes_per_snapshot']:.0f} 字节）")
+
+
+if __name__ == "__main__":
+    main()
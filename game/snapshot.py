@@ -0,0 +1,548 @@
+"""二进制世界快照与增量压缩
+
+服务器每次广播时先用 capture() 把世界量化成紧凑的元组（按稳定编号索引），
+再由每个客户端各自的 SnapshotEncoder 只编码与该客户端最后确认的基线快照之间
+的差异：
+- 玩家、敌人、道具、Boss 状态：新增、删除，以及变化的字段（按字段位掩码）
+- 敌人和道具的位置按上次发送的位置和速度外推，只有外推结果与实际位置不同时
+  才重新发送位置和（由最近两次快照估算的）速度，匀速下落的敌人不占流量
+- 子弹沿直线飞行，只在出现时发送一次位置和速度，客户端按帧数外推；飞出屏幕
+  由两端按同样的规则自行剔除，只有中途被击中消失的子弹才需要发送删除
+- 每个快照有字节预算（bytes_per_tick × 距上次快照的帧数）。玩家、Boss 和各类
+  删除总是发送；剩余预算依次用于已有敌人和道具的字段变化、位置修正、新出现的
+  敌人和道具、新子弹（玩家的子弹优先），放不下的推迟到之后的快照。只有必须发送
+  的部分本身超出预算时快照才会超出（snapshot.py --compare 会标出）
+
+编码器记录的是“客户端实际收到的”世界（推迟的更新和子弹不在其中），客户端解码后
+得到完全相同的结果，因此下一个快照总能以它为基线。
+
+快照格式（小端）：
+    uint32 帧号 | uint32 基线帧号（0 为完整快照）| uint8 结局 | uint8 阶段 |
+    玩家 | Boss | 敌人 | 道具（各为：uint16 删除数, 编号... | uint16 变化数, (编号, uint8 字段位掩码, 变化的字段)...）|
+    位置：uint16 数量, (uint8 组, uint16 编号, 坐标, 速度)... |
+    子弹：uint16 删除数, (uint8 组, uint16 编号)... | uint16 新增数, (uint8 组, uint16 编号, 坐标, 速度, uint8 类型)...
+
+    python snapshot.py --compare    # 与 JSON 快照比较每帧字节数和编解码耗时
+"""
+import argparse
+import json
+import os
+import struct
+import time
+
+from projectiles import BULLET_KINDS
+
+RESULTS = (None, "victory", "game_over")
+ENEMY_TYPES = ("enemy_normal", "enemy_special", "enemy_boss")
+ITEM_TYPES = ("health", "weapon", "shield")
+BOSS_PATTERNS = ("normal", "circle", "zigzag")
+
+POSITION_SCALE = 4  # 子弹坐标精度 1/4 像素
+VELOCITY_SCALE = 256  # 子弹速度精度 1/256 像素/帧
+MOTION_SCALE = 16  # 敌人和道具速度精度 1/16 像素/帧（坐标为整数像素）
+MOTION_GROUPS = ("enemies", "items")  # 位置外推的实体，组号为下标
+
+# 玩家标志位
+SHIELD = 1
+INVINCIBLE = 2
+
+DEFAULT_BYTES_PER_TICK = 400
+HISTORY = 64  # 保留的已发送/已收到快照数
+
+HEADER = struct.Struct("<IIBB")
+COUNT = struct.Struct("<H")
+BULLET_KEY = struct.Struct("<BH")
+BULLET_SPAWN = struct.Struct("<BHhhhhB")
+MOTION = struct.Struct("<BHhhhh")
+
+EMPTY_WORLD = {"tick": 0, "result": None, "stage": 1, "players": {}, "boss": {}, "enemies": {},
+               "items": {}, "motion": {}, "bullets": {}}
+
+
+class Schema:
+    """一类实体的字段定义：按字段位掩码只编码变化的字段"""
+
+    def __init__(self, id_format, fields):
+        self.id = struct.Struct("<" + id_format)
+        self.names = [name for name, _ in fields]
+        self.fields = [struct.Struct("<" + fmt) for _, fmt in fields]
+        self.default = (0,) * len(fields)
+
+    def diff(self, baseline, current):
+        """比较 current 与 baseline（均为 {编号: 元组}），返回 (删除的编号, [(编号, 字段位掩码, 字段数据)...])"""
+        removed = [key for key in baseline if key not in current]
+        changed = []
+        for key, values in current.items():
+            old = baseline.get(key)
+            if old == values:
+                continue
+            mask = 0
+            fields = b""
+            for i, value in enumerate(values):
+                if old is None or old[i] != value:
+                    mask |= 1 << i
+                    fields += self.fields[i].pack(value)
+            changed.append((key, mask, fields))
+        return removed, changed
+
+    def entry_size(self, change):
+        return self.id.size + 1 + len(change[2])
+
+    def write(self, out, removed, changed):
+        out += COUNT.pack(len(removed))
+        for key in removed:
+            out += self.id.pack(key)
+        out += COUNT.pack(len(changed))
+        for key, mask, fields in changed:
+            out += self.id.pack(key) + bytes((mask,)) + fields
+
+    def encode(self, out, baseline, current):
+        """把 current 相对 baseline 的全部差异写入 out"""
+        self.write(out, *self.diff(baseline, current))
+
+    def decode(self, data, offset, baseline):
+        """从 data[offset:] 读出差异并应用到 baseline，返回 (新的 {编号: 元组}, 新的偏移)"""
+        current = dict(baseline)
+        (count,) = COUNT.unpack_from(data, offset)
+        offset += COUNT.size
+        for _ in range(count):
+            (key,) = self.id.unpack_from(data, offset)
+            offset += self.id.size
+            current.pop(key, None)
+        (count,) = COUNT.unpack_from(data, offset)
+        offset += COUNT.size
+        for _ in range(count):
+            (key,) = self.id.unpack_from(data, offset)
+            mask = data[offset + self.id.size]
+            offset += self.id.size + 1
+            values = list(current.get(key, self.default))
+            for i, field in enumerate(self.fields):
+                if mask & (1 << i):
+                    (values[i],) = field.unpack_from(data, offset)
+                    offset += field.size
+            current[key] = tuple(values)
+        return current, offset
+
+
+# 玩家速度按双精度原样发送，客户端预测时能从服务器状态精确重放移动
+PLAYER = Schema("B", [("x", "h"), ("y", "h"), ("lives", "B"), ("score", "I"), ("weapon_level", "B"),
+                      ("flags", "B"), ("vx", "d"), ("vy", "d")])
+BOSS = Schema("B", [("id", "H"), ("phase", "B"), ("pattern", "B")])
+ENEMY = Schema("H", [("type", "B"), ("health", "H"), ("max_health", "H")])
+ITEM = Schema("H", [("type", "B")])
+FULL_SECTIONS = (("players", PLAYER), ("boss", BOSS))  # 不受预算限制
+ENTITY_SECTIONS = (("enemies", ENEMY), ("items", ITEM))  # 下标与 MOTION_GROUPS 的组号一致
+SECTIONS = FULL_SECTIONS + ENTITY_SECTIONS
+
+
+def _clamp(value, low, high):
+    return low if value < low else high if value > high else value
+
+
+def capture(game):
+    """把 HeadlessGame 的世界量化为可比较的元组，按稳定编号索引
+
+    敌人和道具的实际位置放在 motion 中（{(组, 编号): (x, y)}），编码时再换成外推记录。
+    """
+    manager = game.enemies
+    players = {}
+    for player in game.players:
+        flags = (SHIELD if player.has_shield else 0) | (INVINCIBLE if player.invincible else 0)
+        players[player.player_id] = (player.rect.x, player.rect.y, _clamp(player.lives, 0, 255),
+                                     _clamp(player.score, 0, 0xFFFFFFFF), player.weapon_level, flags,
+                                     player.current_speed_x, player.current_speed_y)
+    enemies = {}
+    motion = {}
+    for enemy in manager.enemies:
+        key = enemy.id & 0xFFFF
+        enemies[key] = (ENEMY_TYPES.index(enemy.type), _clamp(enemy.health, 0, 0xFFFF),
+                        _clamp(enemy.max_health, 0, 0xFFFF))
+        motion[(0, key)] = (enemy.rect.x, enemy.rect.y)
+    boss = {}
+    if manager.boss in manager.enemies:
+        boss[0] = (manager.boss.id & 0xFFFF, manager.boss.phase, BOSS_PATTERNS.index(manager.boss.attack_pattern))
+    items = {}
+    for item in manager.items:
+        items[item.id & 0xFFFF] = (ITEM_TYPES.index(item.type),)
+        motion[(1, item.id & 0xFFFF)] = (item.rect.x, item.rect.y)
+    # 子弹：组 0 为敌人子弹，组 n 为玩家 n 的子弹
+    bullets = {}
+    fields = [(0, manager.enemy_bullets)] + [(player.player_id, player.bullets) for player in game.players]
+    for group, field in fields:
+        n = field.count
+        for key, x, y, vx, vy, kind in zip(
+                field.ids[:n].tolist(), (field.x[:n] * POSITION_SCALE).round().astype(int).tolist(),
+                (field.y[:n] * POSITION_SCALE).round().astype(int).tolist(),
+                (field.vx[:n] * VELOCITY_SCALE).round().astype(int).tolist(),
+                (field.vy[:n] * VELOCITY_SCALE).round().astype(int).tolist(), field.kind[:n].tolist()):
+            bullets[(group, key)] = (_clamp(x, -32768, 32767), _clamp(y, -32768, 32767),
+                                     _clamp(vx, -32768, 32767), _clamp(vy, -32768, 32767), kind, game.tick)
+    return {"tick": game.tick, "result": game.result, "stage": manager.game_stage, "players": players,
+            "boss": boss, "enemies": enemies, "items": items, "motion": motion, "bullets": bullets}
+
+
+def motion_position(record, tick):
+    """按外推记录 (x, y, vx, vy, 起始帧) 计算 tick 帧的位置（整数运算，两端结果一致）"""
+    x, y, vx, vy, start = record
+    elapsed = tick - start
+    return x + vx * elapsed // MOTION_SCALE, y + vy * elapsed // MOTION_SCALE
+
+
+def _existing_motion(motion, world):
+    """只保留实体仍然存在的外推记录"""
+    return {key: record for key, record in motion.items() if key[1] in world[MOTION_GROUPS[key[0]]]}
+
+
+def bullet_position(bullet, tick):
+    """按出现时的位置和速度外推子弹在 tick 帧的左上角坐标"""
+    x, y, vx, vy, _, start = bullet
+    elapsed = tick - start
+    return x / POSITION_SCALE + vx / VELOCITY_SCALE * elapsed, y / POSITION_SCALE + vy / VELOCITY_SCALE * elapsed
+
+
+def advance_bullets(bullets, tick, screen_size):
+    """剔除外推到 tick 帧时完全离开屏幕的子弹（规则与 ProjectileField.step 相同）"""
+    width, height = screen_size
+    alive = {}
+    for key, bullet in bullets.items():
+        x, y = bullet_position(bullet, tick)
+        w, h = BULLET_KINDS[bullet[4]][0]
+        if y <= height and y + h >= 0 and x <= width and x + w >= 0:
+            alive[key] = bullet
+    return alive
+
+
+def encode(world, baseline, budget=None, screen_size=(800, 600), previous=None):
+    """编码 world 相对 baseline 的增量
+
+    返回 (数据, 客户端解码后将得到的世界, 推迟的子弹数, 推迟的实体更新数)。
+    previous 为上一次编码的（实际）世界，用来估算重新发送位置的实体的速度。
+    """
+    tick = world["tick"]
+    out = bytearray(HEADER.pack(tick, baseline["tick"], RESULTS.index(world["result"]), world["stage"]))
+    for name, schema in FULL_SECTIONS:
+        schema.encode(out, baseline[name], world[name])
+
+    diffs = [schema.diff(baseline[name], world[name]) for name, schema in ENTITY_SECTIONS]
+    known = _existing_motion(baseline["motion"], world)
+    corrections = {}  # 外推位置与实际位置不符的实体 -> 新的外推记录
+    for key, position in world["motion"].items():
+        record = known.get(key)
+        if record is not None and motion_position(record, tick) == position:
+            continue
+        vx = vy = 0
+        last = previous["motion"].get(key) if previous and previous["tick"] < tick else None
+        if last is not None:
+            elapsed = tick - previous["tick"]
+            vx = _clamp(round((position[0] - last[0]) * MOTION_SCALE / elapsed), -32768, 32767)
+            vy = _clamp(round((position[1] - last[1]) * MOTION_SCALE / elapsed), -32768, 32767)
+        corrections[key] = (position[0], position[1], vx, vy, tick)
+
+    known_bullets = advance_bullets(baseline["bullets"], tick, screen_size)
+    current = world["bullets"]
+    removed_bullets = [key for key in known_bullets if key not in current]
+
+    # 必须发送的部分（删除和各段的计数）之后剩余的预算
+    room = None
+    if budget is not None:
+        room = budget - len(out) - 3 * COUNT.size - len(removed_bullets) * BULLET_KEY.size
+        for (name, schema), (removed, _) in zip(ENTITY_SECTIONS, diffs):
+            room -= 2 * COUNT.size + len(removed) * schema.id.size
+
+    # 实体更新按优先级排列：(字节数, 组, 字段变化, 位置修正的编号)；新实体的字段和位置一起发送
+    updates = []
+    fixes = []
+    spawns = []
+    for group, ((name, schema), (_, changed)) in enumerate(zip(ENTITY_SECTIONS, diffs)):
+        for change in changed:
+            if change[0] in baseline[name]:
+                updates.append((schema.entry_size(change), group, change, None))
+            else:
+                spawns.append((schema.entry_size(change) + MOTION.size, group, change, (group, change[0])))
+        fixes.extend((MOTION.size, group, None, key) for key in corrections
+                     if key[0] == group and key[1] in baseline[name])
+    accepted = [[] for _ in ENTITY_SECTIONS]
+    moved = []
+    deferred_updates = 0
+    for size, group, change, key in updates + fixes + spawns:
+        if room is not None:
+            if size > room:
+                deferred_updates += 1
+                continue
+            room -= size
+        if change is not None:
+            accepted[group].append(change)
+        if key is not None:
+            moved.append(key)
+
+    received = dict(world)
+    for group, ((name, schema), (removed, _)) in enumerate(zip(ENTITY_SECTIONS, diffs)):
+        schema.write(out, removed, accepted[group])
+        entities = {key: values for key, values in baseline[name].items() if key in world[name]}
+        for change in accepted[group]:
+            entities[change[0]] = world[name][change[0]]
+        received[name] = entities
+
+    # 推迟的位置修正保留旧的外推记录，下一个快照会再次发现偏差
+    motion = dict(known)
+    out += COUNT.pack(len(moved))
+    for key in moved:
+        motion[key] = corrections[key]
+        out += MOTION.pack(key[0], key[1], *corrections[key][:4])
+
+    out += COUNT.pack(len(removed_bullets))
+    for key in removed_bullets:
+        out += BULLET_KEY.pack(*key)
+    sent = {key: bullet for key, bullet in known_bullets.items() if key in current}
+    # 新子弹先发玩家的，再按发射顺序发敌人的，超出预算的留到下一个快照
+    spawned = sorted((key for key in current if key not in known_bullets), key=lambda key: key[0] == 0)
+    count = len(spawned) if room is None else min(len(spawned), max(0, room // BULLET_SPAWN.size))
+    out += COUNT.pack(count)
+    for key in spawned[:count]:
+        bullet = current[key]
+        out += BULLET_SPAWN.pack(key[0], key[1], *bullet[:5])
+        sent[key] = bullet
+    received["motion"] = motion
+    received["bullets"] = sent
+    return bytes(out), received, len(spawned) - count, deferred_updates
+
+
+def decode(data, baseline, screen_size=(800, 600)):
+    """解码快照，baseline 为数据中基线帧号对应的世界"""
+    tick, baseline_tick, result, stage = HEADER.unpack_from(data, 0)
+    if baseline_tick != baseline["tick"]:
+        raise ValueError(f"基线不匹配: 需要帧 {baseline_tick}，提供的是帧 {baseline['tick']}")
+    world = {"tick": tick, "result": RESULTS[result], "stage": stage}
+    offset = HEADER.size
+    for name, schema in SECTIONS:
+        world[name], offset = schema.decode(data, offset, baseline[name])
+
+    motion = _existing_motion(baseline["motion"], world)
+    (count,) = COUNT.unpack_from(data, offset)
+    offset += COUNT.size
+    for _ in range(count):
+        group, key, x, y, vx, vy = MOTION.unpack_from(data, offset)
+        offset += MOTION.size
+        motion[(group, key)] = (x, y, vx, vy, tick)
+    world["motion"] = motion
+
+    bullets = advance_bullets(baseline["bullets"], tick, screen_size)
+    (count,) = COUNT.unpack_from(data, offset)
+    offset += COUNT.size
+    for _ in range(count):
+        bullets.pop(BULLET_KEY.unpack_from(data, offset), None)
+        offset += BULLET_KEY.size
+    (count,) = COUNT.unpack_from(data, offset)
+    offset += COUNT.size
+    for _ in range(count):
+        group, key, x, y, vx, vy, kind = BULLET_SPAWN.unpack_from(data, offset)
+        offset += BULLET_SPAWN.size
+        bullets[(group, key)] = (x, y, vx, vy, kind, tick)
+    world["bullets"] = bullets
+    return world
+
+
+class SnapshotEncoder:
+    """服务器端，每个客户端一个：记录发出的快照，以客户端最后确认的快照为基线"""
+
+    def __init__(self, bytes_per_tick=DEFAULT_BYTES_PER_TICK, screen_size=(800, 600)):
+        self.bytes_per_tick = bytes_per_tick
+        self.screen_size = screen_size
+        self.sent = {}  # 帧号 -> 客户端将得到的世界
+        self.acked = 0
+        self.last_tick = 0
+        self.deferred = 0  # 推迟的子弹数
+        self.deferred_updates = 0  # 推迟的实体更新数
+        self.over_budget = 0  # 必须发送的部分就超出预算的快照数
+        self.full = 0  # 没有可用基线、发送完整快照的次数
+        self.previous = None  # 上一次编码的实际世界
+
+    def ack(self, tick):
+        """客户端确认收到 tick 帧的快照，更早的快照不再需要"""
+        if tick > self.acked and tick in self.sent:
+            self.acked = tick
+            self.sent = {key: world for key, world in self.sent.items() if key >= tick}
+
+    def encode(self, world):
+        baseline = self.sent.get(self.acked, EMPTY_WORLD)
+        if baseline is EMPTY_WORLD:
+            self.full += 1
+        budget = None
+        if self.bytes_per_tick:
+            budget = self.bytes_per_tick * max(1, world["tick"] - self.last_tick)
+        data, received, deferred, deferred_updates = encode(world, baseline, budget, self.screen_size, self.previous)
+        self.previous = world
+        self.deferred += deferred
+        self.deferred_updates += deferred_updates
+        if budget is not None and len(data) > budget:
+            self.over_budget += 1
+        self.last_tick = world["tick"]
+        self.sent[world["tick"]] = received
+        if len(self.sent) > HISTORY:
+            # 客户端长时间没有确认：只保留确认的基线和最近的快照
+            recent = sorted(self.sent)[-HISTORY:]
+            self.sent = {key: self.sent[key] for key in recent + [self.acked] if key in self.sent}
+        return data
+
+
+class SnapshotDecoder:
+    """客户端：保存最近收到的快照，解码时按数据中的基线帧号查找"""
+
+    def __init__(self, screen_size=(800, 600)):
+        self.screen_size = screen_size
+        self.received = {0: EMPTY_WORLD}
+
+    def decode(self, data):
+        (baseline_tick,) = struct.unpack_from("<I", data, 4)
+        baseline = self.received.get(baseline_tick)
+        if baseline is None:
+            raise ValueError(f"缺少基线快照: 帧 {baseline_tick}")
+        world = decode(data, baseline, self.screen_size)
+        self.received[world["tick"]] = world
+        # 服务器只会以更新的快照为基线
+        self.received = {key: value for key, value in self.received.items()
+                         if key == 0 or key >= baseline_tick}
+        if len(self.received) > HISTORY:
+            recent = sorted(self.received)[-HISTORY:]
+            self.received = {key: self.received[key] for key in [0] + recent}
+        return world
+
+
+def to_view(world):
+    """把解码后的世界转换为 RemoteWorld 绘制用的字典（与 json_snapshot 的结构相同）"""
+    tick = world["tick"]
+    boss = world["boss"].get(0)
+    motion = world["motion"]
+    enemies = [{"id": key, "type": ENEMY_TYPES[kind], "health": health, "max_health": max_health}
+               for key, (kind, health, max_health) in world["enemies"].items()]
+    for enemy in enemies:
+        enemy["x"], enemy["y"] = motion_position(motion[(0, enemy["id"])], tick)
+    items = [{"id": key, "type": ITEM_TYPES[kind]} for key, (kind,) in world["items"].items()]
+    for item in items:
+        item["x"], item["y"] = motion_position(motion[(1, item["id"])], tick)
+    return {
+        "tick": tick,
+        "result": world["result"],
+        "stage": world["stage"],
+        "players": [{"id": key, "x": x, "y": y, "lives": lives, "score": score, "weapon_level": weapon,
+                     "shield": bool(flags & SHIELD), "invincible": bool(flags & INVINCIBLE), "vx": vx, "vy": vy}
+                    for key, (x, y, lives, score, weapon, flags, vx, vy) in sorted(world["players"].items())],
+        "enemies": enemies,
+        "boss": None if boss is None else {
+            "health": world["enemies"].get(boss[0], (0, 0, 0))[1],
+            "phase": boss[1],
+            "pattern": BOSS_PATTERNS[boss[2]],
+        },
+        "items": items,
+        # [x, y, 类型, 组, 编号]
+        "bullets": [[int(x), int(y), bullet[4], key[0], key[1]] for key, bullet in world["bullets"].items()
+                    for x, y in (bullet_position(bullet, tick),)],
+    }
+
+
+def json_snapshot(game):
+    """JSON 快照（对照基线）：在 HeadlessGame.state() 的基础上加入绘制所需的字段"""
+    state = game.state()
+    for player, info in zip(game.players, state["players"]):
+        info["invincible"] = player.invincible
+        info["vx"], info["vy"] = player.current_speed_x, player.current_speed_y
+    for enemy, info in zip(game.enemies.enemies, state["enemies"]):
+        info["max_health"] = enemy.max_health
+    bullets = []
+    fields = [(0, game.enemies.enemy_bullets)] + [(player.player_id, player.bullets) for player in game.players]
+    for group, field in fields:
+        n = field.count
+        bullets.extend(zip(field.x[:n].astype(int).tolist(), field.y[:n].astype(int).tolist(),
+                           field.kind[:n].tolist(), [group] * n, field.ids[:n].tolist()))
+    state["bullets"] = bullets
+    return state
+
+
+def compare(ticks=1200, interval=2, bytes_per_tick=DEFAULT_BYTES_PER_TICK):
+    """在基准测试场景中比较 JSON 快照与增量二进制快照"""
+    from benchmark import SCENARIOS
+    from headless import HeadlessGame, autopilot
+    from network import FRAME
+    results = {}
+    scenarios = dict(SCENARIOS, autopilot={"description": "自动驾驶的普通对局", "two_player": True,
+                                           "setup": None, "tick": None, "inputs": autopilot})
+    for name, scenario in scenarios.items():
+        game = HeadlessGame(seed=1, two_player=scenario["two_player"])
+        if scenario["setup"]:
+            scenario["setup"](game)
+        encoder = SnapshotEncoder(bytes_per_tick)
+        decoder = SnapshotDecoder()
+        json_bytes = []
+        delta_bytes = []
+        json_time = delta_time = decode_time = 0.0
+        worst = 0  # 最大的增量快照（不含开局的完整快照）
+        full = 0
+        for _ in range(ticks):
+            if scenario["tick"]:
+                scenario["tick"](game)
+            game.step(scenario["inputs"](game))
+            if game.tick % interval:
+                continue
+            start = time.perf_counter()
+            data = json.dumps(json_snapshot(game), separators=(",", ":")).encode("utf-8")
+            json_time += time.perf_counter() - start
+            json_bytes.append(len(data) + FRAME.size)
+            start = time.perf_counter()
+            data = encoder.encode(capture(game))
+            delta_time += time.perf_counter() - start
+            delta_bytes.append(len(data) + FRAME.size)
+            if len(delta_bytes) == 1:
+                full = len(data)
+            else:
+                worst = max(worst, len(data))
+            start = time.perf_counter()
+            world = decoder.decode(data)
+            decode_time += time.perf_counter() - start
+            if world != encoder.sent[world["tick"]]:
+                raise SystemExit(f"{name}: 帧 {world['tick']} 解码结果与编码端不一致")
+            encoder.ack(world["tick"])
+        count = len(delta_bytes)
+        results[name] = {
+            "json_bytes_per_tick": sum(json_bytes) / ticks,
+            "delta_bytes_per_tick": sum(delta_bytes) / ticks,
+            "full_snapshot_bytes": full,
+            "worst_snapshot_bytes": worst,
+            "budget": bytes_per_tick * interval,
+            "deferred_bullets": encoder.deferred,
+            "deferred_updates": encoder.deferred_updates,
+            "over_budget": encoder.over_budget,
+            "json_encode_us": json_time / count * 1e6,
+            "delta_encode_us": delta_time / count * 1e6,
+            "delta_decode_us": decode_time / count * 1e6,
+        }
+        r = results[name]
+        warning = f"[超出预算 {encoder.over_budget} 次] " if encoder.over_budget else ""
+        print(f"{warning}{name}: JSON {r['json_bytes_per_tick']:.0f} 字节/帧，增量 {r['delta_bytes_per_tick']:.1f} 字节/帧"
+              f"（{r['json_bytes_per_tick'] / r['delta_bytes_per_tick']:.1f}x），最大快照 {worst}/{r['budget']} 字节"
+              f"（完整快照 {full}），"
+              f"推迟子弹 {encoder.deferred} 次、实体更新 {encoder.deferred_updates} 次；编码 JSON {r['json_encode_us']:.0f} us / 增量 "
+              f"{r['delta_encode_us']:.0f} us，解码 {r['delta_decode_us']:.0f} us")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="快照编码对比")
+    parser.add_argument("--compare", action="store_true", help="与 JSON 快照比较字节数和耗时")
+    parser.add_argument("--ticks", type=int, default=1200)
+    parser.add_argument("--interval", type=int, default=2, help="每隔几帧发送一次快照")
+    parser.add_argument("--bytes-per-tick", type=int, default=DEFAULT_BYTES_PER_TICK)
+    parser.add_argument("--output", help="把结果写入 JSON 文件")
+    args = parser.parse_args()
+    if not args.compare:
+        parser.print_help()
+        return
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    results = compare(args.ticks, args.interval, args.bytes_per_tick)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+import pygame
+from assets import asset_cache, sound_path
+from config import config_store
+
+# 优先级：通道不够时高优先级的音效可以打断低优先级的
+LOW = 0
+NORMAL = 1
+HIGH = 2  # 可以使用预留通道
+
+# 音效名称 -> (文件名, 优先级, 同时发声上限)
+SOUNDS = {
+    "player_explosion": ("explosion.wav", HIGH, 2),
+    "victory": ("victory.wav", HIGH, 1),
+    "shield": ("shield.wav", HIGH, 1),
+    "weapon_upgrade": ("player_shoot.wav", NORMAL, 1),
+    "player_shoot": ("player_shoot.wav", NORMAL, 2),
+    "enemy_explosion": ("explosion.wav", NORMAL, 3),
+    "enemy_shoot": ("enemy_shoot.wav", LOW, 3),
+}
+
+
+class SoundBank:
+    """全局音效库：所有音效共享一份 Sound，统一分配混音通道
+
+    - 每个音效有同时发声上限，超过时丢弃新的播放请求
+    - 前 reserved 个通道只留给 HIGH 优先级的音效
+    - 通道全部占用时，打断正在播放的更低优先级音效
+    - 同一音效在 throttle_ms（默认一帧）内只播放一次
+    - 音量只在配置变化时设置
+    """
+
+    def __init__(self, sounds=SOUNDS, channels=16, reserved=2, throttle_ms=1000 / 60):
+        self.definitions = sounds
+        self.num_channels = channels
+        self.num_reserved = reserved
+        self.throttle_ms = throttle_ms
+        self.channels = []
+        self.voices = {}  # 通道下标 -> 正在播放的音效名称
+        self.last_played = {}  # 音效名称 -> 上次播放的时间（毫秒）
+        self.missing = set()  # 加载失败的音效，只报告一次
+        self.volume = None
+        self.played = 0
+        self.throttled = 0
+        self.voice_limited = 0
+        self.preempted = 0
+        self.dropped = 0
+        config_store.subscribe(self.apply_config)
+
+    def apply_config(self, config):
+        volume = config.get("volume", 0.5)
+        if volume != self.volume:
+            self.volume = volume
+            asset_cache.set_volume(volume)
+
+    def _setup(self):
+        """混音器初始化之后第一次播放时分配通道"""
+        if not pygame.mixer.get_init():
+            return False
+        if not self.channels:
+            pygame.mixer.set_num_channels(max(self.num_channels, pygame.mixer.get_num_channels()))
+            pygame.mixer.set_reserved(self.num_reserved)
+            self.channels = [pygame.mixer.Channel(i) for i in range(self.num_channels)]
+            self.apply_config(config_store.get())
+        return True
+
+    def sound(self, name):
+        """返回共享的 Sound（来自资源缓存），加载失败时返回 None"""
+        filename = self.definitions[name][0]
+        try:
+            return asset_cache.sound(sound_path(filename))
+        except (pygame.error, FileNotFoundError) as e:
+            if name not in self.missing:
+                self.missing.add(name)
+                print(f"Error loading sound effect ({name}): {e}")
+            return None
+
+    def _active(self, name):
+        """返回正在播放该音效的通道下标，顺便清理已经播完的通道"""
+        active = []
+        for index, voice in list(self.voices.items()):
+            if not self.channels[index].get_busy():
+                del self.voices[index]
+            elif voice == name:
+                active.append(index)
+        return active
+
+    def _find_channel(self, priority):
+        first = 0 if priority >= HIGH else self.num_reserved
+        for index in range(first, self.num_channels):
+            if not self.channels[index].get_busy():
+                return index
+        # 没有空闲通道时打断优先级最低的音效
+        index = min(range(first, self.num_channels),
+                    key=lambda i: self.definitions[self.voices[i]][1] if i in self.voices else HIGH + 1)
+        voice = self.voices.get(index)
+        if voice is not None and self.definitions[voice][1] < priority:
+            self.channels[index].stop()
+            self.preempted += 1
+            return index
+        return None
+
+    def play(self, name):
+        """播放音效，返回使用的通道；被限流、超过上限或没有通道时返回 None"""
+        if not self._setup():
+            return None
+        _, priority, limit = self.definitions[name]
+        now = pygame.time.get_ticks()
+        last = self.last_played.get(name)
+        if last is not None and now - last < self.throttle_ms:
+            self.throttled += 1
+            return None
+        sound = self.sound(name)
+        if sound is None:
+            return None
+        if len(self._active(name)) >= limit:
+            self.voice_limited += 1
+            return None
+        index = self._find_channel(priority)
+        if index is None:
+            self.dropped += 1
+            return None
+        channel = self.channels[index]
+        channel.play(sound)
+        self.voices[index] = name
+        self.last_played[name] = now
+        self.played += 1
+        return channel
+
+    def stats(self):
+        return {
+            "played": self.played,
+            "throttled": self.throttled,
+            "voice_limited": self.voice_limited,
+            "preempted": self.preempted,
+            "dropped": self.dropped,
+        }
+
+
+# 全局共享的音效库
+sound_bank = SoundBank()
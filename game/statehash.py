@@ -0,0 +1,47 @@
+"""每帧的世界状态哈希
+
+锁步联机的两端、或者一局游戏和它的回放，只交换输入；每帧推进之后各自计算
+世界状态的 CRC32，比较哈希就能发现从哪一帧开始不同步，不必传输世界状态。
+
+哈希覆盖影响之后模拟的全部状态：玩家的位置、速度、生命、得分、武器、护盾和
+无敌，敌人和道具的编号、位置、血量，Boss 的阶段和攻击模式，以及所有子弹的
+位置和速度。整数和浮点数都按原样打包，浮点数的任何微小差异也会反映出来。
+"""
+import struct
+import zlib
+
+import numpy as np
+
+HASH_MASK = 0xFFFF  # 回放和锁步消息中保存的哈希位数（16 位，每帧 2 字节）
+
+HEADER = struct.Struct("<IiiII")
+PLAYER = struct.Struct("<iiddiiBBBi")
+BOSS = struct.Struct("<BB")
+PATTERNS = {"normal": 0, "circle": 1, "zigzag": 2}
+
+
+def _field_hash(field, value):
+    n = field.count
+    for array in (field.x, field.y, field.vx, field.vy):
+        value = zlib.crc32(array[:n].tobytes(), value)
+    return value
+
+
+def world_hash(tick, players, enemies):
+    """计算推进 tick 帧之后的世界哈希（32 位）；players 为玩家列表，enemies 为 EnemyManager"""
+    value = zlib.crc32(HEADER.pack(tick, enemies.game_stage, enemies.stage_score,
+                                   enemies.next_enemy_id, enemies.next_item_id))
+    for player in players:
+        value = zlib.crc32(PLAYER.pack(player.rect.x, player.rect.y, player.current_speed_x, player.current_speed_y,
+                                       player.lives, player.score, player.weapon_level, player.has_shield,
+                                       player.invincible, player.last_shot_time), value)
+        value = _field_hash(player.bullets, value)
+    # 敌人和道具可能有几百个，合成一个整数数组一次哈希
+    rows = [(enemy.id, enemy.rect.x, enemy.rect.y, enemy.health) for enemy in enemies.enemies]
+    rows.extend((item.id, item.rect.x, item.rect.y, -1) for item in enemies.items)
+    if rows:
+        value = zlib.crc32(np.array(rows, dtype=np.int32).tobytes(), value)
+    boss = enemies.boss
+    if boss is not None and boss in enemies.enemies:
+        value = zlib.crc32(BOSS.pack(boss.phase, PATTERNS.get(boss.attack_pattern, 255)), value)
+    return _field_hash(enemies.enemy_bullets, value)
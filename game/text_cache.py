@@ -0,0 +1,78 @@
+from collections import OrderedDict
+
+import pygame
+
+
+class TextCache:
+    """文字渲染缓存：按 (字体, 文本, 颜色, 抗锯齿) 缓存 font.render 的结果
+
+    采用 LRU 淘汰，总像素字节数不超过 max_bytes。
+    """
+
+    def __init__(self, max_bytes=4 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, color, antialias=True):
+        key = (font, text, tuple(color), antialias)
+        surface = self.entries.get(key)
+        if surface is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return surface
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        size = surface.get_width() * surface.get_height() * surface.get_bytesize()
+        self.entries[key] = surface
+        self.bytes += size
+        while self.bytes > self.max_bytes and len(self.entries) > 1:
+            _, old = self.entries.popitem(last=False)
+            self.bytes -= old.get_width() * old.get_height() * old.get_bytesize()
+        return surface
+
+    def clear(self):
+        self.entries.clear()
+        self.bytes = 0
+
+    def stats(self):
+        return {"entries": len(self.entries), "bytes": self.bytes, "hits": self.hits, "misses": self.misses}
+
+
+class NumberText:
+    """HUD 数值字段：固定前缀 + 数字，数字由预先渲染的字形拼接
+
+    数值不变时直接返回上次合成的图像；数值变化时只做几次 blit，不再调用 font.render。
+    """
+
+    def __init__(self, font, label, color, antialias=True):
+        self.font = font
+        self.color = color
+        self.label = text_cache.render(font, label, color, antialias)
+        self.digits = [text_cache.render(font, str(d), color, antialias) for d in range(10)]
+        self.minus = text_cache.render(font, "-", color, antialias)
+        self.value = None
+        self.surface = None
+
+    def render(self, value):
+        if value == self.value:
+            return self.surface
+        self.value = value
+        glyphs = [self.minus if ch == "-" else self.digits[int(ch)] for ch in str(int(value))]
+        width = self.label.get_width() + sum(glyph.get_width() for glyph in glyphs)
+        height = max([self.label.get_height()] + [glyph.get_height() for glyph in glyphs])
+        surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        surface.fill((*self.color[:3], 0))  # 透明底色与文字同色，避免抗锯齿边缘发黑
+        surface.blit(self.label, (0, 0))
+        x = self.label.get_width()
+        for glyph in glyphs:
+            surface.blit(glyph, (x, 0))
+            x += glyph.get_width()
+        self.surface = surface
+        return surface
+
+
+# 全局共享的文字缓存
+text_cache = TextCache()
@@ -1,253 +1,178 @@
+import abc
+
 import pygame
-from config import load_config, update_volume, update_key_binding
-
-def show_main_menu(screen, font):
-    title = font.render("飞机大作战", True, (255, 255, 0))
-    screen.blit(title, (screen.get_width() // 2 - title.get_width() // 2, 150))
-
-    # 按钮设置
-    texts = ["开始游戏", "设置", "退出游戏"]
-    buttons = []
-    for i, text in enumerate(texts):
-        txt_surf = font.render(text, True, (0, 0, 0))
-        rect = pygame.Rect(screen.get_width() // 2 - 100, 300 + i * 70, 200, 50)
-        pygame.draw.rect(screen, (150, 150, 250), rect)
-        # 计算文字位置使其居中
-        text_x = rect.x + (rect.width - txt_surf.get_width()) // 2
-        text_y = rect.y + (rect.height - txt_surf.get_height()) // 2
-        screen.blit(txt_surf, (text_x, text_y))
-        buttons.append((text, rect))
-    return buttons
-
-
-def show_game_mode_menu(screen, font):
-    texts = ["单人游戏", "双人游戏", "设置", "退出游戏"]
-    buttons = []
-    for i, text in enumerate(texts):
-        txt_surf = font.render(text, True, (0, 0, 0))
-        rect = pygame.Rect(screen.get_width() // 2 - 100, 200 + i * 70, 200, 50)
-        pygame.draw.rect(screen, (150, 150, 250), rect)
-        # 计算文字位置使其居中
-        text_x = rect.x + (rect.width - txt_surf.get_width()) // 2
-        text_y = rect.y + (rect.height - txt_surf.get_height()) // 2
-        screen.blit(txt_surf, (text_x, text_y))
-        buttons.append((text, rect))
-    return buttons  # 返回按钮列表
-
-def show_pause_settings(screen, font):
-    texts = ["继续游戏", "设置", "退出到主菜单", "退出游戏"]
-    buttons = []
-    for i, text in enumerate(texts):
-        txt_surf = font.render(text, True, (0, 0, 0))
-        rect = pygame.Rect(screen.get_width() // 2 - 120, 150 + i * 80, 240, 60)
-        pygame.draw.rect(screen, (180, 180, 180), rect)
-        # 计算文字位置使其居中
-        text_x = rect.x + (rect.width - txt_surf.get_width()) // 2
-        text_y = rect.y + (rect.height - txt_surf.get_height()) // 2
-        screen.blit(txt_surf, (text_x, text_y))
-        buttons.append((text, rect))
-    return buttons
-
-def show_settings_menu(screen, font):
-    config = load_config()
-    buttons = []
-    
-    # 标题
-    title = font.render("设置", True, (255, 255, 0))
-    screen.blit(title, (screen.get_width() // 2 - title.get_width() // 2, 25))
-    
-    # 音量设置
-    volume_text = font.render(f"音量: {int(config['volume'] * 100)}%", True, (255, 255, 255))
-    screen.blit(volume_text, (screen.get_width() // 2 - 100, 75))
-    
-    # 音量调节按钮
-    volume_down = pygame.Rect(screen.get_width() // 2 - 150, 75, 40, 40)
-    volume_up = pygame.Rect(screen.get_width() // 2 + 110, 75, 40, 40)
-    pygame.draw.rect(screen, (150, 150, 250), volume_down)
-    pygame.draw.rect(screen, (150, 150, 250), volume_up)
-    
-    # 音量按钮文字居中
-    minus_text = font.render("-", True, (0, 0, 0))
-    plus_text = font.render("+", True, (0, 0, 0))
-    minus_x = volume_down.x + (volume_down.width - minus_text.get_width()) // 2
-    minus_y = volume_down.y + (volume_down.height - minus_text.get_height()) // 2
-    plus_x = volume_up.x + (volume_up.width - plus_text.get_width()) // 2
-    plus_y = volume_up.y + (volume_up.height - plus_text.get_height()) // 2
-    screen.blit(minus_text, (minus_x, minus_y))
-    screen.blit(plus_text, (plus_x, plus_y))
-    
-    buttons.append(("volume_down", volume_down))
-    buttons.append(("volume_up", volume_up))
-    
-    # 按键设置
-    y_pos = 150
-    for player in ["player1", "player2"]:
-        player_text = "玩家1" if player == "player1" else "玩家2"
-        screen.blit(font.render(player_text, True, (255, 255, 255)), (screen.get_width() // 2 - 200, y_pos))
-        
-        for action, key in config["key_bindings"][player].items():
-            action_text = {
-                "left": "左移",
-                "right": "右移",
-                "up": "上移",
-                "down": "下移",
-                "shoot": "射击"
-            }[action]
-            
-            key_text = font.render(f"{action_text}: {key}", True, (255, 255, 255))
-            screen.blit(key_text, (screen.get_width() // 2 - 100, y_pos))
-            
-            # 添加按键绑定按钮
-            bind_rect = pygame.Rect(screen.get_width() // 2 + 100, y_pos, 100, 30)
-            pygame.draw.rect(screen, (150, 150, 250), bind_rect)
-            # 更改按钮文字居中
-            change_text = font.render("更改", True, (0, 0, 0))
-            change_x = bind_rect.x + (bind_rect.width - change_text.get_width()) // 2
-            change_y = bind_rect.y + (bind_rect.height - change_text.get_height()) // 2
-            screen.blit(change_text, (change_x, change_y))
-            buttons.append((f"bind_{player}_{action}", bind_rect))
-            
-            y_pos += 40
-    
-    # 返回按钮
-    back_rect = pygame.Rect(screen.get_width() // 2 - 100, y_pos + 50, 200, 50)
-    pygame.draw.rect(screen, (150, 150, 250), back_rect)
-    # 返回按钮文字居中
-    back_text = font.render("返回", True, (0, 0, 0))
-    back_x = back_rect.x + (back_rect.width - back_text.get_width()) // 2
-    back_y = back_rect.y + (back_rect.height - back_text.get_height()) // 2
-    screen.blit(back_text, (back_x, back_y))
-    buttons.append(("back", back_rect))
-    
-    return buttons
+from config import config_store, load_config
+from text_cache import text_cache
+
+BUTTON_COLOR = (150, 150, 250)
+PAUSE_BUTTON_COLOR = (180, 180, 180)
+
+ACTION_NAMES = {
+    "left": "左移",
+    "right": "右移",
+    "up": "上移",
+    "down": "下移",
+    "shoot": "射击"
+}
+
+
+def _highlight(color):
+    return tuple(min(255, c + 40) for c in color)
+
+
+class Menu(abc.ABC):
+    """保留模式菜单：按钮矩形只构建一次，整个菜单合成到一张缓存图像上
+
+    只有悬停的按钮变化或内容变化（rebuild）时才重新合成，
+    平时每帧只需一次 blit，点击检测直接使用预先构建的矩形。
+    """
+
+    button_color = BUTTON_COLOR
+
+    def __init__(self, font, screen_size):
+        self.font = font
+        self.width, self.height = screen_size
+        self.labels = []   # (文字图像, 位置)
+        self.buttons = []  # (按钮 id, 矩形, 文字)
+        self.hover = None
+        self.surface = None
+        self.rect = None
+        self.build()
+
+    @abc.abstractmethod
+    def build(self):
+        """子类在这里添加文字和按钮"""
+
+    def add_label(self, text, pos, color=(255, 255, 255)):
+        self.labels.append((text_cache.render(self.font, text, color), pos))
+
+    def add_button(self, button_id, rect, text=None):
+        self.buttons.append((button_id, pygame.Rect(rect), button_id if text is None else text))
+
+    def rebuild(self):
+        """内容变化时重新构建，下次绘制时重新合成"""
+        self.labels = []
+        self.buttons = []
+        self.build()
+        self.surface = None
+
+    def hit_test(self, pos):
+        for button_id, rect, _ in self.buttons:
+            if rect.collidepoint(pos):
+                return button_id
+        return None
+
+    def click(self, pos, mouse_click):
+        """返回被点击的按钮 id，没有点击时返回 None"""
+        return self.hit_test(pos) if mouse_click else None
+
+    def compose(self):
+        rects = [rect for _, rect, _ in self.buttons]
+        rects += [pygame.Rect(pos, surface.get_size()) for surface, pos in self.labels]
+        self.rect = rects[0].unionall(rects[1:])
+        self.surface = pygame.Surface(self.rect.size, pygame.SRCALPHA)
+        ox, oy = self.rect.topleft
+        for surface, (x, y) in self.labels:
+            # 画到透明底上时按通道取最大值，保留文字原有的透明度
+            self.surface.blit(surface, (x - ox, y - oy), special_flags=pygame.BLEND_RGBA_MAX)
+        for button_id, rect, text in self.buttons:
+            rect = rect.move(-ox, -oy)
+            color = _highlight(self.button_color) if button_id == self.hover else self.button_color
+            pygame.draw.rect(self.surface, color, rect)
+            # 文字在按钮中居中
+            txt_surf = text_cache.render(self.font, text, (0, 0, 0))
+            self.surface.blit(txt_surf, (rect.x + (rect.width - txt_surf.get_width()) // 2,
+                                         rect.y + (rect.height - txt_surf.get_height()) // 2))
+
+    def draw(self, screen, mouse_pos):
+        """绘制菜单；重新合成时返回菜单区域（供脏矩形刷新），否则返回 None"""
+        hover = self.hit_test(mouse_pos)
+        changed = self.surface is None or hover != self.hover
+        if changed:
+            self.hover = hover
+            self.compose()
+        screen.blit(self.surface, self.rect)
+        return self.rect if changed else None
+
+
+class MainMenu(Menu):
+    def build(self):
+        title = text_cache.render(self.font, "飞机大作战", (255, 255, 0))
+        self.add_label("飞机大作战", (self.width // 2 - title.get_width() // 2, 150), (255, 255, 0))
+        for i, text in enumerate(["开始游戏", "设置", "退出游戏"]):
+            self.add_button(text, (self.width // 2 - 100, 300 + i * 70, 200, 50))
+
+
+class GameModeMenu(Menu):
+    def build(self):
+        for i, text in enumerate(["单人游戏", "双人游戏", "设置", "退出游戏"]):
+            self.add_button(text, (self.width // 2 - 100, 200 + i * 70, 200, 50))
+
+
+class PauseMenu(Menu):
+    button_color = PAUSE_BUTTON_COLOR
+
+    def build(self):
+        for i, text in enumerate(["继续游戏", "设置", "退出到主菜单", "退出游戏"]):
+            self.add_button(text, (self.width // 2 - 120, 150 + i * 80, 240, 60))
+
+
+class SettingsMenu(Menu):
+    """设置菜单：订阅配置，音量或按键绑定变化时才重新构建"""
+
+    def __init__(self, font, screen_size):
+        self.config = load_config()
+        super().__init__(font, screen_size)
+        config_store.subscribe(self.apply_config)
+
+    def apply_config(self, config):
+        if (config["volume"] != self.config["volume"] or
+                config["key_bindings"] != self.config["key_bindings"]):
+            self.config = config
+            self.rebuild()
+
+    def build(self):
+        config = self.config
+        center = self.width // 2
+
+        # 标题
+        title = text_cache.render(self.font, "设置", (255, 255, 0))
+        self.add_label("设置", (center - title.get_width() // 2, 25), (255, 255, 0))
+
+        # 音量设置
+        self.add_label(f"音量: {int(config['volume'] * 100)}%", (center - 100, 75))
+        self.add_button("volume_down", (center - 150, 75, 40, 40), "-")
+        self.add_button("volume_up", (center + 110, 75, 40, 40), "+")
+
+        # 按键设置
+        y_pos = 150
+        for player in ["player1", "player2"]:
+            self.add_label("玩家1" if player == "player1" else "玩家2", (center - 200, y_pos))
+            for action, key in config["key_bindings"][player].items():
+                self.add_label(f"{ACTION_NAMES[action]}: {key}", (center - 100, y_pos))
+                self.add_button(f"bind_{player}_{action}", (center + 100, y_pos, 100, 30), "更改")
+                y_pos += 40
+
+        # 返回按钮
+        self.add_button("back", (center - 100, y_pos + 50, 200, 50), "返回")
+
+
+def show_loading_progress(screen, font, done, total):
+    """在屏幕底部绘制资源加载进度条，返回绘制区域"""
+    bar = pygame.Rect(screen.get_width() // 2 - 150, screen.get_height() - 40, 300, 12)
+    pygame.draw.rect(screen, (80, 80, 80), bar)
+    if total:
+        pygame.draw.rect(screen, (150, 150, 250), (bar.x, bar.y, bar.width * done // total, bar.height))
+    text = text_cache.render(font, f"加载资源 {done}/{total}", (255, 255, 255))
+    text_pos = (bar.centerx - text.get_width() // 2, bar.y - text.get_height() - 4)
+    screen.blit(text, text_pos)
+    return bar.union(pygame.Rect(text_pos, text.get_size()))
+
 
 def show_key_binding_prompt(screen, font, player, action):
-    prompt_text = font.render(f"请按下新的按键来设置{player}的{action}", True, (255, 255, 255))
-    screen.blit(prompt_text, (screen.get_width() // 2 - prompt_text.get_width() // 2, 
-                            screen.get_height() // 2 - prompt_text.get_height() // 2))
-    pygame.display.flip()
-    
-    waiting = True
-    while waiting:
-        for event in pygame.event.get():
-            if event.type == pygame.KEYDOWN:
-                # 获取按键名称
-                key_name = pygame.key.name(event.key)
-                
-                # 处理特殊按键
-                if event.key == pygame.K_SPACE:
-                    key_name = "SPACE"
-                elif event.key == pygame.K_LEFT:
-                    key_name = "LEFT"
-                elif event.key == pygame.K_RIGHT:
-                    key_name = "RIGHT"
-                elif event.key == pygame.K_UP:
-                    key_name = "UP"
-                elif event.key == pygame.K_DOWN:
-                    key_name = "DOWN"
-                elif event.key == pygame.K_ESCAPE:
-                    key_name = "ESCAPE"
-                elif event.key == pygame.K_RETURN:
-                    key_name = "RETURN"
-                elif event.key == pygame.K_TAB:
-                    key_name = "TAB"
-                elif event.key == pygame.K_BACKSPACE:
-                    key_name = "BACKSPACE"
-                elif event.key == pygame.K_DELETE:
-                    key_name = "DELETE"
-                elif event.key == pygame.K_INSERT:
-                    key_name = "INSERT"
-                elif event.key == pygame.K_HOME:
-                    key_name = "HOME"
-                elif event.key == pygame.K_END:
-                    key_name = "END"
-                elif event.key == pygame.K_PAGEUP:
-                    key_name = "PAGEUP"
-                elif event.key == pygame.K_PAGEDOWN:
-                    key_name = "PAGEDOWN"
-                elif event.key == pygame.K_F1:
-                    key_name = "F1"
-                elif event.key == pygame.K_F2:
-                    key_name = "F2"
-                elif event.key == pygame.K_F3:
-                    key_name = "F3"
-                elif event.key == pygame.K_F4:
-                    key_name = "F4"
-                elif event.key == pygame.K_F5:
-                    key_name = "F5"
-                elif event.key == pygame.K_F6:
-                    key_name = "F6"
-                elif event.key == pygame.K_F7:
-                    key_name = "F7"
-                elif event.key == pygame.K_F8:
-                    key_name = "F8"
-                elif event.key == pygame.K_F9:
-                    key_name = "F9"
-                elif event.key == pygame.K_F10:
-                    key_name = "F10"
-                elif event.key == pygame.K_F11:
-                    key_name = "F11"
-                elif event.key == pygame.K_F12:
-                    key_name = "F12"
-                elif event.key == pygame.K_LSHIFT:
-                    key_name = "LSHIFT"
-                elif event.key == pygame.K_RSHIFT:
-                    key_name = "RSHIFT"
-                elif event.key == pygame.K_LCTRL:
-                    key_name = "LCTRL"
-                elif event.key == pygame.K_RCTRL:
-                    key_name = "RCTRL"
-                elif event.key == pygame.K_LALT:
-                    key_name = "LALT"
-                elif event.key == pygame.K_RALT:
-                    key_name = "RALT"
-                elif event.key == pygame.K_LSUPER:
-                    key_name = "LSUPER"
-                elif event.key == pygame.K_RSUPER:
-                    key_name = "RSUPER"
-                elif event.key == pygame.K_MENU:
-                    key_name = "MENU"
-                elif event.key == pygame.K_NUMLOCK:
-                    key_name = "NUMLOCK"
-                elif event.key == pygame.K_CAPSLOCK:
-                    key_name = "CAPSLOCK"
-                elif event.key == pygame.K_SCROLLLOCK:
-                    key_name = "SCROLLLOCK"
-                elif event.key == pygame.K_PRINTSCREEN:
-                    key_name = "PRINTSCREEN"
-                elif event.key == pygame.K_PAUSE:
-                    key_name = "PAUSE"
-                elif event.key == pygame.K_BREAK:
-                    key_name = "BREAK"
-                elif event.key == pygame.K_SLASH:
-                    key_name = "SLASH"
-                elif event.key == pygame.K_BACKSLASH:
-                    key_name = "BACKSLASH"
-                elif event.key == pygame.K_MINUS:
-                    key_name = "MINUS"
-                elif event.key == pygame.K_EQUALS:
-                    key_name = "EQUALS"
-                elif event.key == pygame.K_LEFTBRACKET:
-                    key_name = "LEFTBRACKET"
-                elif event.key == pygame.K_RIGHTBRACKET:
-                    key_name = "RIGHTBRACKET"
-                elif event.key == pygame.K_SEMICOLON:
-                    key_name = "SEMICOLON"
-                elif event.key == pygame.K_QUOTE:
-                    key_name = "QUOTE"
-                elif event.key == pygame.K_COMMA:
-                    key_name = "COMMA"
-                elif event.key == pygame.K_PERIOD:
-                    key_name = "PERIOD"
-                elif event.key == pygame.K_BACKQUOTE:
-                    key_name = "BACKQUOTE"
-                
-                # 将按键名称转换为大写
-                key_name = key_name.upper()
-                
-                # 更新按键绑定
-                update_key_binding(player, action, key_name)
-                waiting = False
-            elif event.type == pygame.QUIT:
-                return False
-    return True
\ No newline at end of file
+    """绘制按键绑定提示，返回绘制区域；按键由主循环的事件处理捕获"""
+    prompt_text = text_cache.render(font, f"请按下新的按键来设置{player}的{action}（ESC 取消）", (255, 255, 255))
+    pos = (screen.get_width() // 2 - prompt_text.get_width() // 2,
+           screen.get_height() // 2 - prompt_text.get_height() // 2)
+    screen.blit(prompt_text, pos)
+    return pygame.Rect(pos, prompt_text.get_size())